@@ -0,0 +1,127 @@
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from django.conf import settings
+from .rate_limiter import build_rate_limiter
+from .response_cache import ResponseCache
+
+
+class ApiError(Exception):
+    """Échec d'une requête API (erreur renvoyée par l'API ou réseau) : la requête est à refaire."""
+
+
+class ApiQuotaExceeded(ApiError):
+    """Quota de l'API épuisé (quota quotidien, ou par minute malgré les nouvelles tentatives)."""
+
+
+class ApiSportsClient:
+    """Client HTTP partagé pour l'API-Sports : connexions keep-alive et rate limiting global."""
+    MAX_RETRIES = 3
+    RETRY_DELAY = 60  # Pause par défaut quand le quota est dépassé
+    QUOTA_ERRORS = {'rateLimit', 'requests'}  # Clés d'erreur de l'API signalant un quota épuisé
+
+    def __init__(self, limiter=None, cache_mode=None):
+        self.base_url = settings.API_SPORTS_BASE_URL.rstrip('/')
+        self.limiter = limiter or build_rate_limiter()
+        self.cache_mode = cache_mode or settings.API_SPORTS_CACHE
+        self.cache = ResponseCache() if self.cache_mode in ('on', 'replay') else None
+        self.session = requests.Session()
+        self.session.headers.update({'x-apisports-key': settings.API_SPORTS_KEY})
+
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.API_SPORTS_POOL_SIZE
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self.request_count = 0
+        self.count_lock = threading.Lock()
+
+    def _is_rate_limited(self, response, data):
+        """Détecte un dépassement de quota (HTTP 429 ou erreur 'rateLimit' de l'API)."""
+        if response.status_code == 429:
+            return True
+        errors = data.get('errors') if isinstance(data, dict) else None
+        return isinstance(errors, dict) and 'rateLimit' in errors
+
+    def get(self, endpoint, params=None, timeout=30):
+        """
+        Effectue un GET sur l'API en respectant le quota et retourne le JSON décodé.
+        Les réponses sont servies depuis le cache disque tant qu'elles sont valides ;
+        en mode 'replay', seul le cache est utilisé (aucun appel réseau).
+        """
+        if self.cache_mode == 'replay':
+            data = self.cache.get(endpoint, params, allow_expired=True)
+            if data is None:
+                print(f"⚠️ Réponse absente du cache (replay): {endpoint} {params or ''}")
+                return {'errors': {'cache': 'Réponse absente du cache'}, 'response': []}
+            return data
+
+        if self.cache:
+            data = self.cache.get(endpoint, params)
+            if data is not None:
+                return data
+
+        data = self.fetch(endpoint, params, timeout)
+        if self.cache:
+            self.cache.set(endpoint, params, data)
+        return data
+
+    def get_response(self, endpoint, params=None, timeout=30):
+        """
+        Retourne le champ 'response' d'un appel (liste vide si l'API n'a aucune donnée).
+        Lève ApiQuotaExceeded si le quota est épuisé, ApiError pour toute autre erreur
+        de l'API ou du réseau, afin que l'appelant ne confonde pas échec et absence de données.
+        """
+        try:
+            data = self.get(endpoint, params, timeout)
+        except requests.HTTPError as e:
+            if e.response is not None and e.response.status_code == 429:
+                raise ApiQuotaExceeded(f"{endpoint} : HTTP 429") from e
+            raise ApiError(f"{endpoint} : {e}") from e
+        except requests.RequestException as e:
+            raise ApiError(f"{endpoint} : {e}") from e
+
+        if not isinstance(data, dict):
+            raise ApiError(f"{endpoint} : réponse invalide")
+        errors = data.get('errors')
+        if errors:
+            if isinstance(errors, dict) and self.QUOTA_ERRORS & errors.keys():
+                raise ApiQuotaExceeded(f"{endpoint} : {errors}")
+            raise ApiError(f"{endpoint} : {errors}")
+        return data.get('response') or []
+
+    def fetch(self, endpoint, params=None, timeout=30):
+        """Appel réseau avec rate limiting et nouvelles tentatives en cas de quota dépassé."""
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+
+        for attempt in range(self.MAX_RETRIES + 1):
+            self.limiter.acquire()
+            response = self.session.get(url, params=params, timeout=timeout)
+            with self.count_lock:
+                self.request_count += 1
+
+            data = response.json() if response.status_code == 200 else None
+            if self._is_rate_limited(response, data) and attempt < self.MAX_RETRIES:
+                delay = float(response.headers.get('Retry-After') or self.RETRY_DELAY)
+                print(f"⏳ Quota API dépassé, pause de {delay:.1f} secondes")
+                time.sleep(delay)
+                continue
+
+            response.raise_for_status()
+            return data
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_api_client():
+    """Retourne le client API partagé par tous les services du processus."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ApiSportsClient()
+        return _client
@@ -0,0 +1,257 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+import redis
+from django.conf import settings
+from .api_client import get_api_client
+
+
+class FileCheckpointStore:
+    """
+    Stockage des points de reprise sur disque :
+    {dir}/{job}/plan.json, done_{shard}.txt (un ID par ligne, en ajout) et progress_{shard}.json.
+    Chaque shard n'écrit que ses propres fichiers.
+    """
+
+    def __init__(self, directory=None):
+        self.directory = str(directory or settings.SYNC_CHECKPOINT_DIR)
+
+    def get_job_dir(self, job):
+        path = os.path.join(self.directory, job)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def load_plan(self, job):
+        path = os.path.join(self.get_job_dir(job), 'plan.json')
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def create_plan(self, job, plan):
+        """Enregistre le plan s'il n'existe pas encore ; retourne le plan en vigueur."""
+        path = os.path.join(self.get_job_dir(job), 'plan.json')
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(plan, f, separators=(',', ':'))
+        try:
+            os.link(tmp_path, path)
+        except FileExistsError:
+            pass
+        finally:
+            os.remove(tmp_path)
+        return self.load_plan(job)
+
+    def add_done(self, job, shard, fixture_ids):
+        with open(os.path.join(self.get_job_dir(job), f'done_{shard}.txt'), 'a') as f:
+            f.write(''.join(f'{fixture_id}\n' for fixture_id in fixture_ids))
+
+    def get_done(self, job):
+        done = set()
+        job_dir = self.get_job_dir(job)
+        for name in os.listdir(job_dir):
+            if name.startswith('done_'):
+                with open(os.path.join(job_dir, name)) as f:
+                    done.update(line.strip() for line in f if line.strip())
+        return done
+
+    def load_progress(self, job, shard):
+        path = os.path.join(self.get_job_dir(job), f'progress_{shard}.json')
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return json.load(f)
+
+    def save_progress(self, job, shard, progress):
+        path = os.path.join(self.get_job_dir(job), f'progress_{shard}.json')
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(progress, f)
+        os.replace(f'{path}.tmp', path)
+
+    def clear(self, job):
+        job_dir = self.get_job_dir(job)
+        for name in os.listdir(job_dir):
+            os.remove(os.path.join(job_dir, name))
+        os.rmdir(job_dir)
+
+
+class RedisCheckpointStore:
+    """
+    Stockage des points de reprise dans Redis, partagé entre machines :
+    checkpoint:{job}:plan (JSON), checkpoint:{job}:done (set) et checkpoint:{job}:progress (hash par shard).
+    """
+    KEY_PREFIX = 'checkpoint'
+
+    def __init__(self, redis_client=None):
+        self.redis_client = redis_client or redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            socket_timeout=5,
+            socket_connect_timeout=2
+        )
+
+    def get_key(self, job, name):
+        return f'{self.KEY_PREFIX}:{job}:{name}'
+
+    def load_plan(self, job):
+        plan = self.redis_client.get(self.get_key(job, 'plan'))
+        return json.loads(plan) if plan else None
+
+    def create_plan(self, job, plan):
+        self.redis_client.set(self.get_key(job, 'plan'), json.dumps(plan, separators=(',', ':')), nx=True)
+        return self.load_plan(job)
+
+    def add_done(self, job, shard, fixture_ids):
+        if fixture_ids:
+            self.redis_client.sadd(self.get_key(job, 'done'), *fixture_ids)
+
+    def get_done(self, job):
+        return {fixture_id.decode() for fixture_id in self.redis_client.smembers(self.get_key(job, 'done'))}
+
+    def load_progress(self, job, shard):
+        progress = self.redis_client.hget(self.get_key(job, 'progress'), shard)
+        return json.loads(progress) if progress else {}
+
+    def save_progress(self, job, shard, progress):
+        self.redis_client.hset(self.get_key(job, 'progress'), shard, json.dumps(progress))
+
+    def clear(self, job):
+        self.redis_client.delete(*(self.get_key(job, name) for name in ('plan', 'done', 'progress')))
+
+
+def build_checkpoint_store():
+    """Construit le stockage des points de reprise configuré : fichier local ou Redis."""
+    if settings.SYNC_CHECKPOINT_BACKEND == 'redis':
+        return RedisCheckpointStore()
+    return FileCheckpointStore()
+
+
+class SyncCheckpoint:
+    """
+    Point de reprise d'une synchronisation longue.
+
+    Le premier lancement enregistre le plan (liste des matchs à traiter) ; les lancements
+    suivants reprennent ce plan sans rebalayer Firebase, moins les matchs déjà traités.
+    Avec plusieurs shards, chaque worker prend les matchs restants dont
+    fixture_id % shards == shard, quel que soit le découpage des lancements précédents.
+    """
+    SAVE_INTERVAL = 5  # Secondes minimales entre deux sauvegardes de la progression
+
+    def __init__(self, job, shard=0, shards=1, store=None, api_client=None):
+        if not 0 <= shard < shards:
+            raise ValueError(f"Shard invalide : {shard} (shards={shards})")
+        self.job = job
+        self.shard = shard
+        self.shards = shards
+        self.store = store or build_checkpoint_store()
+        self.api_client = api_client or get_api_client()
+        self.lock = threading.Lock()
+        self.total = 0
+        self.cursor = 0
+        self.requests_before = 0
+        self.requests_previous = 0
+        self.last_save = 0.0
+
+    def get_matches(self, find_matches):
+        """Retourne les matchs restants de ce shard, en créant le plan via find_matches() au besoin."""
+        plan = self.store.load_plan(self.job)
+        if plan is None:
+            plan = self.store.create_plan(self.job, [
+                [str(m['fixture_id']), str(m['season']), str(m['league_id']), m.get('status')]
+                for m in find_matches()
+            ])
+            print(f"📌 Point de reprise créé pour '{self.job}' : {len(plan)} match(s)")
+
+        done = self.store.get_done(self.job)
+        matches = [
+            {'fixture_id': fixture_id, 'season': season, 'league_id': league_id, 'status': (status or [None])[0]}
+            for fixture_id, season, league_id, *status in plan
+            if fixture_id not in done and int(fixture_id) % self.shards == self.shard
+        ]
+        if done:
+            print(f"⏩ Reprise de '{self.job}' : {len(done)}/{len(plan)} match(s) déjà traité(s)")
+
+        progress = self.store.load_progress(self.job, self.shard)
+        self.requests_previous = progress.get('requests', 0)
+        self.requests_before = self.api_client.request_count
+        self.total = len(matches)
+        self.cursor = 0
+        return matches
+
+    def mark_done(self, fixture_ids):
+        """Enregistre des matchs traités (sauvegardés, ou sans données disponibles)."""
+        fixture_ids = [str(fixture_id) for fixture_id in fixture_ids]
+        with self.lock:
+            self.store.add_done(self.job, self.shard, fixture_ids)
+            self.cursor += len(fixture_ids)
+            if time.monotonic() - self.last_save >= self.SAVE_INTERVAL:
+                self.save_progress()
+
+    def save_progress(self):
+        """Sauvegarde la position et le quota consommé par ce shard."""
+        self.last_save = time.monotonic()
+        self.store.save_progress(self.job, self.shard, {
+            'cursor': self.cursor,
+            'total': self.total,
+            'requests': self.requests_previous + self.api_client.request_count - self.requests_before,
+            'updated_at': datetime.now().isoformat()
+        })
+
+    def finish(self):
+        """Clôt le shard ; supprime le point de reprise quand tout le plan est traité."""
+        with self.lock:
+            self.save_progress()
+            plan = self.store.load_plan(self.job) or []
+            done = self.store.get_done(self.job)
+            remaining = sum(1 for fixture_id, *_ in plan if fixture_id not in done)
+
+        if remaining:
+            print(f"📌 '{self.job}' : {remaining} match(s) restant(s) dans le point de reprise")
+            return False
+
+        self.store.clear(self.job)
+        print(f"🏁 Point de reprise de '{self.job}' terminé et supprimé")
+        return True
+
+    def reset(self):
+        """Abandonne le point de reprise existant."""
+        self.store.clear(self.job)
+
+
+def add_checkpoint_arguments(parser):
+    """Ajoute aux commandes de synchronisation les options du point de reprise de --sync."""
+    parser.add_argument(
+        '--shard',
+        type=int,
+        default=0,
+        help='Index du shard traité par ce worker pour --sync (0..shards-1)'
+    )
+    parser.add_argument(
+        '--shards',
+        type=int,
+        default=1,
+        help='Nombre de workers se partageant les matchs restants du point de reprise'
+    )
+    parser.add_argument(
+        '--restart',
+        action='store_true',
+        help='Abandonne le point de reprise existant et rebalaye Firebase'
+    )
+    parser.add_argument(
+        '--no-checkpoint',
+        action='store_true',
+        help='Désactive le point de reprise pour --sync'
+    )
+
+
+def checkpoint_from_options(options, job):
+    """Construit le point de reprise d'une commande (None avec --no-checkpoint)."""
+    if options['no_checkpoint']:
+        return None
+    checkpoint = SyncCheckpoint(job, options['shard'], options['shards'])
+    if options['restart']:
+        checkpoint.reset()
+    return checkpoint
@@ -28,6 +28,11 @@ class MatchStatus:
         'CANC'       # Cancelled
     }
 
+    # Statuts des matchs programmés ou en cours (susceptibles d'évoluer)
+    ACTIVE_STATUSES = {TBD, NS, PST} | LIVE_STATUSES
+
+    ALL_STATUSES = ACTIVE_STATUSES | FINISHED_STATUSES
+
     @classmethod
     def is_live(cls, status):
         """Vérifie si le match est en cours."""
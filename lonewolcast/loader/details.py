@@ -0,0 +1,97 @@
+from firebase_admin import db
+from .firebase_utils import iter_league_keys, get_child_keys
+
+class FixtureDetailStore:
+    """
+    Arbres des détails volumineux des matchs, séparés du nœud du match.
+
+    fixture_details/{kind}/fixture_{id} -> données du détail (events, lineups...)
+
+    Le nœud matches/season_{s}/league_{l}/fixtures/fixture_{id} ne garde que le résumé
+    léger lu par les filtres et les métriques, ainsi que les horodatages {kind}_updated_at.
+    """
+
+    KINDS = (
+        'events',
+        'lineups',
+        'statistics_global',
+        'statistics_with_ht_data',
+        'players_stats',
+        'prediction'
+    )
+
+    def __init__(self):
+        self.root_ref = db.reference()
+
+    def get_detail_path(self, kind, fixture_id):
+        """Retourne le chemin d'un détail de match."""
+        return f'fixture_details/{kind}/fixture_{fixture_id}'
+
+    def get_detail(self, kind, fixture_id):
+        """Lit un détail de match (None s'il est absent)."""
+        return self.root_ref.child(self.get_detail_path(kind, fixture_id)).get()
+
+    def get_fixture_keys(self, kind):
+        """Liste les clés fixture_{id} possédant un détail, par lecture superficielle."""
+        return set(get_child_keys(self.root_ref.child('fixture_details').child(kind)))
+
+    def build_clear_updates(self, fixture_ids, kinds=KINDS):
+        """Prépare la suppression multi-chemins des détails de plusieurs matchs."""
+        return {
+            self.get_detail_path(kind, fixture_id): None
+            for fixture_id in fixture_ids
+            for kind in kinds
+        }
+
+    def build_migration_updates(self, fixture_path, fixture_id, fixture_data):
+        """
+        Prépare le déplacement des détails encore stockés dans le nœud d'un match
+        vers leurs arbres dédiés (aucune mise à jour s'il n'y en a pas).
+        """
+        updates = {}
+        for kind in self.KINDS:
+            if fixture_data.get(kind) is None:
+                continue
+            updates[self.get_detail_path(kind, fixture_id)] = fixture_data[kind]
+            updates[f'{fixture_path}/{kind}'] = None
+        return updates
+
+    def migrate(self, batch_size=50, dry_run=False):
+        """
+        Déplace les détails stockés dans les nœuds des matchs vers fixture_details,
+        ligue par ligue, par écritures multi-chemins de batch_size matchs au plus.
+        Retourne le nombre de matchs migrés.
+        """
+        migrated = 0
+        for season_key, league_key in iter_league_keys(self.root_ref.child('matches')):
+            fixtures_path = f'matches/{season_key}/{league_key}/fixtures'
+            fixtures = self.root_ref.child(fixtures_path).get() or {}
+
+            updates = {}
+            pending = 0
+            league_migrated = 0
+            for fixture_key, fixture_data in fixtures.items():
+                if not isinstance(fixture_data, dict):
+                    continue
+                fixture_updates = self.build_migration_updates(
+                    f'{fixtures_path}/{fixture_key}', fixture_key.replace('fixture_', ''), fixture_data
+                )
+                if not fixture_updates:
+                    continue
+
+                updates.update(fixture_updates)
+                pending += 1
+                league_migrated += 1
+                if pending >= batch_size:
+                    if not dry_run:
+                        self.root_ref.update(updates)
+                    updates = {}
+                    pending = 0
+
+            if updates and not dry_run:
+                self.root_ref.update(updates)
+            if league_migrated:
+                print(f"📦 {season_key}/{league_key} : {league_migrated} match(s) migré(s)")
+            migrated += league_migrated
+
+        return migrated
@@ -1,8 +1,9 @@
-import requests
-from django.conf import settings
 from firebase_admin import db
-import time
 from datetime import datetime
+from .api_client import ApiError, get_api_client
+from .pipeline import FixtureDetailPipeline
+from .indexes import FixtureIndex
+from .details import FixtureDetailStore
 
 class MatchStatus:
     """Statuts des matchs pour filtrage."""
@@ -11,74 +12,38 @@ class MatchStatus:
 
 class EventService:
     """Service pour gérer les événements des matchs."""
-    RATE_LIMIT = 450
-    DELAY = 60 / RATE_LIMIT
 
     def __init__(self):
-        self.headers = {'x-apisports-key': settings.API_SPORTS_KEY}
+        self.api_client = get_api_client()
         self.root_ref = db.reference()
-        self.last_request_time = time.time()
-        self.request_count = 0
+        self.index = FixtureIndex()
+        self.details = FixtureDetailStore()
+
+    def get_match_path(self, season, league_id, fixture_id):
+        """Retourne le chemin Firebase d'un match donné."""
+        return f'matches/season_{season}/league_{league_id}/fixtures/fixture_{fixture_id}'
 
     def get_match_ref(self, season, league_id, fixture_id):
         """Retourne la référence Firebase pour un match donné."""
-        return (self.root_ref
-                .child('matches')
-                .child(f'season_{season}')
-                .child(f'league_{league_id}')
-                .child('fixtures')
-                .child(f'fixture_{fixture_id}'))
-
-    def wait_for_rate_limit(self):
-        """Gestion du taux limite pour l'API."""
-        current_time = time.time()
-        elapsed_time = current_time - self.last_request_time
-
-        if elapsed_time >= 60:
-            self.request_count = 0
-            self.last_request_time = current_time
-            return
-
-        if self.request_count >= self.RATE_LIMIT:
-            sleep_time = 60 - elapsed_time
-            if sleep_time > 0:
-                print(f"⏳ Limite atteinte, pause de {sleep_time:.1f} secondes")
-                time.sleep(sleep_time)
-                self.request_count = 0
-                self.last_request_time = time.time()
-        else:
-            time.sleep(self.DELAY)
-
-        self.request_count += 1
+        return self.root_ref.child(self.get_match_path(season, league_id, fixture_id))
 
     def fetch_events(self, fixture_id):
-        """Récupère les événements pour un match spécifique."""
-        try:
-            self.wait_for_rate_limit()
-            url = f"{settings.API_SPORTS_BASE_URL}/fixtures/events"
-            params = {'fixture': str(fixture_id)}
-
-            print(f"🔄 Récupération des événements - Match {fixture_id}")
+        """
+        Récupère les événements pour un match spécifique ; None si l'API ne renvoie aucune donnée.
+        Lève ApiError (ApiQuotaExceeded si le quota est épuisé) si la requête échoue.
+        """
+        params = {'fixture': str(fixture_id)}
 
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
+        print(f"🔄 Récupération des événements - Match {fixture_id}")
 
-            if 'errors' in data and data['errors']:
-                print(f"⚠️ Erreur API: {data['errors']}")
-                return None
+        events = self.api_client.get_response('fixtures/events', params)
+        if events:
+            print(f"✅ {len(events)} événement(s) récupéré(s) pour le match {fixture_id}")
+            return events
 
-            events = data.get('response', [])
-            if events:
-                print(f"✅ {len(events)} événement(s) récupéré(s) pour le match {fixture_id}")
-                return events
+        print("ℹ️ Aucun événement disponible pour le match.")
+        return None
 
-            print("ℹ️ Aucun événement disponible pour le match.")
-            return None
-
-        except Exception as e:
-            print(f"❌ Erreur lors de la récupération des événements : {str(e)}")
-            return None
 
     def process_event(self, event):
         """Traite un événement pour la sauvegarde."""
@@ -92,19 +57,25 @@ class EventService:
             'comments': event['comments']
         }
 
-    def save_events(self, fixture_id, events, season, league_id):
-        """Sauvegarde les événements dans le nœud du match correspondant."""
+    def build_events_updates(self, fixture_id, events, season, league_id, status=None):
+        """Prépare la mise à jour multi-chemins des événements d'un match."""
+        match_path = self.get_match_path(season, league_id, fixture_id)
+        updates = {
+            self.details.get_detail_path('events', fixture_id): [
+                self.process_event(event) for event in events
+            ],
+            f'{match_path}/events_updated_at': datetime.now().isoformat()
+        }
+        updates.update(self.index.build_flag_updates(fixture_id, status, 'events', season=season, league_id=league_id))
+        return updates
+
+    def save_events(self, fixture_id, events, season, league_id, status=None):
+        """Sauvegarde les événements dans l'arbre des détails du match."""
         try:
             if not events:
                 return False
 
-            processed_events = [self.process_event(event) for event in events]
-            match_ref = self.get_match_ref(season, league_id, fixture_id)
-
-            match_ref.update({
-                'events': processed_events,
-                'events_updated_at': datetime.now().isoformat()
-            })
+            self.root_ref.update(self.build_events_updates(fixture_id, events, season, league_id, status))
 
             print(f"💾 Événements sauvegardés pour le match {fixture_id}")
             return True
@@ -114,61 +85,46 @@ class EventService:
             return False
 
     def get_matches_by_status(self, status_set):
-        """Récupère les matchs selon leur statut."""
-        matches = []
-        seasons_ref = self.root_ref.child('matches').get() or {}
-
-        for season_key, season_data in seasons_ref.items():
-            if not isinstance(season_data, dict):
-                continue
-
-            season = season_key.replace('season_', '')
-            for league_key, league_data in season_data.items():
-                if not isinstance(league_data, dict):
-                    continue
-
-                league_id = league_key.replace('league_', '')
-                for fixture_key, fixture_data in league_data.get('fixtures', {}).items():
-                    if not isinstance(fixture_data, dict):
-                        continue
-
-                    match_status = fixture_data.get('metadata', {}).get('status')
-                    if match_status in status_set:
-                        fixture_id = fixture_key.replace('fixture_', '')
-                        matches.append({
-                            'fixture_id': fixture_id,
-                            'season': season,
-                            'league_id': league_id,
-                            'has_events': 'events' in fixture_data
-                        })
-
-        return matches
-
-    def sync_match_events(self, fixture_id, season, league_id):
+        """Récupère les matchs selon leur statut depuis l'index des statuts, sans lire l'arbre des matchs."""
+        return self.index.get_matches(status_set)
+
+    def sync_match_events(self, fixture_id, season, league_id, status=None):
         """Synchronise les événements pour un match spécifique."""
-        events = self.fetch_events(fixture_id)
+        try:
+            events = self.fetch_events(fixture_id)
+        except ApiError as e:
+            print(f"❌ Erreur lors de la récupération des événements : {str(e)}")
+            return False
         if events:
-            return self.save_events(fixture_id, events, season, league_id)
+            return self.save_events(fixture_id, events, season, league_id, status)
         return False
 
-    def sync_finished_matches(self):
+    def sync_finished_matches(self, workers=1, batch_size=50, checkpoint=None):
         """Synchronise les événements des matchs terminés."""
-        finished_matches = self.get_matches_by_status(MatchStatus.FINISHED)
-        matches_without_events = [m for m in finished_matches if not m['has_events']]
+        def find_matches():
+            finished_matches = self.get_matches_by_status(MatchStatus.FINISHED)
+            return [m for m in finished_matches if not m['has_events']]
+
+        matches_without_events = checkpoint.get_matches(find_matches) if checkpoint else find_matches()
         total = len(matches_without_events)
 
         if not total:
             print("ℹ️ Aucun match terminé sans événements.")
+            if checkpoint:
+                checkpoint.finish()
             return 0
 
         print(f"📊 Synchronisation des événements pour {total} match(s) terminé(s).")
-        updated = 0
-
-        for match in matches_without_events:
-            if self.sync_match_events(match['fixture_id'], match['season'], match['league_id']):
-                updated += 1
+        # Sans parallélisme, chaque match est écrit dès sa récupération (lots d'un match)
+        pipeline = FixtureDetailPipeline(
+            self.fetch_events, self.build_events_updates, workers, batch_size if workers > 1 else 1,
+            on_flush=checkpoint.mark_done if checkpoint else None
+        )
+        updated = pipeline.run(matches_without_events)
 
         print(f"✅ {updated}/{total} matchs synchronisés.")
+        if checkpoint:
+            checkpoint.finish()
         return updated
 
     def update_live_matches(self):
@@ -184,7 +140,7 @@ class EventService:
         updated = 0
 
         for match in live_matches:
-            if self.sync_match_events(match['fixture_id'], match['season'], match['league_id']):
+            if self.sync_match_events(match['fixture_id'], match['season'], match['league_id'], match.get('status')):
                 updated += 1
 
         print(f"✅ {updated}/{total} matchs mis à jour.")
@@ -199,8 +155,12 @@ class EventService:
             cleared = 0
             for match in matches:
                 match_ref = self.get_match_ref(match['season'], match['league_id'], match['fixture_id'])
-                match_ref.child('events').delete()
+                self.root_ref.child(self.details.get_detail_path('events', match['fixture_id'])).delete()
                 match_ref.child('events_updated_at').delete()
+                if match.get('status'):
+                    self.root_ref.update(self.index.build_flag_updates(
+                        match['fixture_id'], match['status'], 'events', False
+                    ))
                 cleared += 1
 
             print(f"✅ Événements supprimés pour {cleared} match(s).")
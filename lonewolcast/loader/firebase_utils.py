@@ -0,0 +1,37 @@
+"""
+Accès Firebase par clés : lectures superficielles (REST shallow=true) qui ne renvoient que
+les clés des enfants d'un nœud, pour énumérer, compter ou supprimer sans télécharger
+les données.
+"""
+
+
+def get_child_keys(ref):
+    """Retourne les clés (triées) des enfants d'un nœud, par lecture superficielle."""
+    keys = ref.get(shallow=True)
+    return sorted(keys) if isinstance(keys, dict) else []
+
+
+def count_children(ref):
+    """Compte les enfants d'un nœud sans lire leur contenu."""
+    return len(get_child_keys(ref))
+
+
+def iter_league_keys(ref, season=None, league_id=None):
+    """
+    Énumère les couples (season_{s}, league_{l}) d'un arbre organisé par saison et ligue
+    (matches, match_summaries, fixture_hashes), éventuellement restreints à une saison ou une ligue.
+    """
+    for season_key in get_child_keys(ref):
+        if season is not None and season_key != f'season_{season}':
+            continue
+        for league_key in get_child_keys(ref.child(season_key)):
+            if league_id is not None and league_key != f'league_{league_id}':
+                continue
+            yield season_key, league_key
+
+
+def delete_children(ref, keys):
+    """Supprime plusieurs enfants d'un nœud en une seule écriture multi-chemins."""
+    if keys:
+        ref.update({key: None for key in keys})
+    return len(keys)
@@ -0,0 +1,117 @@
+from firebase_admin import db
+from .api_client import get_api_client
+from .constants import MatchStatus
+from .pipeline import FixtureDetailPipeline
+from .events_service import EventService
+from .lineups_service import LineupService
+from .statistics_service import StatisticsService
+from .players_stats_service import PlayersStatsService
+
+class FixtureDetailsService:
+    """
+    Service de chargement groupé des détails des matchs via fixtures?ids=.
+    Une seule requête renvoie, pour 20 matchs au plus, les événements, compositions,
+    statistiques et statistiques joueurs (au lieu de 4 requêtes par match).
+    """
+    MAX_IDS = 20  # Nombre maximal d'IDs acceptés par l'API pour fixtures?ids=
+
+    def __init__(self):
+        self.api_client = get_api_client()
+        self.root_ref = db.reference()
+        self.event_service = EventService()
+        self.lineup_service = LineupService()
+        self.statistics_service = StatisticsService()
+        self.players_stats_service = PlayersStatsService()
+
+    def fetch_fixtures_details(self, fixture_ids):
+        """
+        Récupère les détails complets d'un groupe de matchs (20 maximum) : {fixture_id: match}.
+        Lève ApiError (ApiQuotaExceeded si le quota est épuisé) si la requête échoue.
+        """
+        params = {'ids': '-'.join(str(fixture_id) for fixture_id in fixture_ids)}
+
+        print(f"🔄 Récupération groupée des détails - {len(fixture_ids)} match(s)")
+
+        return {
+            str(fixture['fixture']['id']): fixture
+            for fixture in self.api_client.get_response('fixtures', params)
+        }
+
+    def build_fixture_updates(self, fixture_id, fixture_data, season, league_id, status=None):
+        """Prépare la mise à jour multi-chemins de tous les détails disponibles d'un match."""
+        updates = {}
+
+        if fixture_data.get('events'):
+            updates.update(self.event_service.build_events_updates(
+                fixture_id, fixture_data['events'], season, league_id, status))
+        if fixture_data.get('lineups'):
+            updates.update(self.lineup_service.build_lineups_updates(
+                fixture_id, fixture_data['lineups'], season, league_id, status))
+        if fixture_data.get('statistics'):
+            updates.update(self.statistics_service.build_statistics_updates(
+                fixture_id, fixture_data['statistics'], season, league_id, status))
+        if fixture_data.get('players'):
+            updates.update(self.players_stats_service.build_players_stats_updates(
+                fixture_id, fixture_data['players'], season, league_id, status))
+
+        return updates
+
+    def get_matches_by_status(self, status_set):
+        """Récupère les matchs selon leur statut depuis l'index, avec l'état de chacun de leurs détails."""
+        return self.event_service.index.get_matches(status_set)
+
+    def sync_matches(self, matches, workers=1, batch_size=50, on_flush=None):
+        """Synchronise les détails d'une liste de matchs par groupes de MAX_IDS."""
+        pipeline = FixtureDetailPipeline(
+            self.fetch_fixtures_details,
+            self.build_fixture_updates,
+            workers,
+            batch_size,
+            chunk_size=self.MAX_IDS,
+            on_flush=on_flush
+        )
+        return pipeline.run(matches)
+
+    def sync_finished_matches(self, workers=1, batch_size=50, checkpoint=None):
+        """Synchronise les détails des matchs terminés auxquels il manque au moins un détail."""
+        def find_matches():
+            finished_matches = self.get_matches_by_status(MatchStatus.FINISHED_STATUSES)
+            return [
+                m for m in finished_matches
+                if not (m['has_events'] and m['has_lineups'] and m['has_stats'] and m['has_players_stats'])
+            ]
+
+        incomplete_matches = checkpoint.get_matches(find_matches) if checkpoint else find_matches()
+        total = len(incomplete_matches)
+
+        if not total:
+            print("ℹ️ Aucun match terminé avec des détails manquants.")
+            if checkpoint:
+                checkpoint.finish()
+            return 0
+
+        print(f"📊 Synchronisation groupée des détails pour {total} match(s) terminé(s).")
+        updated = self.sync_matches(
+            incomplete_matches, workers, batch_size,
+            on_flush=checkpoint.mark_done if checkpoint else None
+        )
+
+        print(f"✅ {updated}/{total} matchs synchronisés.")
+        if checkpoint:
+            checkpoint.finish()
+        return updated
+
+    def update_live_matches(self, workers=1, batch_size=50):
+        """Met à jour les détails des matchs en cours."""
+        live_matches = self.get_matches_by_status(MatchStatus.LIVE_STATUSES)
+        total = len(live_matches)
+
+        if not total:
+            print("ℹ️ Aucun match en cours.")
+            return 0
+
+        print(f"🔄 Mise à jour groupée des détails pour {total} match(s) en cours.")
+        updated = self.sync_matches(live_matches, workers, batch_size)
+
+        print(f"✅ {updated}/{total} matchs mis à jour.")
+        return updated
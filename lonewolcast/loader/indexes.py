@@ -0,0 +1,386 @@
+from firebase_admin import db
+from .constants import MatchStatus
+from .details import FixtureDetailStore
+from .summaries import MatchSummaries
+from .firebase_utils import iter_league_keys, get_child_keys
+
+class FixtureIndex:
+    """
+    Index secondaires des matchs, maintenus au moment de l'écriture.
+
+    index/status/{status}/fixture_{id} -> {season, league, timestamp, has_events, has_lineups,
+                                          has_stats, has_stats_ht, has_players_stats}
+    index/team/team_{team_id}/fixture_{id} -> {season, league, timestamp, location, status}
+    index/h2h/{min_id}_{max_id}/fixture_{id} -> {season, league, date, timestamp, home, status}
+    index/date/{YYYY-MM-DD}/fixture_{id} -> {season, league, timestamp, status}
+
+    Les indicateurs has_* sont positionnés par les services de détails lors de leurs sauvegardes
+    (détails stockés dans fixture_details/{kind}, voir FixtureDetailStore).
+    """
+
+    # Nœud de détail d'un match -> indicateur correspondant dans l'index
+    DETAIL_FLAGS = {
+        'events': 'has_events',
+        'lineups': 'has_lineups',
+        'statistics_global': 'has_stats',
+        'statistics_with_ht_data': 'has_stats_ht',
+        'players_stats': 'has_players_stats',
+        'prediction': 'has_prediction'
+    }
+
+    def __init__(self):
+        self.root_ref = db.reference()
+
+    def get_status_path(self, status, fixture_id):
+        """Retourne le chemin d'une entrée de l'index des statuts."""
+        return f'index/status/{status}/fixture_{fixture_id}'
+
+    def build_status_updates(self, fixture_id, status, season, league_id, timestamp, previous_status=None, flags=None):
+        """
+        Prépare la mise à jour multi-chemins de l'index des statuts pour un match.
+        Sans changement de statut connu, seuls les champs de base sont réécrits (les indicateurs
+        has_* sont conservés) et, si le statut précédent est inconnu, l'entrée est retirée de tous
+        les autres statuts ; sinon l'entrée est recréée avec `flags` et retirée de l'ancien statut.
+        """
+        entry = {
+            'season': int(season),
+            'league': int(league_id),
+            'timestamp': timestamp
+        }
+        status_path = self.get_status_path(status, fixture_id)
+
+        if previous_status is None or previous_status == status:
+            updates = {f'{status_path}/{field}': value for field, value in entry.items()}
+        else:
+            updates = {status_path: dict(entry, **(flags or {}))}
+
+        if previous_status is None:
+            stale_statuses = MatchStatus.ALL_STATUSES - {status}
+        elif previous_status != status:
+            stale_statuses = {previous_status}
+        else:
+            stale_statuses = set()
+
+        for stale_status in stale_statuses:
+            updates[self.get_status_path(stale_status, fixture_id)] = None
+
+        return updates
+
+    def get_team_path(self, team_id, fixture_id):
+        """Retourne le chemin d'une entrée de l'index des équipes."""
+        return f'index/team/team_{team_id}/fixture_{fixture_id}'
+
+    def build_team_updates(self, fixture_id, teams, season, league_id, timestamp, status):
+        """Prépare la mise à jour de l'index des équipes (domicile et extérieur) pour un match."""
+        updates = {}
+        for location in ('home', 'away'):
+            team_id = (teams.get(location) or {}).get('id')
+            if team_id is None:
+                continue
+            updates[self.get_team_path(team_id, fixture_id)] = {
+                'season': int(season),
+                'league': int(league_id),
+                'timestamp': timestamp,
+                'location': location,
+                'status': status
+            }
+        return updates
+
+    def get_team_entries(self, team_id):
+        """Lit les matchs d'une équipe depuis l'index : {fixture_id: entrée}."""
+        entries = self.root_ref.child('index').child('team').child(f'team_{team_id}').get() or {}
+        return {
+            fixture_key.replace('fixture_', ''): entry
+            for fixture_key, entry in entries.items()
+            if isinstance(entry, dict)
+        }
+
+    def get_h2h_key(self, team1_id, team2_id):
+        """Retourne la clé d'une paire d'équipes, indépendante de l'ordre : {min_id}_{max_id}."""
+        low, high = sorted((int(team1_id), int(team2_id)))
+        return f'{low}_{high}'
+
+    def get_h2h_path(self, team1_id, team2_id, fixture_id):
+        """Retourne le chemin d'une entrée de l'index des confrontations directes."""
+        return f'index/h2h/{self.get_h2h_key(team1_id, team2_id)}/fixture_{fixture_id}'
+
+    def build_h2h_updates(self, fixture_id, teams, season, league_id, date, timestamp, status):
+        """Prépare la mise à jour de l'index des confrontations directes pour un match."""
+        home_id = (teams.get('home') or {}).get('id')
+        away_id = (teams.get('away') or {}).get('id')
+        if home_id is None or away_id is None:
+            return {}
+        return {
+            self.get_h2h_path(home_id, away_id, fixture_id): {
+                'season': int(season),
+                'league': int(league_id),
+                'date': date,
+                'timestamp': timestamp,
+                'home': int(home_id),
+                'status': status
+            }
+        }
+
+    def get_h2h_entries(self, team1_id, team2_id):
+        """Lit les confrontations directes de deux équipes depuis l'index : {fixture_id: entrée}."""
+        entries = self.root_ref.child('index').child('h2h').child(self.get_h2h_key(team1_id, team2_id)).get() or {}
+        return {
+            fixture_key.replace('fixture_', ''): entry
+            for fixture_key, entry in entries.items()
+            if isinstance(entry, dict)
+        }
+
+    def get_date_key(self, date):
+        """Retourne la clé de jour (YYYY-MM-DD, UTC comme l'API) d'une date ISO 8601."""
+        return date[:10] if date else None
+
+    def get_date_path(self, date_key, fixture_id):
+        """Retourne le chemin d'une entrée de l'index des dates."""
+        return f'index/date/{date_key}/fixture_{fixture_id}'
+
+    def build_date_updates(self, fixture_id, season, league_id, date, timestamp, status, previous_date_key=None):
+        """
+        Prépare la mise à jour de l'index des dates pour un match ; un match reprogrammé
+        est retiré du jour `previous_date_key`.
+        """
+        date_key = self.get_date_key(date)
+        updates = {}
+        if previous_date_key and previous_date_key != date_key:
+            updates[self.get_date_path(previous_date_key, fixture_id)] = None
+        if date_key:
+            updates[self.get_date_path(date_key, fixture_id)] = {
+                'season': int(season),
+                'league': int(league_id),
+                'timestamp': timestamp,
+                'status': status
+            }
+        return updates
+
+    def get_date_entries(self, start_date, end_date=None):
+        """
+        Lit les matchs programmés entre deux jours inclus (YYYY-MM-DD) depuis l'index :
+        {fixture_id: entrée}. Une seule requête par plage de clés.
+        """
+        days = self.root_ref.child('index').child('date').order_by_key().start_at(
+            start_date
+        ).end_at(end_date or start_date).get() or {}
+        return {
+            fixture_key.replace('fixture_', ''): entry
+            for fixture_entries in days.values() if isinstance(fixture_entries, dict)
+            for fixture_key, entry in fixture_entries.items()
+            if isinstance(entry, dict)
+        }
+
+    def has_date_index(self):
+        """Indique si l'index des dates a été construit."""
+        return bool(get_child_keys(self.root_ref.child('index').child('date')))
+
+    def get_statistics_keys(self, teams, season, league_id, date_key):
+        """
+        Cardinalités (match_summaries_meta/statistics/{clé}) auxquelles un match compte :
+        leagues/season_{s}/league_{l}, teams/team_{id}, h2h/{min_id}_{max_id}, dates/{YYYY-MM-DD}.
+        """
+        keys = [f'leagues/season_{season}/league_{league_id}']
+        home_id = (teams.get('home') or {}).get('id')
+        away_id = (teams.get('away') or {}).get('id')
+        for team_id in (home_id, away_id):
+            if team_id is not None:
+                keys.append(f'teams/team_{team_id}')
+        if home_id is not None and away_id is not None:
+            keys.append(f'h2h/{self.get_h2h_key(home_id, away_id)}')
+        if date_key:
+            keys.append(f'dates/{date_key}')
+        return keys
+
+    def build_statistics_updates(self, counts):
+        """
+        Prépare l'incrément (côté serveur) des cardinalités d'un lot d'écritures :
+        counts associe chaque clé (voir get_statistics_keys) à sa variation.
+        """
+        return {
+            f'{MatchSummaries.STATISTICS_PATH}/{key}': {'.sv': {'increment': count}}
+            for key, count in counts.items() if count
+        }
+
+    def get_statistics(self):
+        """Lit les cardinalités des index en une requête ; {} avant le premier rebuild_indexes."""
+        return self.root_ref.child(MatchSummaries.STATISTICS_PATH).get() or {}
+
+    def build_flag_updates(self, fixture_id, status, detail_key, value=True, season=None, league_id=None):
+        """
+        Prépare la mise à jour de l'indicateur has_* d'un détail (aucune si le statut est inconnu),
+        sans lecture : le statut est celui de l'entrée lue dans l'index (get_matches).
+        Il peut être périmé (match en cours passé à FT depuis la lecture) : la saison et la ligue
+        sont donc réécrites avec l'indicateur, pour ne jamais créer d'entrée sans saison ni ligue ;
+        une telle entrée périmée est retirée par MatchService.update_unfinished_matches.
+        """
+        if not status:
+            return {}
+        status_path = self.get_status_path(status, fixture_id)
+        flag = self.DETAIL_FLAGS[detail_key]
+        if not value:
+            return {f'{status_path}/{flag}': None}
+
+        updates = {f'{status_path}/{flag}': True}
+        if season is not None and league_id is not None:
+            updates[f'{status_path}/season'] = int(season)
+            updates[f'{status_path}/league'] = int(league_id)
+        return updates
+
+    def build_clear_updates(self, fixture_id, fixture_data):
+        """
+        Prépare la suppression de toutes les entrées d'index d'un match (statuts, équipes,
+        confrontations directes, dates) à partir de son nœud dans l'arbre des matchs.
+        L'entrée est retirée de tous les statuts, y compris d'éventuels statuts périmés.
+        """
+        metadata = fixture_data.get('metadata') or {}
+        teams = fixture_data.get('teams') or {}
+        home_id = (teams.get('home') or {}).get('id')
+        away_id = (teams.get('away') or {}).get('id')
+
+        updates = {self.get_status_path(status, fixture_id): None for status in MatchStatus.ALL_STATUSES}
+        for team_id in (home_id, away_id):
+            if team_id is not None:
+                updates[self.get_team_path(team_id, fixture_id)] = None
+        if home_id is not None and away_id is not None:
+            updates[self.get_h2h_path(home_id, away_id, fixture_id)] = None
+        date_key = self.get_date_key(metadata.get('date'))
+        if date_key:
+            updates[self.get_date_path(date_key, fixture_id)] = None
+        return updates
+
+    def get_entry(self, status, fixture_id):
+        """Lit l'entrée de l'index d'un match pour un statut donné."""
+        return self.root_ref.child(self.get_status_path(status, fixture_id)).get() or {}
+
+    def get_flags(self, status, fixture_id):
+        """Retourne les indicateurs has_* positionnés pour un match."""
+        entry = self.get_entry(status, fixture_id)
+        return {flag: True for flag in self.DETAIL_FLAGS.values() if entry.get(flag)}
+
+    def get_matches(self, status_set):
+        """
+        Liste les matchs des statuts demandés depuis l'index :
+        [{fixture_id, season, league_id, status, has_events, ...}], sans lire l'arbre des matchs.
+        """
+        matches = []
+        for status in status_set:
+            for fixture_id, entry in self.get_status_entries(status).items():
+                if entry.get('season') is None:
+                    continue
+                match = {
+                    'fixture_id': fixture_id,
+                    'season': str(entry.get('season')),
+                    'league_id': str(entry.get('league')),
+                    'status': status
+                }
+                for flag in self.DETAIL_FLAGS.values():
+                    match[flag] = bool(entry.get(flag))
+                matches.append(match)
+        return matches
+
+    def rebuild_indexes(self):
+        """
+        Reconstruit les index des statuts (indicateurs has_* compris), des équipes, des
+        confrontations directes et des dates, ainsi que la projection match_summaries et les
+        cardinalités des index, à partir de l'arbre des matchs, ligue par ligue, puis marque la
+        projection comme complète (match_summaries_meta/complete_at).
+        À lancer une fois pour les données antérieures aux index.
+        """
+        entries = {}
+        team_entries = {}
+        h2h_entries = {}
+        date_entries = {}
+        summaries = {}
+        counts = {}
+        details = FixtureDetailStore()
+        detail_keys = {detail_key: details.get_fixture_keys(detail_key) for detail_key in self.DETAIL_FLAGS}
+        for season_key, league_key in iter_league_keys(self.root_ref.child('matches')):
+            season = season_key.replace('season_', '')
+            league_id = league_key.replace('league_', '')
+            fixtures = self.root_ref.child(
+                f'matches/{season_key}/{league_key}/fixtures'
+            ).get() or {}
+
+            for fixture_key, fixture_data in fixtures.items():
+                if not isinstance(fixture_data, dict):
+                    continue
+                metadata = fixture_data.get('metadata', {})
+                status = metadata.get('status')
+                if not status:
+                    continue
+
+                summaries.setdefault(season_key, {}).setdefault(league_key, {})[fixture_key] = (
+                    MatchSummaries.encode(fixture_data)
+                )
+
+                entry = {
+                    'season': int(season),
+                    'league': int(league_id),
+                    'timestamp': metadata.get('timestamp')
+                }
+                for detail_key, flag in self.DETAIL_FLAGS.items():
+                    if fixture_key in detail_keys[detail_key] or detail_key in fixture_data:
+                        entry[flag] = True
+                entries.setdefault(status, {})[fixture_key] = entry
+
+                team_updates = self.build_team_updates(
+                    fixture_key.replace('fixture_', ''), fixture_data.get('teams') or {},
+                    season, league_id, metadata.get('timestamp'), status
+                )
+                for path, team_entry in team_updates.items():
+                    _, _, team_key, _ = path.split('/')
+                    team_entries.setdefault(team_key, {})[fixture_key] = team_entry
+
+                h2h_updates = self.build_h2h_updates(
+                    fixture_key.replace('fixture_', ''), fixture_data.get('teams') or {},
+                    season, league_id, metadata.get('date'), metadata.get('timestamp'), status
+                )
+                for path, h2h_entry in h2h_updates.items():
+                    _, _, pair_key, _ = path.split('/')
+                    h2h_entries.setdefault(pair_key, {})[fixture_key] = h2h_entry
+
+                date_updates = self.build_date_updates(
+                    fixture_key.replace('fixture_', ''), season, league_id,
+                    metadata.get('date'), metadata.get('timestamp'), status
+                )
+                for path, date_entry in date_updates.items():
+                    _, _, date_key, _ = path.split('/')
+                    date_entries.setdefault(date_key, {})[fixture_key] = date_entry
+
+                for key in self.get_statistics_keys(
+                    fixture_data.get('teams') or {}, season, league_id, self.get_date_key(metadata.get('date'))
+                ):
+                    counts[key] = counts.get(key, 0) + 1
+
+        self.root_ref.child('index').update({
+            'status': entries,
+            'team': team_entries,
+            'h2h': h2h_entries,
+            'date': date_entries
+        })
+        self.root_ref.child('match_summaries').set(summaries)
+        statistics = {}
+        for key, count in counts.items():
+            *parents, name = key.split('/')
+            node = statistics
+            for parent in parents:
+                node = node.setdefault(parent, {})
+            node[name] = count
+        # Projection complète : les métriques peuvent la lire à la place de l'arbre des matchs
+        summaries_meta = MatchSummaries()
+        self.root_ref.update({
+            MatchSummaries.STATISTICS_PATH: statistics,
+            **summaries_meta.build_version_update(),
+            **summaries_meta.build_complete_update()
+        })
+        return sum(len(fixtures) for fixtures in entries.values())
+
+    def get_status_entries(self, status):
+        """Lit les entrées de l'index pour un statut : {fixture_id: entrée}."""
+        entries = self.root_ref.child('index').child('status').child(status).get() or {}
+        return {
+            fixture_key.replace('fixture_', ''): entry
+            for fixture_key, entry in entries.items()
+            if isinstance(entry, dict)
+        }
@@ -1,52 +1,18 @@
-import requests
 import time
-from django.conf import settings
 from firebase_admin import db
 from datetime import datetime
+from .api_client import get_api_client
 
 class LeagueService:
-    RATE_LIMIT = 450
-    DELAY = 60 / RATE_LIMIT
-
     def __init__(self):
-        self.headers = {'x-apisports-key': settings.API_SPORTS_KEY}
+        self.api_client = get_api_client()
         self.firebase_ref = db.reference('leagues')
-        self.last_request_time = time.time()
-        self.request_count = 0
-
-    def wait_for_rate_limit(self):
-        current_time = time.time()
-        elapsed_time = current_time - self.last_request_time
-        
-        if elapsed_time >= 60:
-            self.request_count = 0
-            self.last_request_time = current_time
-            return
-
-        if self.request_count >= self.RATE_LIMIT:
-            sleep_time = 60 - elapsed_time
-            if sleep_time > 0:
-                print(f"⏳ Limite d'API atteinte, pause de {sleep_time:.1f} secondes")
-                time.sleep(sleep_time)
-                self.request_count = 0
-                self.last_request_time = time.time()
-        else:
-            time.sleep(self.DELAY)
-
-        self.request_count += 1
 
     def fetch_leagues(self):
         """Récupère toutes les leagues depuis l'API."""
         try:
-            self.wait_for_rate_limit()
-            
-            url = f"{settings.API_SPORTS_BASE_URL}/leagues"
             print("🔄 Récupération des leagues depuis l'API...")
-            
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            
-            data = response.json()
+            data = self.api_client.get('leagues')
             
             if 'errors' in data and data['errors']:
                 print(f"⚠️ Erreur API: {data['errors']}")
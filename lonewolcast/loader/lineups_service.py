@@ -1,8 +1,9 @@
-import requests
-from django.conf import settings
 from firebase_admin import db
-import time
 from datetime import datetime
+from .api_client import ApiError, get_api_client
+from .pipeline import FixtureDetailPipeline
+from .indexes import FixtureIndex
+from .details import FixtureDetailStore
 
 class MatchStatus:
     """Statuts des matchs pour filtrage."""
@@ -11,74 +12,38 @@ class MatchStatus:
 
 class LineupService:
     """Service pour gérer les compositions des matchs."""
-    RATE_LIMIT = 450
-    DELAY = 60 / RATE_LIMIT
 
     def __init__(self):
-        self.headers = {'x-apisports-key': settings.API_SPORTS_KEY}
+        self.api_client = get_api_client()
         self.root_ref = db.reference()
-        self.last_request_time = time.time()
-        self.request_count = 0
+        self.index = FixtureIndex()
+        self.details = FixtureDetailStore()
+
+    def get_match_path(self, season, league_id, fixture_id):
+        """Retourne le chemin Firebase d'un match donné."""
+        return f'matches/season_{season}/league_{league_id}/fixtures/fixture_{fixture_id}'
 
     def get_match_ref(self, season, league_id, fixture_id):
         """Retourne la référence Firebase pour un match donné."""
-        return (self.root_ref
-                .child('matches')
-                .child(f'season_{season}')
-                .child(f'league_{league_id}')
-                .child('fixtures')
-                .child(f'fixture_{fixture_id}'))
-
-    def wait_for_rate_limit(self):
-        """Gestion du taux limite pour l'API."""
-        current_time = time.time()
-        elapsed_time = current_time - self.last_request_time
-
-        if elapsed_time >= 60:
-            self.request_count = 0
-            self.last_request_time = current_time
-            return
-
-        if self.request_count >= self.RATE_LIMIT:
-            sleep_time = 60 - elapsed_time
-            if sleep_time > 0:
-                print(f"⏳ Limite atteinte, pause de {sleep_time:.1f} secondes")
-                time.sleep(sleep_time)
-                self.request_count = 0
-                self.last_request_time = time.time()
-        else:
-            time.sleep(self.DELAY)
-
-        self.request_count += 1
+        return self.root_ref.child(self.get_match_path(season, league_id, fixture_id))
 
     def fetch_lineups(self, fixture_id):
-        """Récupère les compositions pour un match spécifique."""
-        try:
-            self.wait_for_rate_limit()
-            url = f"{settings.API_SPORTS_BASE_URL}/fixtures/lineups"
-            params = {'fixture': str(fixture_id)}
-
-            print(f"🔄 Récupération des compositions - Match {fixture_id}")
+        """
+        Récupère les compositions pour un match spécifique ; None si l'API ne renvoie aucune donnée.
+        Lève ApiError (ApiQuotaExceeded si le quota est épuisé) si la requête échoue.
+        """
+        params = {'fixture': str(fixture_id)}
 
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
+        print(f"🔄 Récupération des compositions - Match {fixture_id}")
 
-            if 'errors' in data and data['errors']:
-                print(f"⚠️ Erreur API: {data['errors']}")
-                return None
+        lineups = self.api_client.get_response('fixtures/lineups', params)
+        if lineups:
+            print(f"✅ Compositions récupérées pour le match {fixture_id}")
+            return lineups
 
-            lineups = data.get('response', [])
-            if lineups:
-                print(f"✅ Compositions récupérées pour le match {fixture_id}")
-                return lineups
+        print("ℹ️ Aucune composition disponible pour le match.")
+        return None
 
-            print("ℹ️ Aucune composition disponible pour le match.")
-            return None
-
-        except Exception as e:
-            print(f"❌ Erreur lors de la récupération des compositions : {str(e)}")
-            return None
 
     def process_player(self, player_data):
         """Traite les données d'un joueur."""
@@ -100,19 +65,25 @@ class LineupService:
             'substitutes': [self.process_player(player) for player in lineup_data['substitutes']]
         }
 
-    def save_lineups(self, fixture_id, lineups, season, league_id):
-        """Sauvegarde les compositions dans le nœud du match correspondant."""
+    def build_lineups_updates(self, fixture_id, lineups, season, league_id, status=None):
+        """Prépare la mise à jour multi-chemins des compositions d'un match."""
+        match_path = self.get_match_path(season, league_id, fixture_id)
+        updates = {
+            self.details.get_detail_path('lineups', fixture_id): [
+                self.process_lineup(lineup) for lineup in lineups
+            ],
+            f'{match_path}/lineups_updated_at': datetime.now().isoformat()
+        }
+        updates.update(self.index.build_flag_updates(fixture_id, status, 'lineups', season=season, league_id=league_id))
+        return updates
+
+    def save_lineups(self, fixture_id, lineups, season, league_id, status=None):
+        """Sauvegarde les compositions dans l'arbre des détails du match."""
         try:
             if not lineups:
                 return False
 
-            processed_lineups = [self.process_lineup(lineup) for lineup in lineups]
-            match_ref = self.get_match_ref(season, league_id, fixture_id)
-
-            match_ref.update({
-                'lineups': processed_lineups,
-                'lineups_updated_at': datetime.now().isoformat()
-            })
+            self.root_ref.update(self.build_lineups_updates(fixture_id, lineups, season, league_id, status))
 
             print(f"💾 Compositions sauvegardées pour le match {fixture_id}")
             return True
@@ -122,61 +93,46 @@ class LineupService:
             return False
 
     def get_matches_by_status(self, status_set):
-        """Récupère les matchs selon leur statut."""
-        matches = []
-        seasons_ref = self.root_ref.child('matches').get() or {}
-
-        for season_key, season_data in seasons_ref.items():
-            if not isinstance(season_data, dict):
-                continue
-
-            season = season_key.replace('season_', '')
-            for league_key, league_data in season_data.items():
-                if not isinstance(league_data, dict):
-                    continue
-
-                league_id = league_key.replace('league_', '')
-                for fixture_key, fixture_data in league_data.get('fixtures', {}).items():
-                    if not isinstance(fixture_data, dict):
-                        continue
-
-                    match_status = fixture_data.get('metadata', {}).get('status')
-                    if match_status in status_set:
-                        fixture_id = fixture_key.replace('fixture_', '')
-                        matches.append({
-                            'fixture_id': fixture_id,
-                            'season': season,
-                            'league_id': league_id,
-                            'has_lineups': 'lineups' in fixture_data
-                        })
-
-        return matches
-
-    def sync_match_lineups(self, fixture_id, season, league_id):
+        """Récupère les matchs selon leur statut depuis l'index des statuts, sans lire l'arbre des matchs."""
+        return self.index.get_matches(status_set)
+
+    def sync_match_lineups(self, fixture_id, season, league_id, status=None):
         """Synchronise les compositions pour un match spécifique."""
-        lineups = self.fetch_lineups(fixture_id)
+        try:
+            lineups = self.fetch_lineups(fixture_id)
+        except ApiError as e:
+            print(f"❌ Erreur lors de la récupération des compositions : {str(e)}")
+            return False
         if lineups:
-            return self.save_lineups(fixture_id, lineups, season, league_id)
+            return self.save_lineups(fixture_id, lineups, season, league_id, status)
         return False
 
-    def sync_finished_matches(self):
+    def sync_finished_matches(self, workers=1, batch_size=50, checkpoint=None):
         """Synchronise les compositions des matchs terminés."""
-        finished_matches = self.get_matches_by_status(MatchStatus.FINISHED)
-        matches_without_lineups = [m for m in finished_matches if not m['has_lineups']]
+        def find_matches():
+            finished_matches = self.get_matches_by_status(MatchStatus.FINISHED)
+            return [m for m in finished_matches if not m['has_lineups']]
+
+        matches_without_lineups = checkpoint.get_matches(find_matches) if checkpoint else find_matches()
         total = len(matches_without_lineups)
 
         if not total:
             print("ℹ️ Aucun match terminé sans compositions.")
+            if checkpoint:
+                checkpoint.finish()
             return 0
 
         print(f"📊 Synchronisation des compositions pour {total} match(s) terminé(s).")
-        updated = 0
-
-        for match in matches_without_lineups:
-            if self.sync_match_lineups(match['fixture_id'], match['season'], match['league_id']):
-                updated += 1
+        # Sans parallélisme, chaque match est écrit dès sa récupération (lots d'un match)
+        pipeline = FixtureDetailPipeline(
+            self.fetch_lineups, self.build_lineups_updates, workers, batch_size if workers > 1 else 1,
+            on_flush=checkpoint.mark_done if checkpoint else None
+        )
+        updated = pipeline.run(matches_without_lineups)
 
         print(f"✅ {updated}/{total} matchs synchronisés.")
+        if checkpoint:
+            checkpoint.finish()
         return updated
 
     def update_live_matches(self):
@@ -192,7 +148,7 @@ class LineupService:
         updated = 0
 
         for match in live_matches:
-            if self.sync_match_lineups(match['fixture_id'], match['season'], match['league_id']):
+            if self.sync_match_lineups(match['fixture_id'], match['season'], match['league_id'], match.get('status')):
                 updated += 1
 
         print(f"✅ {updated}/{total} matchs mis à jour.")
@@ -207,8 +163,12 @@ class LineupService:
             cleared = 0
             for match in matches:
                 match_ref = self.get_match_ref(match['season'], match['league_id'], match['fixture_id'])
-                match_ref.child('lineups').delete()
+                self.root_ref.child(self.details.get_detail_path('lineups', match['fixture_id'])).delete()
                 match_ref.child('lineups_updated_at').delete()
+                if match.get('status'):
+                    self.root_ref.update(self.index.build_flag_updates(
+                        match['fixture_id'], match['status'], 'lineups', False
+                    ))
                 cleared += 1
 
             print(f"✅ Compositions supprimées pour {cleared} match(s).")
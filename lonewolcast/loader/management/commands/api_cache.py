@@ -0,0 +1,84 @@
+from django.core.management.base import BaseCommand
+from loader.response_cache import ResponseCache
+
+class Command(BaseCommand):
+    help = """
+    Gestion du cache disque des réponses de l'API-Sports:
+
+    Commandes disponibles:
+        --stats   : Affiche le contenu du cache par endpoint
+        --purge   : Supprime les réponses expirées
+        --clear   : Vide entièrement le cache
+            options:
+            --force : Ne pas demander de confirmation pour la suppression
+
+    Le mode du cache se règle avec API_SPORTS_CACHE ('on', 'off' ou 'replay').
+    En mode 'replay', les synchronisations sont servies uniquement depuis le cache.
+
+    Exemples:
+        python manage.py api_cache --stats
+        API_SPORTS_CACHE=replay python manage.py sync_statistics --sync
+    """
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument(
+            '--stats',
+            action='store_true',
+            help='Affiche le contenu du cache'
+        )
+        group.add_argument(
+            '--purge',
+            action='store_true',
+            help='Supprime les réponses expirées'
+        )
+        group.add_argument(
+            '--clear',
+            action='store_true',
+            help='Vide entièrement le cache'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Ne pas demander de confirmation pour la suppression'
+        )
+
+    def handle(self, *args, **options):
+        cache = ResponseCache()
+
+        try:
+            if options['stats']:
+                self.handle_stats(cache)
+            elif options['purge']:
+                purged = cache.purge_expired()
+                self.stdout.write(self.style.SUCCESS(f'✅ {purged} réponse(s) expirée(s) supprimée(s)'))
+            elif options['clear']:
+                self.handle_clear(cache, options['force'])
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f'Erreur: {str(e)}'))
+
+    def handle_stats(self, cache):
+        """Affiche le nombre de réponses en cache par endpoint."""
+        stats = cache.get_stats()
+        if not stats:
+            self.stdout.write(self.style.WARNING('⚠️ Cache vide'))
+            return
+
+        self.stdout.write(self.style.HTTP_INFO(f'📦 Cache: {cache.path}'))
+        for endpoint, counts in stats.items():
+            self.stdout.write(
+                f"  {endpoint}: {counts['total']} réponse(s), "
+                f"{counts['immutable']} immuable(s), {counts['expired']} expirée(s), "
+                f"{counts['bytes'] / 1024:.1f} Ko"
+            )
+
+    def handle_clear(self, cache, force):
+        """Vide le cache après confirmation."""
+        if not force:
+            confirm = input('⚠️ Voulez-vous vraiment vider le cache des réponses API ? [y/N]: ')
+            if confirm.lower() != 'y':
+                self.stdout.write(self.style.SUCCESS('Opération annulée'))
+                return
+
+        cache.clear()
+        self.stdout.write(self.style.SUCCESS('✅ Cache des réponses API vidé'))
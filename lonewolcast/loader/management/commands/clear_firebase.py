@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from firebase_admin import db
+from loader.firebase_utils import get_child_keys, delete_children
 import time
 
 class Command(BaseCommand):
@@ -27,25 +28,19 @@ class Command(BaseCommand):
     def delete_in_batches(self, ref, batch_size):
         """Supprime les données par lots."""
         total_deleted = 0
-        while True:
-            # Récupère un lot limité de clés
-            query = ref.order_by_key().limit_to_first(batch_size)
-            data = query.get()
-            
-            if not data:
-                break
-                
-            # Supprime chaque élément individuellement
-            for key in data.keys():
-                try:
-                    ref.child(key).delete()
-                    total_deleted += 1
-                    if total_deleted % 10 == 0:  # Affiche la progression tous les 10 éléments
-                        self.stdout.write(f"🗑️  {total_deleted} éléments supprimés...")
-                except Exception as e:
-                    self.stderr.write(
-                        self.style.WARNING(f"⚠️  Erreur lors de la suppression de {key}: {str(e)}")
-                    )
+        # Les clés sont énumérées une seule fois par lecture superficielle, sans les données
+        keys = get_child_keys(ref)
+
+        for start in range(0, len(keys), batch_size):
+            batch = keys[start:start + batch_size]
+            # Un lot entier est supprimé en une seule écriture multi-chemins
+            try:
+                total_deleted += delete_children(ref, batch)
+                self.stdout.write(f"🗑️  {total_deleted}/{len(keys)} éléments supprimés...")
+            except Exception as e:
+                self.stderr.write(
+                    self.style.WARNING(f"⚠️  Erreur lors de la suppression du lot {batch[0]}..{batch[-1]}: {str(e)}")
+                )
             
             # Petite pause pour éviter de surcharger Firebase
             time.sleep(1)
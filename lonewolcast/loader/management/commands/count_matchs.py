@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 from firebase_admin import db
+from loader.indexes import FixtureIndex
+from loader.firebase_utils import count_children, iter_league_keys
 import logging
 
 logger = logging.getLogger(__name__)
@@ -40,58 +42,58 @@ class Command(BaseCommand):
             help='Ne compter que les matchs terminés (FT, AET, PEN)'
         )
 
-    def is_match_finished(self, match_data):
-        """Vérifie si un match est terminé."""
-        return match_data.get('metadata', {}).get('status') in self.FINISHED_STATUSES
-
-    def is_team_match(self, match_data, team_id, team_location='all'):
-        """Vérifie si un match concerne une équipe spécifique."""
-        teams = match_data.get('teams', {})
-        home_team = teams.get('home', {}).get('id')
-        away_team = teams.get('away', {}).get('id')
-
-        if not home_team or not away_team:
-            return False
+    def count_fixture_keys(self, league_id=None, season=None):
+        """Compte les matchs par lectures superficielles des ligues, sans télécharger les matchs."""
+        matches_ref = db.reference('matches')
+        return sum(
+            count_children(matches_ref.child(f'{season_key}/{league_key}/fixtures'))
+            for season_key, league_key in iter_league_keys(matches_ref, season, league_id)
+        )
 
-        if team_location == 'home':
-            return home_team == team_id
-        elif team_location == 'away':
-            return away_team == team_id
-        else:  # 'all'
-            return home_team == team_id or away_team == team_id
+    def count_indexed(self, league_id=None, season=None, team_id=None, finished=False):
+        """Compte les matchs d'une équipe et/ou terminés depuis les index (équipes, statuts)."""
+        index = FixtureIndex()
+        if team_id:
+            entries = [
+                entry for entry in index.get_team_entries(team_id).values()
+                if not finished or entry.get('status') in self.FINISHED_STATUSES
+            ]
+        elif not league_id and not season:
+            # Sans restriction de ligue ni de saison, les clés de l'index des statuts suffisent
+            return sum(
+                count_children(db.reference(f'index/status/{status}'))
+                for status in self.FINISHED_STATUSES
+            )
+        else:
+            entries = [
+                entry for status in self.FINISHED_STATUSES
+                for entry in index.get_status_entries(status).values()
+            ]
+
+        return sum(
+            1 for entry in entries
+            if (not season or entry.get('season') == season)
+            and (not league_id or entry.get('league') == league_id)
+        )
 
     def count_matches(self, all_nodes, league_id=None, season=None, team_id=None, finished=False):
-        root_ref = db.reference('matches')
-        matches = root_ref.get() or {}
-        total_count = 0
-
         try:
             if all_nodes:
-                for season_key, season_data in matches.items():
-                    if season and season_key != f'season_{season}':
-                        continue
-
-                    for league_key, league_data in season_data.items():
-                        if league_id and league_key != f'league_{league_id}':
-                            continue
-
-                        fixtures = league_data.get('fixtures', {})
-                        for match_key, match_data in fixtures.items():
-                            if finished and not self.is_match_finished(match_data):
-                                continue
-                            if team_id and not self.is_team_match(match_data, team_id):
-                                continue
-                            total_count += 1
+                if team_id or finished:
+                    total_count = self.count_indexed(league_id, season, team_id, finished)
+                else:
+                    total_count = self.count_fixture_keys(league_id, season)
 
+                finished_label = ' terminés' if finished else ''
+                team_label = f" pour l'équipe {team_id}" if team_id else ''
                 self.stdout.write(
-                    self.style.SUCCESS(
-                        f"Total des matchs{' terminés' if finished else ''}{f' pour l\'équipe {team_id}' if team_id else ''}: {total_count}"
-                    )
+                    self.style.SUCCESS(f"Total des matchs{finished_label}{team_label}: {total_count}")
                 )
             else:
                 self.stdout.write(
                     self.style.ERROR("Aucune option valide fournie. Utilisez --all pour compter les matchs.")
                 )
+                total_count = 0
 
             return total_count
 
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from loader.details import FixtureDetailStore
+
+class Command(BaseCommand):
+    help = """
+    Déplace les détails volumineux (events, lineups, statistics_global, statistics_with_ht_data,
+    players_stats, prediction) des nœuds des matchs vers fixture_details/{kind}/fixture_{id}.
+
+    Les services de détails écrivent directement dans fixture_details ; cette commande n'est
+    utile qu'une fois, pour les données sauvegardées avant la séparation.
+
+    Exemples:
+        python manage.py migrate_fixture_details --dry-run
+        python manage.py migrate_fixture_details --batch-size 20
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Nombre de matchs déplacés par écriture (défaut: 50)'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compte les matchs à migrer sans rien écrire'
+        )
+
+    def handle(self, *args, **options):
+        details = FixtureDetailStore()
+
+        try:
+            self.stdout.write(self.style.HTTP_INFO("🔄 Migration des détails des matchs..."))
+            total = details.migrate(options['batch_size'], options['dry_run'])
+            if options['dry_run']:
+                self.stdout.write(self.style.WARNING(f'⚠️ {total} match(s) à migrer (aucune écriture)'))
+            else:
+                self.stdout.write(self.style.SUCCESS(f'✅ {total} match(s) migré(s)'))
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f'Erreur: {str(e)}'))
@@ -1,5 +1,7 @@
 from django.core.management.base import BaseCommand
 from firebase_admin import db
+from loader.indexes import FixtureIndex
+from loader.details import FixtureDetailStore
 import datetime
 import logging
 
@@ -36,7 +38,7 @@ class Command(BaseCommand):
         try:
             prediction = match_data.get('prediction', {})
             if not prediction:
-                logger.warning(f"Pas de données de prédiction pour le match {match_data.get('fixture', {}).get('id')}")
+                logger.warning(f"Pas de données de prédiction pour le match {match_data.get('metadata', {}).get('fixture_id')}")
                 return None
 
             scores = {
@@ -248,18 +250,19 @@ class Command(BaseCommand):
         matches_ref = db.reference('matches')
         predictions_ref = db.reference('predictions')
         
+        # Seuls les matchs du jour sont lus, via l'index des dates
         logger.info(f"Récupération des matchs pour le {date}...")
-        matches = matches_ref.get()
-        
-        if not matches:
-            logger.warning('Aucun match trouvé')
-            return
-
-        day_matches = {
-            match_id: match_data
-            for match_id, match_data in matches.items()
-            if match_data.get('fixture', {}).get('date', '').split('T')[0] == date
-        }
+        entries = FixtureIndex().get_date_entries(date)
+        details = FixtureDetailStore()
+
+        day_matches = {}
+        for fixture_id, entry in entries.items():
+            match_data = matches_ref.child(
+                f"season_{entry['season']}/league_{entry['league']}/fixtures/fixture_{fixture_id}"
+            ).get()
+            if match_data:
+                match_data['prediction'] = details.get_detail('prediction', fixture_id) or match_data.get('prediction')
+                day_matches[fixture_id] = match_data
 
         if not day_matches:
             logger.warning(f'Aucun match trouvé pour le {date}')
@@ -267,8 +270,7 @@ class Command(BaseCommand):
 
         logger.info(f"Analyse de {len(day_matches)} matchs...")
         
-        for match_id, match_data in day_matches.items():
-            fixture_id = str(match_data['fixture']['id'])
+        for fixture_id, match_data in day_matches.items():
             match_info = f"{match_data['teams']['home']['name']} vs {match_data['teams']['away']['name']}"
             
             logger.info(f"\nAnalyse du match {match_info}...")
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from loader.indexes import FixtureIndex
+
+class Command(BaseCommand):
+    help = """
+    Reconstruit les index des matchs (index/status, index/team, index/h2h, index/date) et la projection
+    compacte match_summaries lue par les métriques, à partir de l'arbre des matchs.
+
+    Les index sont ensuite maintenus au fil des écritures par sync_matches et les services
+    de détails ; cette commande n'est utile que pour les données antérieures aux index
+    ou après une suppression manuelle.
+
+    Exemple:
+        python manage.py rebuild_indexes
+    """
+
+    def handle(self, *args, **options):
+        index = FixtureIndex()
+
+        try:
+            self.stdout.write(self.style.HTTP_INFO("🔄 Reconstruction des index..."))
+            total = index.rebuild_indexes()
+            self.stdout.write(self.style.SUCCESS(f'✅ {total} match(s) indexé(s)'))
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f'Erreur: {str(e)}'))
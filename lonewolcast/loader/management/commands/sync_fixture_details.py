@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand
+from loader.fixture_details_service import FixtureDetailsService
+from loader.checkpoint import add_checkpoint_arguments, checkpoint_from_options
+
+class Command(BaseCommand):
+    help = """
+    Synchronisation groupée des détails des matchs (événements, compositions,
+    statistiques globales et statistiques joueurs) via fixtures?ids= :
+    une requête API pour 20 matchs au lieu de 4 requêtes par match.
+
+    Commandes disponibles:
+        --sync   : Synchronise les matchs terminés auxquels il manque un détail
+        --live   : Met à jour les détails des matchs en cours
+            options:
+            --workers N     : Requêtes API simultanées
+            --batch-size N  : Matchs regroupés par écriture Firebase
+            --shard K --shards N : Traite la part K (0..N-1) des matchs restants
+            --restart       : Abandonne le point de reprise et rebalaye Firebase
+            --no-checkpoint : Désactive le point de reprise
+
+    Note: Les statistiques mi-temps restent synchronisées par sync_statistics_ht
+    """
+
+    def add_arguments(self, parser):
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument(
+            '--sync',
+            action='store_true',
+            help='Synchronise les détails des matchs terminés'
+        )
+        group.add_argument(
+            '--live',
+            action='store_true',
+            help='Met à jour les détails des matchs en cours'
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Nombre de requêtes API simultanées'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Nombre de matchs regroupés par écriture Firebase'
+        )
+        add_checkpoint_arguments(parser)
+
+    def handle(self, *args, **options):
+        service = FixtureDetailsService()
+
+        try:
+            if options['sync']:
+                self.handle_sync_finished(service, options)
+            elif options['live']:
+                self.handle_update_live(service, options['workers'], options['batch_size'])
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f'Erreur: {str(e)}'))
+
+    def handle_sync_finished(self, service, options):
+        self.stdout.write(self.style.HTTP_INFO('🔄 Synchronisation groupée des détails des matchs terminés...'))
+        checkpoint = checkpoint_from_options(options, 'fixture_details')
+        updated = service.sync_finished_matches(
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            checkpoint=checkpoint
+        )
+        self.stdout.write(self.style.SUCCESS(f'✅ {updated} matchs synchronisés'))
+
+    def handle_update_live(self, service, workers, batch_size):
+        self.stdout.write(self.style.HTTP_INFO('🔄 Mise à jour groupée des détails des matchs en cours...'))
+        updated = service.update_live_matches(workers=workers, batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(f'✅ {updated} matchs mis à jour'))
@@ -1,6 +1,7 @@
 # management/commands/sync_lineups.py
 from django.core.management.base import BaseCommand
 from loader.lineups_service import LineupService
+from loader.checkpoint import add_checkpoint_arguments, checkpoint_from_options
 
 class Command(BaseCommand):
     help = """
@@ -8,6 +9,12 @@ class Command(BaseCommand):
     
     Commandes disponibles:
         --sync   : Synchronise les compositions des matchs terminés
+            options:
+            --workers N     : Requêtes API simultanées (pipeline si > 1)
+            --batch-size N  : Matchs regroupés par écriture Firebase
+            --shard K --shards N : Traite la part K (0..N-1) des matchs restants
+            --restart       : Abandonne le point de reprise et rebalaye Firebase
+            --no-checkpoint : Désactive le point de reprise
         --live   : Met à jour les compositions des matchs en cours
         --clear  : Supprime toutes les compositions
     """
@@ -35,13 +42,26 @@ class Command(BaseCommand):
             action='store_true',
             help='Ne pas demander de confirmation pour la suppression'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Nombre de requêtes API simultanées pour --sync (pipeline si > 1)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Nombre de matchs regroupés par écriture Firebase en mode pipeline'
+        )
+        add_checkpoint_arguments(parser)
 
     def handle(self, *args, **options):
         service = LineupService()
 
         try:
             if options['sync']:
-                self.handle_sync_finished(service)
+                self.handle_sync_finished(service, options)
             elif options['live']:
                 self.handle_update_live(service)
             elif options['clear']:
@@ -49,9 +69,14 @@ class Command(BaseCommand):
         except Exception as e:
             self.stderr.write(self.style.ERROR(f'Erreur: {str(e)}'))
 
-    def handle_sync_finished(self, service):
+    def handle_sync_finished(self, service, options):
         self.stdout.write(self.style.HTTP_INFO('🔄 Synchronisation des compositions des matchs terminés...'))
-        updated = service.sync_finished_matches()
+        checkpoint = checkpoint_from_options(options, 'lineups')
+        updated = service.sync_finished_matches(
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            checkpoint=checkpoint
+        )
         self.stdout.write(self.style.SUCCESS(f'✅ {updated} matchs synchronisés'))
 
     def handle_update_live(self, service):
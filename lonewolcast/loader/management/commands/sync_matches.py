@@ -8,7 +8,14 @@ class Command(BaseCommand):
     
     Commandes disponibles:
         --sync              : Synchronise tous les matchs pour toutes les leagues et saisons configurées
-        --update           : Met à jour uniquement les matchs non terminés
+            options:
+            --rewrite         : Réécrit tous les matchs, même ceux dont l'empreinte n'a pas changé
+            --workers N       : Couples (league, saison) synchronisés en parallèle
+        --update           : Met à jour uniquement les matchs non terminés (incrémental)
+            options:
+            --hours-back H    : Fenêtre passée des coups d'envoi à rafraîchir (défaut: 24)
+            --minutes-ahead M : Fenêtre à venir des coups d'envoi à rafraîchir (défaut: 30)
+            --sweep           : Rafraîchit tous les matchs actifs de l'index, hors fenêtre compris
         --clear           : Supprime toutes les données
             options:
             --season YEAR   : Supprime une saison spécifique
@@ -17,7 +24,9 @@ class Command(BaseCommand):
     
     Exemples:
         python manage.py sync_matches --sync
+        python manage.py sync_matches --sync --workers 8
         python manage.py sync_matches --update
+        python manage.py sync_matches --update --sweep
         python manage.py sync_matches --clear --force
         python manage.py sync_matches --clear --season 2024
         python manage.py sync_matches --clear --season 2024 --league 39
@@ -59,29 +68,65 @@ class Command(BaseCommand):
             help='Ne pas demander de confirmation pour la suppression'
         )
 
+        parser.add_argument(
+            '--rewrite',
+            action='store_true',
+            help="Réécrit tous les matchs sans tenir compte du manifeste des empreintes (--sync)"
+        )
+
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Nombre de couples (league, saison) synchronisés en parallèle (--sync)'
+        )
+
+        # Arguments pour la mise à jour incrémentale
+        parser.add_argument(
+            '--hours-back',
+            type=int,
+            default=24,
+            help="Heures passées depuis le coup d'envoi des matchs à rafraîchir (--update)"
+        )
+        parser.add_argument(
+            '--minutes-ahead',
+            type=int,
+            default=30,
+            help="Minutes avant le coup d'envoi des matchs à rafraîchir (--update)"
+        )
+        parser.add_argument(
+            '--sweep',
+            action='store_true',
+            help="Rafraîchit tous les matchs actifs de l'index, sans fenêtre (--update, à lancer moins souvent)"
+        )
+
     def handle(self, *args, **options):
         service = MatchService()
 
         try:
             if options['sync']:
-                self.handle_sync(service)
+                self.handle_sync(service, options)
             elif options['update']:
-                self.handle_update(service)
+                self.handle_update(service, options)
             elif options['clear']:
                 self.handle_clear(service, options)
         except Exception as e:
             self.stderr.write(self.style.ERROR(f'Erreur: {str(e)}'))
 
-    def handle_sync(self, service):
+    def handle_sync(self, service, options):
         """Gestion de la synchronisation complète."""
         self.stdout.write(self.style.HTTP_INFO('🔄 Début de la synchronisation...'))
-        total = service.sync_all_matches()
+        total = service.sync_all_matches(force=options['rewrite'], workers=options['workers'])
         self.stdout.write(self.style.SUCCESS(f'✅ {total} match(s) synchronisé(s)'))
 
-    def handle_update(self, service):
+    def handle_update(self, service, options):
         """Gestion de la mise à jour des matchs non terminés."""
         self.stdout.write(self.style.HTTP_INFO('🔄 Mise à jour des matchs non terminés...'))
-        updated = service.update_unfinished_matches()
+        updated = service.update_unfinished_matches(
+            hours_back=options['hours_back'],
+            minutes_ahead=options['minutes_ahead'],
+            sweep=options['sweep']
+        )
         self.stdout.write(self.style.SUCCESS(f'✅ {updated} match(s) mis à jour'))
 
     def handle_clear(self, service, options):
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from loader.relational import RelationalMirror
+
+class Command(BaseCommand):
+    help = """
+    Copie les ligues, équipes et matchs de l'arbre Firebase 'matches' dans les modèles
+    League, Team et Fixture (miroir relationnel lu par METRICS_BACKEND=orm).
+
+    Avec RELATIONAL_MIRROR=True, les synchronisations tiennent le miroir à jour ; cette
+    commande sert au chargement initial ou à une reconstruction.
+
+    Exemples:
+        python manage.py sync_relational
+        python manage.py sync_relational --season 2024 --league 61
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--season',
+            type=int,
+            help='Restreint la copie à une saison'
+        )
+        parser.add_argument(
+            '--league',
+            type=int,
+            help='Restreint la copie à une ligue'
+        )
+
+    def handle(self, *args, **options):
+        mirror = RelationalMirror()
+
+        try:
+            self.stdout.write(self.style.HTTP_INFO("🔄 Copie des matchs vers la base relationnelle..."))
+            total = mirror.sync_from_firebase(options['season'], options['league'])
+            self.stdout.write(self.style.SUCCESS(f'✅ {total} match(s) copié(s)'))
+        except Exception as e:
+            self.stderr.write(self.style.ERROR(f'Erreur: {str(e)}'))
@@ -1,5 +1,6 @@
 from django.core.management.base import BaseCommand
 from loader.statistics_ht_service import MatchStatisticsHalfTimeService
+from loader.checkpoint import add_checkpoint_arguments, checkpoint_from_options
 
 class Command(BaseCommand):
     help = """
@@ -7,6 +8,12 @@ class Command(BaseCommand):
     
     Commandes disponibles:
         --sync   : Synchronise les statistiques mi-temps des matchs terminés
+            options:
+            --workers N     : Requêtes API simultanées (pipeline si > 1)
+            --batch-size N  : Matchs regroupés par écriture Firebase
+            --shard K --shards N : Traite la part K (0..N-1) des matchs restants
+            --restart       : Abandonne le point de reprise et rebalaye Firebase
+            --no-checkpoint : Désactive le point de reprise
         --live   : Met à jour les statistiques mi-temps des matchs en cours
         --clear  : Supprime toutes les statistiques mi-temps
     """
@@ -34,13 +41,26 @@ class Command(BaseCommand):
             action='store_true',
             help='Ne pas demander de confirmation pour la suppression'
         )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Nombre de requêtes API simultanées pour --sync (pipeline si > 1)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50,
+            help='Nombre de matchs regroupés par écriture Firebase en mode pipeline'
+        )
+        add_checkpoint_arguments(parser)
 
     def handle(self, *args, **options):
         service = MatchStatisticsHalfTimeService()
 
         try:
             if options['sync']:
-                self.handle_sync_finished(service)
+                self.handle_sync_finished(service, options)
             elif options['live']:
                 self.handle_update_live(service)
             elif options['clear']:
@@ -48,13 +68,18 @@ class Command(BaseCommand):
         except Exception as e:
             self.stderr.write(self.style.ERROR(f'Erreur: {str(e)}'))
 
-    def handle_sync_finished(self, service):
+    def handle_sync_finished(self, service, options):
         self.stdout.write(
             self.style.HTTP_INFO(
                 '🔄 Synchronisation des statistiques mi-temps (matchs depuis 2024)...'
             )
         )
-        updated = service.sync_finished_matches()
+        checkpoint = checkpoint_from_options(options, 'statistics_ht')
+        updated = service.sync_finished_matches(
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            checkpoint=checkpoint
+        )
         self.stdout.write(
             self.style.SUCCESS(f'✅ {updated} statistiques mi-temps synchronisées')
         )
@@ -0,0 +1,70 @@
+import hashlib
+import json
+from datetime import datetime
+from firebase_admin import db
+
+class FixtureManifest:
+    """
+    Manifeste des empreintes de contenu des matchs, lu une fois par ligue.
+
+    fixture_hashes/season_{s}/league_{l}/fixture_{id} -> {hash, status, date, updated_at}
+
+    updated_at n'avance que lorsque le contenu du match change : le manifeste sert
+    de flux de changements fiable pour les consommateurs en aval.
+    """
+
+    VOLATILE_FIELDS = {'updated_at'}
+
+    def __init__(self):
+        self.root_ref = db.reference()
+
+    def get_league_path(self, season, league_id):
+        """Retourne le chemin du manifeste d'une ligue pour une saison."""
+        return f'fixture_hashes/season_{season}/league_{league_id}'
+
+    def get_entry_path(self, season, league_id, fixture_id):
+        """Retourne le chemin de l'entrée du manifeste pour un match."""
+        return f'{self.get_league_path(season, league_id)}/fixture_{fixture_id}'
+
+    def compute_hash(self, processed_match):
+        """Calcule l'empreinte d'un match traité, sans les champs d'horodatage."""
+        content = {
+            field: (
+                {k: v for k, v in value.items() if k not in self.VOLATILE_FIELDS}
+                if isinstance(value, dict) else value
+            )
+            for field, value in processed_match.items()
+        }
+        serialized = json.dumps(content, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha1(serialized.encode('utf-8')).hexdigest()
+
+    def get_league_entries(self, season, league_id):
+        """Lit le manifeste d'une ligue : {fixture_id: {hash, status, date, updated_at}}."""
+        entries = self.root_ref.child(self.get_league_path(season, league_id)).get() or {}
+        return {
+            fixture_key.replace('fixture_', ''): entry
+            for fixture_key, entry in entries.items()
+            if isinstance(entry, dict)
+        }
+
+    def build_entry_updates(self, season, league_id, fixture_id, content_hash, status, date_key=None):
+        """
+        Prépare la mise à jour multi-chemins de l'entrée d'un match modifié.
+        date_key (YYYY-MM-DD) permet de retirer un match reprogrammé de l'index des dates.
+        """
+        return {
+            self.get_entry_path(season, league_id, fixture_id): {
+                'hash': content_hash,
+                'status': status,
+                'date': date_key,
+                'updated_at': datetime.now().isoformat()
+            }
+        }
+
+    def get_changes_since(self, season, league_id, since):
+        """Retourne les IDs des matchs d'une ligue modifiés depuis `since` (ISO 8601)."""
+        return [
+            fixture_id
+            for fixture_id, entry in self.get_league_entries(season, league_id).items()
+            if entry.get('updated_at', '') > since
+        ]
@@ -1,23 +1,30 @@
-import requests
 from django.conf import settings
 from firebase_admin import db
-import time
 from datetime import datetime
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import time
+from .api_client import get_api_client
+from .constants import MatchStatus
+from .indexes import FixtureIndex
+from .manifest import FixtureManifest
+from .details import FixtureDetailStore
+from .summaries import MatchSummaries
+from .firebase_utils import get_child_keys
+from .relational import RelationalMirror
 
 class MatchService:
-    RATE_LIMIT = 450
-    DELAY = 60 / RATE_LIMIT
     BATCH_SIZE = 100
-
-    ACTIVE_STATUSES = {
-        'TBD', 'NS', '1H', 'HT', '2H', 'ET', 'BT', 'P', 'SUSP', 'INT', 'PST', 'LIVE'
-    }
+    MAX_IDS = 20  # Nombre maximal d'IDs acceptés par l'API pour fixtures?ids=
 
     def __init__(self):
-        self.headers = {'x-apisports-key': settings.API_SPORTS_KEY}
+        self.api_client = get_api_client()
         self.root_ref = db.reference()
-        self.last_request_time = time.time()
-        self.request_count = 0
+        self.index = FixtureIndex()
+        self.manifest = FixtureManifest()
+        self.details = FixtureDetailStore()
+        self.summaries = MatchSummaries()
+        self.mirror = RelationalMirror() if settings.RELATIONAL_MIRROR else None
         self.leagues = settings.LEAGUES
         self.seasons = settings.SEASON_YEAR
 
@@ -33,43 +40,46 @@ class MatchService:
         """Retourne la référence pour une ligue dans une saison."""
         return self.get_season_ref(season).child(f'league_{league_id}')
 
+    def get_fixture_path(self, season, league_id, fixture_id):
+        """Retourne le chemin Firebase d'un match."""
+        return f'matches/season_{season}/league_{league_id}/fixtures/fixture_{fixture_id}'
+
     def fetch_league_metadata(self, league_id):
         """Récupère les métadonnées de la ligue depuis Firebase."""
         league_ref = self.root_ref.child('leagues').child(str(league_id))
         return league_ref.get() or {}
 
-    def wait_for_rate_limit(self):
-        """Gestion du rate limiting de l'API."""
-        current_time = time.time()
-        elapsed_time = current_time - self.last_request_time
-
-        if elapsed_time >= 60:
-            self.request_count = 0
-            self.last_request_time = current_time
-            return
-
-        if self.request_count >= self.RATE_LIMIT:
-            sleep_time = 60 - elapsed_time
-            if sleep_time > 0:
-                print(f"⏳ Limite atteinte, pause de {sleep_time:.1f} secondes")
-                time.sleep(sleep_time)
-                self.request_count = 0
-                self.last_request_time = time.time()
-        else:
-            time.sleep(self.DELAY)
-
-        self.request_count += 1
+    def fetch_leagues_metadata(self):
+        """Récupère en une seule lecture les métadonnées des ligues configurées."""
+        leagues = self.root_ref.child('leagues').get() or {}
+        if isinstance(leagues, list):
+            leagues = {str(i): league for i, league in enumerate(leagues) if league}
+        return {
+            league_id: leagues.get(str(league_id)) or {}
+            for league_id in self.leagues
+        }
 
     def fetch_matches_by_league_season(self, league_id, season):
         """Récupère tous les matchs d'une ligue pour une saison donnée."""
         try:
-            self.wait_for_rate_limit()
-            url = f"{settings.API_SPORTS_BASE_URL}/fixtures"
             params = {'league': str(league_id), 'season': str(season)}
+            data = self.api_client.get('fixtures', params)
 
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            data = response.json()
+            if 'errors' in data and data['errors']:
+                print(f"⚠️ Erreur API: {data['errors']}")
+                return None
+
+            return data.get('response', [])
+
+        except Exception as e:
+            print(f"❌ Erreur: {str(e)}")
+            return None
+
+    def fetch_live_matches(self):
+        """Récupère en un seul appel les matchs en cours des ligues configurées."""
+        try:
+            params = {'live': '-'.join(str(league_id) for league_id in self.leagues)}
+            data = self.api_client.get('fixtures', params)
 
             if 'errors' in data and data['errors']:
                 print(f"⚠️ Erreur API: {data['errors']}")
@@ -81,24 +91,45 @@ class MatchService:
             print(f"❌ Erreur: {str(e)}")
             return None
 
-    def save_metadata_league_and_season(self, league_id, season):
-        """Sauvegarde les métadonnées de la ligue et de la saison."""
-        league_metadata = self.fetch_league_metadata(league_id)
+    def fetch_matches_by_ids(self, fixture_ids):
+        """Récupère un groupe de matchs (MAX_IDS au plus) par leurs IDs."""
+        try:
+            params = {'ids': '-'.join(str(fixture_id) for fixture_id in fixture_ids)}
+            data = self.api_client.get('fixtures', params)
+
+            if 'errors' in data and data['errors']:
+                print(f"⚠️ Erreur API: {data['errors']}")
+                return None
+
+            return data.get('response', [])
+
+        except Exception as e:
+            print(f"❌ Erreur: {str(e)}")
+            return None
+
+    def save_metadata_league_and_season(self, league_id, season, league_metadata=None):
+        """
+        Sauvegarde les métadonnées de la ligue et de la saison en une seule écriture.
+        league_metadata évite la lecture de leagues/{id} lorsqu'il a déjà été lu.
+        """
+        if league_metadata is None:
+            league_metadata = self.fetch_league_metadata(league_id)
         if not league_metadata:
             print(f"⚠️ Métadonnées non trouvées pour la ligue {league_id}")
             return False
 
-        league_ref = self.get_league_ref(season, league_id)
+        league_path = f'matches/season_{season}/league_{league_id}'
 
-        # Sauvegarder les métadonnées de la ligue
-        league_ref.child('metadata_league').set({
+        # Métadonnées de la ligue
+        updates = {}
+        updates[f'{league_path}/metadata_league'] = {
             'id': league_metadata.get('league', {}).get('id'),
             'name': league_metadata.get('league', {}).get('name'),
             'country': league_metadata.get('country', {}).get('name'),
             'logo': league_metadata.get('league', {}).get('logo'),
             'type': league_metadata.get('league', {}).get('type'),
             'updated_at': league_metadata.get('updated_at')
-        })
+        }
 
         # Récupérer les métadonnées de la saison
         seasons_metadata = league_metadata.get('seasons', [])
@@ -108,13 +139,17 @@ class MatchService:
         )
 
         if season_metadata:
-            league_ref.child('metadata_season').set({
+            updates[f'{league_path}/metadata_season'] = {
                 'start': season_metadata.get('start'),
                 'end': season_metadata.get('end'),
                 'year': season_metadata.get('year'),
                 'current': season_metadata.get('current'),
                 'updated_at': season_metadata.get('updated_at')
-            })
+            }
+
+        self.root_ref.update(updates)
+        if self.mirror:
+            self.mirror.upsert_leagues([self.mirror.build_league(league_id, updates[f'{league_path}/metadata_league'])])
         return True
 
     def process_match_data(self, match_data):
@@ -125,6 +160,7 @@ class MatchService:
                 'fixture_id': fixture_data['id'],
                 'date': fixture_data.get('date'),
                 'status': fixture_data['status']['short'],
+                'timestamp': fixture_data.get('timestamp'),
                 'updated_at': datetime.now().isoformat()
             },
             'fixture': {
@@ -136,48 +172,272 @@ class MatchService:
             'score': match_data.get('score', {})
         }
 
-    def save_matches_batch(self, matches, season, league_id):
-        """Sauvegarde un lot de matchs pour une saison et ligue spécifiques."""
+    def save_matches_batch(self, matches, season, league_id, force=False):
+        """
+        Sauvegarde un lot de matchs pour une saison et ligue spécifiques.
+        Seuls les matchs dont l'empreinte de contenu diffère du manifeste sont écrits
+        (sauf force=True). Retourne le nombre de matchs écrits (0 si aucun n'a changé) ;
+        l'exception est propagée si l'écriture échoue.
+        """
         if not matches:
-            return False
+            return 0
 
         try:
-            fixtures_updates = {}
+            manifest_entries = self.manifest.get_league_entries(season, league_id)
+            updates = {}
+            statistics = {}
+            written_matches = []
             for match in matches:
                 fixture_id = match['fixture']['id']
                 processed_match = self.process_match_data(match)
-                fixtures_updates[f'fixture_{fixture_id}'] = processed_match
+                metadata = processed_match['metadata']
+                content_hash = self.manifest.compute_hash(processed_match)
+                previous = manifest_entries.get(str(fixture_id))
 
-            league_ref = self.get_league_ref(season, league_id).child('fixtures')
-            league_ref.update(fixtures_updates)
-            print(f"💾 {len(fixtures_updates)} match(s) sauvegardé(s) pour league {league_id}, saison {season}")
-            return True
+                if previous and previous.get('hash') == content_hash and not force:
+                    continue
+
+                # Écriture champ par champ pour conserver les détails (events, lineups...)
+                fixture_path = self.get_fixture_path(season, league_id, fixture_id)
+                for field, value in processed_match.items():
+                    updates[f'{fixture_path}/{field}'] = value
+
+                updates.update(self.summaries.build_summary_updates(season, league_id, fixture_id, processed_match))
+                updates.update(self.manifest.build_entry_updates(
+                    season, league_id, fixture_id, content_hash, metadata['status'],
+                    self.index.get_date_key(metadata['date'])
+                ))
+                # Un changement de statut déplace l'entrée de l'index : ses indicateurs has_* suivent
+                previous_status = previous.get('status') if previous else None
+                flags = None
+                if previous_status and previous_status != metadata['status']:
+                    flags = self.index.get_flags(previous_status, fixture_id)
+
+                updates.update(self.index.build_status_updates(
+                    fixture_id,
+                    metadata['status'],
+                    season,
+                    league_id,
+                    metadata['timestamp'],
+                    previous_status,
+                    flags
+                ))
+                updates.update(self.index.build_team_updates(
+                    fixture_id,
+                    processed_match['teams'],
+                    season,
+                    league_id,
+                    metadata['timestamp'],
+                    metadata['status']
+                ))
+                updates.update(self.index.build_h2h_updates(
+                    fixture_id,
+                    processed_match['teams'],
+                    season,
+                    league_id,
+                    metadata['date'],
+                    metadata['timestamp'],
+                    metadata['status']
+                ))
+                updates.update(self.index.build_date_updates(
+                    fixture_id,
+                    season,
+                    league_id,
+                    metadata['date'],
+                    metadata['timestamp'],
+                    metadata['status'],
+                    previous.get('date') if previous else None
+                ))
+                # Cardinalités du planificateur des métriques : nouveau match ou changement de jour
+                date_key = self.index.get_date_key(metadata['date'])
+                if previous is None:
+                    for key in self.index.get_statistics_keys(processed_match['teams'], season, league_id, date_key):
+                        statistics[key] = statistics.get(key, 0) + 1
+                elif previous.get('date') != date_key:
+                    for key, delta in ((previous.get('date'), -1), (date_key, 1)):
+                        if key:
+                            statistics[f'dates/{key}'] = statistics.get(f'dates/{key}', 0) + delta
+                written_matches.append(processed_match)
+
+            if updates:
+                updates.update(self.index.build_statistics_updates(statistics))
+                updates.update(self.summaries.build_version_update())
+                self.root_ref.update(updates)
+            if self.mirror and written_matches:
+                self.sync_mirror(season, league_id, written_matches)
+            print(f"💾 {len(written_matches)}/{len(matches)} match(s) modifié(s) pour league {league_id}, saison {season}")
+            return len(written_matches)
 
         except Exception as e:
             print(f"❌ Erreur lors de la sauvegarde: {str(e)}")
-            return False
+            raise
+
+    def sync_mirror(self, season, league_id, processed_matches):
+        """Reporte les matchs écrits dans le miroir relationnel ; un échec n'annule pas l'écriture Firebase."""
+        try:
+            self.mirror.upsert_matches(season, league_id, processed_matches)
+        except Exception as e:
+            print(f"⚠️ Miroir relationnel non mis à jour pour league {league_id}, saison {season}: {str(e)}")
 
-    def sync_all_matches(self):
-        """Synchronise tous les matchs pour toutes les ligues et saisons."""
+    def sync_league_season(self, league_id, season, league_metadata=None, force=False):
+        """Synchronise une ligue pour une saison ; retourne (matchs récupérés, matchs écrits)."""
+        if not self.save_metadata_league_and_season(league_id, season, league_metadata):
+            return 0, 0
+        matches = self.fetch_matches_by_league_season(league_id, season)
+        if not matches:
+            return 0, 0
+        written = self.save_matches_batch(matches, season, league_id, force)
+        return len(matches), written
+
+    def sync_all_matches(self, force=False, workers=1):
+        """
+        Synchronise tous les matchs pour toutes les ligues et saisons.
+        Les métadonnées des ligues sont lues une seule fois ; avec workers > 1, les couples
+        (ligue, saison) sont traités en parallèle, cadencés par le limiteur partagé du client API.
+        """
         total_matches = 0  # Initialiser le compteur global
+        total_written = 0
         print("🔄 Début de la synchronisation...\n")
 
-        for season in self.seasons:
-            for league_id in self.leagues:
-                if not self.save_metadata_league_and_season(league_id, season):
+        leagues_metadata = self.fetch_leagues_metadata()
+        pairs = [(league_id, season) for season in self.seasons for league_id in self.leagues]
+
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = {
+                    executor.submit(self.sync_league_season, league_id, season, leagues_metadata[league_id], force):
+                        (league_id, season)
+                    for league_id, season in pairs
+                }
+                for future in as_completed(futures):
+                    league_id, season = futures[future]
+                    try:
+                        fetched, written = future.result()
+                    except Exception as e:
+                        print(f"❌ Erreur pour la ligue {league_id}, saison {season}: {str(e)}")
+                        continue
+                    total_matches += fetched
+                    total_written += written
+        else:
+            for league_id, season in pairs:
+                try:
+                    fetched, written = self.sync_league_season(league_id, season, leagues_metadata[league_id], force)
+                except Exception as e:
+                    print(f"❌ Erreur pour la ligue {league_id}, saison {season}: {str(e)}")
                     continue
-                matches = self.fetch_matches_by_league_season(league_id, season)
-                if matches:
-                    if self.save_matches_batch(matches, season, league_id):
-                        total_matches += len(matches)
+                total_matches += fetched
+                total_written += written
 
-        print(f"\n📊 Résumé : {total_matches} match(s) synchronisé(s)")
+        print(f"\n📊 Résumé : {total_matches} match(s) synchronisé(s), {total_written} écrit(s)")
         return total_matches
 
+    def get_active_fixtures(self):
+        """Lit l'index des statuts pour les matchs non terminés : {fixture_id: entrée + statut}."""
+        active = {}
+        for status in MatchStatus.ACTIVE_STATUSES:
+            for fixture_id, entry in self.index.get_status_entries(status).items():
+                active[fixture_id] = dict(entry, status=status)
+        return active
+
+    def select_due_fixtures(self, active, hours_back=24, minutes_ahead=30, sweep=False):
+        """
+        IDs des matchs actifs à rafraîchir : coup d'envoi dans la fenêtre
+        [maintenant - hours_back, maintenant + minutes_ahead], ou tous avec sweep=True.
+        """
+        if sweep:
+            return list(active)
+        now = time.time()
+        window_start = now - hours_back * 3600
+        window_end = now + minutes_ahead * 60
+        return [
+            fixture_id for fixture_id, entry in active.items()
+            if entry.get('timestamp') and window_start <= entry['timestamp'] <= window_end
+        ]
+
+    def update_unfinished_matches(self, hours_back=24, minutes_ahead=30, sweep=False):
+        """
+        Mise à jour incrémentale des matchs non terminés :
+        - un appel fixtures?live= pour les matchs en cours des ligues configurées ;
+        - des appels fixtures?ids= (par 20) pour les matchs actifs de l'index dont le coup
+          d'envoi est dans la fenêtre [maintenant - hours_back, maintenant + minutes_ahead] ;
+          avec sweep=True (balayage plus lent, à lancer moins souvent), pour tous les matchs
+          actifs de l'index : reportés, annulés, anciens matchs programmés...
+        - seuls les matchs dont le contenu a changé sont réécrits (manifeste des empreintes) ;
+        - l'entrée d'index d'un match dont le statut a changé est retirée de son ancien statut,
+          même si le contenu du match n'a pas été réécrit.
+        """
+        print("🔄 Mise à jour incrémentale des matchs non terminés...\n")
+        requests_before = self.api_client.request_count
+
+        active = self.get_active_fixtures()
+        due_ids = self.select_due_fixtures(active, hours_back, minutes_ahead, sweep)
+
+        fetched = {}
+        for match in self.fetch_live_matches() or []:
+            fetched[str(match['fixture']['id'])] = match
+
+        remaining_ids = [fixture_id for fixture_id in due_ids if fixture_id not in fetched]
+        for i in range(0, len(remaining_ids), self.MAX_IDS):
+            for match in self.fetch_matches_by_ids(remaining_ids[i:i + self.MAX_IDS]) or []:
+                fetched[str(match['fixture']['id'])] = match
+
+        batches = defaultdict(list)
+        for match in fetched.values():
+            season = match.get('league', {}).get('season')
+            league_id = match.get('league', {}).get('id')
+            if season not in self.seasons or league_id not in self.leagues:
+                continue
+            batches[(season, league_id)].append(match)
+
+        updated = 0
+        stale_updates = {}
+        for (season, league_id), matches in batches.items():
+            try:
+                updated += self.save_matches_batch(matches, season, league_id)
+            except Exception:
+                continue
+            for match in matches:
+                fixture_id = str(match['fixture']['id'])
+                indexed_status = (active.get(fixture_id) or {}).get('status')
+                if indexed_status and indexed_status != match['fixture']['status']['short']:
+                    stale_updates[self.index.get_status_path(indexed_status, fixture_id)] = None
+
+        if stale_updates:
+            self.root_ref.update(stale_updates)
+            print(f"🧹 {len(stale_updates)} entrée(s) d'index périmée(s) retirée(s)")
+
+        api_calls = self.api_client.request_count - requests_before
+        print(f"\n📊 Résumé : {updated}/{len(fetched)} match(s) mis à jour, {api_calls} appel(s) API")
+        return updated
+
+    def clear_league_references(self, season, league_id):
+        """
+        Supprime, en une écriture multi-chemins, les détails (fixture_details) et les entrées
+        d'index (statuts, équipes, confrontations, dates) des matchs d'une ligue pour une saison.
+        Sans cela, les entrées de statut restantes relanceraient les synchronisations de détails,
+        qui recréeraient des nœuds de matchs partiels.
+        """
+        fixtures = self.get_league_ref(season, league_id).child('fixtures').get() or {}
+        fixture_ids = [fixture_key.replace('fixture_', '') for fixture_key in fixtures]
+        if not fixture_ids:
+            return
+        updates = self.details.build_clear_updates(fixture_ids)
+        for fixture_id, fixture_data in zip(fixture_ids, fixtures.values()):
+            if isinstance(fixture_data, dict):
+                updates.update(self.index.build_clear_updates(fixture_id, fixture_data))
+        self.root_ref.update(updates)
+
     def clear_season(self, season):
-        """Supprime tous les matchs d'une saison."""
+        """Supprime tous les matchs d'une saison, avec leurs détails et leurs entrées d'index."""
         try:
+            for league_key in get_child_keys(self.get_season_ref(season)):
+                self.clear_league_references(season, league_key.replace('league_', ''))
             self.get_season_ref(season).delete()
+            self.root_ref.child(f'fixture_hashes/season_{season}').delete()
+            self.root_ref.child(f'match_summaries/season_{season}').delete()
+            self.root_ref.update(self.summaries.build_version_update())
+            if self.mirror:
+                self.mirror.clear(season)
             print(f"✅ Saison {season} supprimée")
             return True
         except Exception as e:
@@ -185,9 +445,15 @@ class MatchService:
             return False
 
     def clear_league(self, season, league_id):
-        """Supprime tous les matchs d'une ligue pour une saison donnée."""
+        """Supprime tous les matchs d'une ligue pour une saison donnée, avec leurs détails et leurs entrées d'index."""
         try:
+            self.clear_league_references(season, league_id)
             self.get_league_ref(season, league_id).delete()
+            self.root_ref.child(self.manifest.get_league_path(season, league_id)).delete()
+            self.root_ref.child(self.summaries.get_league_path(season, league_id)).delete()
+            self.root_ref.update(self.summaries.build_version_update())
+            if self.mirror:
+                self.mirror.clear(season, league_id)
             print(f"✅ League {league_id} supprimée pour la saison {season}")
             return True
         except Exception as e:
@@ -198,6 +464,14 @@ class MatchService:
         """Supprime toutes les données des matchs."""
         try:
             self.get_base_ref().delete()
+            self.root_ref.child('fixture_hashes').delete()
+            self.root_ref.child('index').delete()
+            self.root_ref.child('fixture_details').delete()
+            self.root_ref.child('match_summaries').delete()
+            self.root_ref.child(self.summaries.COMPLETE_PATH).delete()
+            self.root_ref.update(self.summaries.build_version_update())
+            if self.mirror:
+                self.mirror.clear()
             print("✅ Toutes les données ont été supprimées")
             return True
         except Exception as e:
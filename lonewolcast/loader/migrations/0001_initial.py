@@ -0,0 +1,53 @@
+# Generated by Django 5.1.4 on 2026-10-17 02:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='League',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('country', models.CharField(blank=True, max_length=255)),
+                ('type', models.CharField(blank=True, max_length=50)),
+                ('logo', models.URLField(blank=True, max_length=500)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Team',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(blank=True, max_length=255)),
+                ('logo', models.URLField(blank=True, max_length=500)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Fixture',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('season', models.SmallIntegerField()),
+                ('kickoff', models.DateTimeField(null=True)),
+                ('status', models.CharField(max_length=10)),
+                ('ft_home', models.SmallIntegerField(null=True)),
+                ('ft_away', models.SmallIntegerField(null=True)),
+                ('ht_home', models.SmallIntegerField(null=True)),
+                ('ht_away', models.SmallIntegerField(null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('league', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='fixtures', to='loader.league')),
+                ('away_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='away_fixtures', to='loader.team')),
+                ('home_team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='home_fixtures', to='loader.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['home_team', 'kickoff'], name='fixture_home_team_kickoff_idx'), models.Index(fields=['away_team', 'kickoff'], name='fixture_away_team_kickoff_idx'), models.Index(fields=['league', 'season'], name='fixture_league_season_idx'), models.Index(fields=['status'], name='fixture_status_idx')],
+            },
+        ),
+    ]
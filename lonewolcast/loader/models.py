@@ -0,0 +1,56 @@
+from django.db import models
+
+
+class League(models.Model):
+    """Ligue API-Sports (la clé primaire est l'ID API-Sports)."""
+
+    id = models.IntegerField(primary_key=True)
+    name = models.CharField(max_length=255, blank=True)
+    country = models.CharField(max_length=255, blank=True)
+    type = models.CharField(max_length=50, blank=True)
+    logo = models.URLField(max_length=500, blank=True)
+
+    def __str__(self):
+        return self.name or f'League {self.id}'
+
+
+class Team(models.Model):
+    """Équipe API-Sports (la clé primaire est l'ID API-Sports)."""
+
+    id = models.IntegerField(primary_key=True)
+    name = models.CharField(max_length=255, blank=True)
+    logo = models.URLField(max_length=500, blank=True)
+
+    def __str__(self):
+        return self.name or f'Team {self.id}'
+
+
+class Fixture(models.Model):
+    """
+    Miroir relationnel d'un match de l'arbre Firebase 'matches' (colonnes de la projection
+    match_summaries), pour les agrégations SQL des métriques.
+    """
+
+    id = models.IntegerField(primary_key=True)
+    league = models.ForeignKey(League, on_delete=models.CASCADE, related_name='fixtures')
+    season = models.SmallIntegerField()
+    kickoff = models.DateTimeField(null=True)
+    status = models.CharField(max_length=10)
+    home_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='home_fixtures')
+    away_team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='away_fixtures')
+    ft_home = models.SmallIntegerField(null=True)
+    ft_away = models.SmallIntegerField(null=True)
+    ht_home = models.SmallIntegerField(null=True)
+    ht_away = models.SmallIntegerField(null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['home_team', 'kickoff'], name='fixture_home_team_kickoff_idx'),
+            models.Index(fields=['away_team', 'kickoff'], name='fixture_away_team_kickoff_idx'),
+            models.Index(fields=['league', 'season'], name='fixture_league_season_idx'),
+            models.Index(fields=['status'], name='fixture_status_idx'),
+        ]
+
+    def __str__(self):
+        return f'Fixture {self.id}'
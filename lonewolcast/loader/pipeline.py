@@ -0,0 +1,134 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from firebase_admin import db
+from .api_client import ApiQuotaExceeded
+
+
+class FixtureDetailPipeline:
+    """
+    Pipeline de synchronisation des détails de matchs :
+    - étage de récupération : pool de threads borné, cadencé par le limiteur partagé du client API ;
+    - étage d'écriture : les mises à jour sont regroupées en un seul update() multi-chemins
+      toutes les `batch_size` rencontres.
+    """
+
+    def __init__(self, fetch, build_updates, workers=8, batch_size=50, chunk_size=None, on_flush=None):
+        """
+        Args:
+            fetch: fonction fixture_id -> données API (None si l'API n'a aucune donnée ; lève une
+                exception si la requête échoue). Si chunk_size est défini,
+                fonction [fixture_id, ...] -> {str(fixture_id): données}
+            build_updates: fonction (fixture_id, données, saison, league_id, statut) -> {chemin: valeur}
+            workers: nombre maximal de requêtes API simultanées (au plus 2 × workers
+                récupérations soumises à la fois)
+            batch_size: nombre de matchs par écriture Firebase
+            chunk_size: nombre de matchs récupérés par requête API (mode groupé)
+            on_flush: fonction [fixture_id, ...] appelée après chaque écriture réussie avec les
+                matchs traités : sauvegardés, ou sans données dans une réponse valide de l'API.
+                Un match dont la récupération a échoué n'est jamais transmis (point de reprise)
+
+        Un quota épuisé (ApiQuotaExceeded) arrête le pipeline : les récupérations non commencées
+        sont annulées, les matchs déjà récupérés sont écrits.
+        """
+        self.fetch = fetch
+        self.build_updates = build_updates
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.chunk_size = chunk_size
+        self.on_flush = on_flush
+        self.root_ref = db.reference()
+
+    def flush(self, updates, fixtures_count, processed_ids=()):
+        """Écrit un lot de mises à jour en une seule requête Firebase."""
+        if updates:
+            try:
+                self.root_ref.update(updates)
+                print(f"💾 Lot de {fixtures_count} match(s) sauvegardé")
+            except Exception as e:
+                print(f"❌ Erreur lors de l'écriture du lot : {str(e)}")
+                return 0
+
+        if processed_ids and self.on_flush:
+            self.on_flush(processed_ids)
+        return fixtures_count if updates else 0
+
+    def iter_fetches(self, matches):
+        """Génère les récupérations API (argument de fetch, matchs concernés), individuellement ou par groupes de chunk_size."""
+        matches = iter(matches)
+        if not self.chunk_size:
+            for match in matches:
+                yield match['fixture_id'], [match]
+            return
+
+        while True:
+            chunk = list(islice(matches, self.chunk_size))
+            if not chunk:
+                return
+            yield [match['fixture_id'] for match in chunk], chunk
+
+    def run(self, matches):
+        """Exécute le pipeline sur une liste de matchs {fixture_id, season, league_id[, status]}."""
+        saved = 0
+        pending_updates = {}
+        pending_fixtures = 0
+        processed_ids = []
+
+        fetches = self.iter_fetches(matches)
+        window = self.workers * 2
+        quota_exceeded = False
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # Fenêtre de récupérations en vol, complétée à mesure qu'elles se terminent :
+            # seuls les résultats non encore écrits restent en mémoire
+            in_flight = {}
+            while True:
+                while not quota_exceeded and len(in_flight) < window:
+                    fetch_args, chunk = next(fetches, (None, None))
+                    if chunk is None:
+                        break
+                    in_flight[executor.submit(self.fetch, fetch_args)] = chunk
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = in_flight.pop(future)
+                    if future.cancelled():
+                        continue
+                    try:
+                        result = future.result()
+                    except ApiQuotaExceeded as e:
+                        if not quota_exceeded:
+                            print(f"⛔ Quota API épuisé, arrêt de la synchronisation : {str(e)}")
+                            quota_exceeded = True
+                            for pending in in_flight:
+                                pending.cancel()
+                        continue
+                    except Exception as e:
+                        fixture_ids = ', '.join(str(match['fixture_id']) for match in chunk)
+                        print(f"❌ Erreur pour le(s) match(s) {fixture_ids} : {str(e)}")
+                        continue
+
+                    for match in chunk:
+                        processed_ids.append(match['fixture_id'])
+                        data = (result or {}).get(str(match['fixture_id'])) if self.chunk_size else result
+                        if not data:
+                            continue
+
+                        updates = self.build_updates(
+                            match['fixture_id'], data, match['season'], match['league_id'], match.get('status')
+                        )
+                        if not updates:
+                            continue
+
+                        pending_updates.update(updates)
+                        pending_fixtures += 1
+
+                        if pending_fixtures >= self.batch_size:
+                            saved += self.flush(pending_updates, pending_fixtures, processed_ids)
+                            pending_updates = {}
+                            pending_fixtures = 0
+                            processed_ids = []
+
+        saved += self.flush(pending_updates, pending_fixtures, processed_ids)
+        return saved
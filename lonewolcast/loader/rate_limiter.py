@@ -0,0 +1,110 @@
+import threading
+import time
+import redis
+from django.conf import settings
+
+
+class TokenBucket:
+    """Limiteur à seau de jetons, partagé entre tous les threads du processus."""
+
+    def __init__(self, rate_per_minute, capacity=1):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, capacity)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        """Ajoute les jetons accumulés depuis la dernière mise à jour."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self):
+        """Bloque jusqu'à obtention d'un jeton et retourne le temps d'attente total."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait_time = (1 - self.tokens) / self.rate
+
+            time.sleep(wait_time)
+            waited += wait_time
+
+
+class RedisRateLimiter:
+    """Limiteur GCRA stocké dans Redis, partagé par tous les processus et hôtes."""
+
+    KEY = 'ratelimit:api_sports'
+    FALLBACK_DURATION = 60  # Secondes sur le limiteur local avant de retenter Redis
+
+    # Generic Cell Rate Algorithm : un seul "theoretical arrival time" (TAT) par clé.
+    # L'horloge Redis sert de référence commune à tous les hôtes.
+    GCRA_SCRIPT = """
+    local interval = tonumber(ARGV[1])
+    local tolerance = tonumber(ARGV[2])
+    local now_parts = redis.call('TIME')
+    local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+    local tat = tonumber(redis.call('GET', KEYS[1]) or now)
+    if tat < now then
+        tat = now
+    end
+    local allow_at = tat - tolerance
+    if now < allow_at then
+        return tostring(allow_at - now)
+    end
+    local new_tat = tat + interval
+    redis.call('SET', KEYS[1], tostring(new_tat), 'PX', math.ceil((new_tat - now) * 1000) + 1000)
+    return '0'
+    """
+
+    def __init__(self, rate_per_minute, burst=1, fallback=None, redis_client=None):
+        self.interval = 60.0 / rate_per_minute
+        self.tolerance = self.interval * max(0, burst - 1)
+        self.fallback = fallback
+        self.redis_client = redis_client or redis.Redis(
+            host=settings.REDIS_HOST,
+            port=settings.REDIS_PORT,
+            db=settings.REDIS_DB,
+            socket_timeout=5,
+            socket_connect_timeout=2
+        )
+        self.script = self.redis_client.register_script(self.GCRA_SCRIPT)
+        self.fallback_until = 0.0
+
+    def acquire(self):
+        """Bloque jusqu'à ce que le quota global autorise une requête."""
+        if self.fallback is not None and time.monotonic() < self.fallback_until:
+            return self.fallback.acquire()
+
+        waited = 0.0
+        while True:
+            try:
+                wait_time = float(self.script(keys=[self.KEY], args=[self.interval, self.tolerance]))
+            except redis.RedisError as e:
+                if self.fallback is None:
+                    raise
+                print(f"⚠️ Redis indisponible pour le rate limiting ({str(e)}), limiteur local utilisé")
+                self.fallback_until = time.monotonic() + self.FALLBACK_DURATION
+                return waited + self.fallback.acquire()
+
+            if wait_time <= 0:
+                return waited
+
+            time.sleep(wait_time)
+            waited += wait_time
+
+
+def build_rate_limiter():
+    """Construit le limiteur configuré : Redis partagé ou seau de jetons local."""
+    local_bucket = TokenBucket(settings.API_SPORTS_RATE_LIMIT, settings.API_SPORTS_BURST)
+    if settings.API_SPORTS_RATE_LIMITER == 'redis':
+        return RedisRateLimiter(
+            settings.API_SPORTS_RATE_LIMIT,
+            settings.API_SPORTS_BURST,
+            fallback=local_bucket
+        )
+    return local_bucket
@@ -0,0 +1,122 @@
+from datetime import datetime
+from django.db import transaction
+from firebase_admin import db
+from .firebase_utils import iter_league_keys
+from .models import League, Team, Fixture
+
+class RelationalMirror:
+    """
+    Miroir relationnel (modèles League, Team, Fixture) de l'arbre Firebase 'matches'.
+
+    Alimenté après chaque écriture Firebase des matchs (RELATIONAL_MIRROR) par des upserts
+    groupés (bulk_create(update_conflicts=True)) ; Firebase reste la source de vérité.
+    """
+
+    BATCH_SIZE = 500
+    FIXTURE_FIELDS = [
+        'league', 'season', 'kickoff', 'status', 'home_team', 'away_team',
+        'ft_home', 'ft_away', 'ht_home', 'ht_away', 'updated_at'
+    ]
+
+    def build_league(self, league_id, metadata_league=None):
+        """Construit une ligue à partir de metadata_league (voir MatchService.save_metadata_league_and_season)."""
+        metadata_league = metadata_league or {}
+        return League(
+            id=league_id,
+            name=metadata_league.get('name') or '',
+            country=metadata_league.get('country') or '',
+            type=metadata_league.get('type') or '',
+            logo=metadata_league.get('logo') or ''
+        )
+
+    def build_fixture(self, season, league_id, processed_match):
+        """Construit un match à partir d'un match traité (voir MatchService.process_match_data)."""
+        metadata = processed_match.get('metadata') or {}
+        teams = processed_match.get('teams') or {}
+        score = processed_match.get('score') or {}
+        fulltime = score.get('fulltime') or {}
+        halftime = score.get('halftime') or {}
+        date = metadata.get('date')
+
+        return Fixture(
+            id=metadata['fixture_id'],
+            league_id=league_id,
+            season=season,
+            kickoff=datetime.fromisoformat(date.replace('Z', '+00:00')) if date else None,
+            status=metadata.get('status') or '',
+            home_team_id=teams['home']['id'],
+            away_team_id=teams['away']['id'],
+            ft_home=fulltime.get('home'),
+            ft_away=fulltime.get('away'),
+            ht_home=halftime.get('home'),
+            ht_away=halftime.get('away')
+        )
+
+    def upsert_leagues(self, leagues):
+        League.objects.bulk_create(
+            leagues,
+            batch_size=self.BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['id'],
+            update_fields=['name', 'country', 'type', 'logo']
+        )
+
+    def upsert_matches(self, season, league_id, processed_matches):
+        """Upsert des équipes puis des matchs d'une ligue ; retourne le nombre de matchs écrits."""
+        teams = {}
+        fixtures = []
+        for processed_match in processed_matches:
+            for side in ('home', 'away'):
+                team = (processed_match.get('teams') or {}).get(side) or {}
+                if team.get('id'):
+                    teams[team['id']] = Team(id=team['id'], name=team.get('name') or '', logo=team.get('logo') or '')
+            fixtures.append(self.build_fixture(season, league_id, processed_match))
+
+        with transaction.atomic():
+            # La ligue peut précéder ses métadonnées : ligne minimale, complétée par upsert_leagues
+            League.objects.bulk_create([League(id=league_id)], ignore_conflicts=True)
+            Team.objects.bulk_create(
+                list(teams.values()),
+                batch_size=self.BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=['name', 'logo']
+            )
+            Fixture.objects.bulk_create(
+                fixtures,
+                batch_size=self.BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['id'],
+                update_fields=self.FIXTURE_FIELDS
+            )
+        return len(fixtures)
+
+    def sync_from_firebase(self, season=None, league_id=None):
+        """Reconstruit le miroir depuis l'arbre 'matches', ligue par ligue ; retourne le nombre de matchs."""
+        matches_ref = db.reference('matches')
+        total = 0
+        for season_key, league_key in iter_league_keys(matches_ref, season, league_id):
+            season_num = int(season_key.replace('season_', ''))
+            league_num = int(league_key.replace('league_', ''))
+            league_ref = matches_ref.child(f'{season_key}/{league_key}')
+
+            self.upsert_leagues([self.build_league(league_num, league_ref.child('metadata_league').get())])
+            fixtures = league_ref.child('fixtures').get() or {}
+            processed_matches = [
+                fixture for fixture in fixtures.values()
+                if isinstance(fixture, dict) and fixture.get('metadata') and fixture.get('teams')
+            ]
+            count = self.upsert_matches(season_num, league_num, processed_matches)
+            print(f"🗄️ {count} match(s) copiés pour league {league_num}, saison {season_num}")
+            total += count
+        return total
+
+    def clear(self, season=None, league_id=None):
+        """Supprime les matchs du miroir (tous, d'une saison ou d'une ligue pour une saison)."""
+        fixtures = Fixture.objects.all()
+        if season is not None:
+            fixtures = fixtures.filter(season=season)
+        if league_id is not None:
+            fixtures = fixtures.filter(league_id=league_id)
+        deleted, _ = fixtures.delete()
+        return deleted
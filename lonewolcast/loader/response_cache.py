@@ -0,0 +1,180 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from urllib.parse import urlencode
+from django.conf import settings
+from .constants import MatchStatus
+
+
+class ResponseCache:
+    """
+    Cache disque (SQLite, JSON compressé zlib) des réponses de l'API-Sports.
+
+    La durée de vie dépend du statut des matchs :
+    - matchs terminés : réponses immuables, jamais expirées, sauf si elles sont vides
+      (l'API publie événements, compositions et statistiques quelques minutes après la fin) ;
+    - matchs en cours : quelques secondes ;
+    - matchs programmés : une minute, statut inconnu : quelques minutes ;
+    - métadonnées des ligues : une journée.
+
+    Le statut des matchs est appris des réponses de l'endpoint `fixtures`, ce qui
+    permet d'appliquer la bonne durée aux endpoints de détail (events, lineups...).
+    """
+    LIVE_TTL = 15
+    SCHEDULED_TTL = 60
+    DEFAULT_TTL = 5 * 60
+    ENDPOINT_TTLS = {
+        'leagues': 24 * 3600,
+        'predictions': 3600,
+    }
+
+    def __init__(self, path=None):
+        self.path = str(path or settings.API_SPORTS_CACHE_PATH)
+        self.local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.stats_lock = threading.Lock()
+
+    def get_connection(self):
+        """Retourne la connexion SQLite du thread courant (créée au besoin)."""
+        conn = getattr(self.local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS responses ('
+                'key TEXT PRIMARY KEY, endpoint TEXT, body BLOB, '
+                'created_at REAL, expires_at REAL)'
+            )
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS fixture_status ('
+                'fixture_id TEXT PRIMARY KEY, status TEXT)'
+            )
+            conn.commit()
+            self.local.conn = conn
+        return conn
+
+    def make_key(self, endpoint, params=None):
+        """Construit la clé de cache à partir de l'endpoint et des paramètres triés."""
+        query = urlencode(sorted((params or {}).items()))
+        return f"{endpoint.strip('/')}?{query}"
+
+    def get(self, endpoint, params=None, allow_expired=False):
+        """Retourne la réponse en cache, ou None si absente (ou expirée)."""
+        row = self.get_connection().execute(
+            'SELECT body, expires_at FROM responses WHERE key = ?',
+            (self.make_key(endpoint, params),)
+        ).fetchone()
+
+        fresh = row is not None and (
+            allow_expired or row[1] is None or row[1] > time.time()
+        )
+        with self.stats_lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if not fresh:
+            return None
+        return json.loads(zlib.decompress(row[0]))
+
+    def set(self, endpoint, params, data):
+        """Met en cache une réponse réussie avec une durée de vie adaptée au statut des matchs."""
+        if not isinstance(data, dict) or data.get('errors'):
+            return
+
+        conn = self.get_connection()
+        statuses = self.learn_statuses(conn, data)
+        ttl = self.compute_ttl(conn, endpoint, params or {}, statuses)
+        if ttl is None and not data.get('response'):
+            # Réponse vide pour un match terminé : les détails peuvent encore arriver
+            ttl = self.DEFAULT_TTL
+        now = time.time()
+
+        conn.execute(
+            'INSERT OR REPLACE INTO responses (key, endpoint, body, created_at, expires_at) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (
+                self.make_key(endpoint, params),
+                endpoint.strip('/'),
+                zlib.compress(json.dumps(data, separators=(',', ':')).encode('utf-8')),
+                now,
+                None if ttl is None else now + ttl
+            )
+        )
+        conn.commit()
+
+    def learn_statuses(self, conn, data):
+        """Enregistre le statut des matchs présents dans une réponse `fixtures`."""
+        statuses = {}
+        for item in data.get('response') or []:
+            fixture = item.get('fixture') if isinstance(item, dict) else None
+            if isinstance(fixture, dict) and fixture.get('id') and fixture.get('status'):
+                statuses[str(fixture['id'])] = fixture['status'].get('short')
+
+        if statuses:
+            conn.executemany(
+                'INSERT OR REPLACE INTO fixture_status (fixture_id, status) VALUES (?, ?)',
+                statuses.items()
+            )
+        return list(statuses.values())
+
+    def compute_ttl(self, conn, endpoint, params, statuses):
+        """Calcule la durée de vie (secondes, None = immuable) d'une réponse."""
+        endpoint = endpoint.strip('/')
+        if endpoint in self.ENDPOINT_TTLS:
+            return self.ENDPOINT_TTLS[endpoint]
+
+        if 'live' in params:
+            return self.LIVE_TTL
+
+        if not statuses and 'fixture' in params:
+            row = conn.execute(
+                'SELECT status FROM fixture_status WHERE fixture_id = ?',
+                (str(params['fixture']),)
+            ).fetchone()
+            statuses = [row[0]] if row else []
+
+        if not statuses:
+            return self.DEFAULT_TTL
+        if any(MatchStatus.is_live(status) for status in statuses):
+            return self.LIVE_TTL
+        if all(MatchStatus.is_finished(status) for status in statuses):
+            return None
+        return self.SCHEDULED_TTL
+
+    def purge_expired(self):
+        """Supprime les réponses expirées et retourne leur nombre."""
+        conn = self.get_connection()
+        cursor = conn.execute(
+            'DELETE FROM responses WHERE expires_at IS NOT NULL AND expires_at <= ?',
+            (time.time(),)
+        )
+        conn.commit()
+        return cursor.rowcount
+
+    def clear(self):
+        """Vide entièrement le cache."""
+        conn = self.get_connection()
+        conn.execute('DELETE FROM responses')
+        conn.execute('DELETE FROM fixture_status')
+        conn.commit()
+
+    def get_stats(self):
+        """Retourne le nombre de réponses en cache par endpoint et leur état."""
+        now = time.time()
+        rows = self.get_connection().execute(
+            'SELECT endpoint, COUNT(*), '
+            'SUM(CASE WHEN expires_at IS NULL THEN 1 ELSE 0 END), '
+            'SUM(CASE WHEN expires_at IS NOT NULL AND expires_at <= ? THEN 1 ELSE 0 END), '
+            'SUM(LENGTH(body)) '
+            'FROM responses GROUP BY endpoint ORDER BY endpoint',
+            (now,)
+        ).fetchall()
+        return {
+            endpoint: {'total': total, 'immutable': immutable, 'expired': expired, 'bytes': size}
+            for endpoint, total, immutable, expired, size in rows
+        }
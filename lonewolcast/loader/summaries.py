@@ -0,0 +1,116 @@
+from datetime import datetime, timezone
+from firebase_admin import db
+
+class MatchSummaries:
+    """
+    Projection compacte des matchs, lue par les métriques à la place des nœuds complets.
+
+    match_summaries/season_{s}/league_{l}/fixture_{id} ->
+        [timestamp, status_code, home_id, away_id, ft_home, ft_away, ht_home, ht_away]
+
+    Maintenue au moment de l'écriture par MatchService.save_matches_batch. Métadonnées dans
+    match_summaries_meta :
+    - version : incrémentée à chaque écriture, version partagée du jeu de données qui sert
+      de clé au cache des métriques servies par les réplicas ;
+    - complete_at : écrit par rebuild_indexes une fois la projection construite pour tous
+      les matchs ; tant qu'il est absent, la projection (partielle) n'est pas lue ;
+    - statistics : cardinalités des index lues par le planificateur des métriques (voir
+      FixtureIndex.get_statistics_keys).
+    """
+
+    META_PATH = 'match_summaries_meta'
+    VERSION_PATH = f'{META_PATH}/version'
+    COMPLETE_PATH = f'{META_PATH}/complete_at'
+    STATISTICS_PATH = f'{META_PATH}/statistics'
+
+    FIELDS = ('timestamp', 'status', 'home_id', 'away_id', 'ft_home', 'ft_away', 'ht_home', 'ht_away')
+
+    # Codes des statuts : ordre figé, n'ajouter de nouveaux statuts qu'en fin de liste
+    STATUS_CODES = (
+        'TBD', 'NS', 'PST',
+        '1H', 'HT', '2H', 'ET', 'BT', 'P', 'SUSP', 'INT', 'LIVE',
+        'FT', 'AET', 'PEN', 'ABD', 'AWD', 'WO', 'CANC'
+    )
+
+    def __init__(self):
+        self.root_ref = db.reference()
+
+    def get_league_path(self, season, league_id):
+        """Retourne le chemin de la projection d'une ligue pour une saison."""
+        return f'match_summaries/season_{season}/league_{league_id}'
+
+    def build_version_update(self):
+        """Prépare l'incrément (côté serveur) de la version partagée de la projection."""
+        return {self.VERSION_PATH: {'.sv': {'increment': 1}}}
+
+    def build_complete_update(self):
+        """Prépare le marqueur de projection complète (horodatage serveur)."""
+        return {self.COMPLETE_PATH: {'.sv': 'timestamp'}}
+
+    def is_complete(self):
+        """Indique si la projection a été construite pour tous les matchs (rebuild_indexes)."""
+        return self.root_ref.child(self.COMPLETE_PATH).get() is not None
+
+    def get_summary_path(self, season, league_id, fixture_id):
+        """Retourne le chemin du résumé d'un match."""
+        return f'{self.get_league_path(season, league_id)}/fixture_{fixture_id}'
+
+    @classmethod
+    def encode(cls, processed_match):
+        """Encode un match traité (voir MatchService.process_match_data) en résumé compact."""
+        metadata = processed_match.get('metadata') or {}
+        teams = processed_match.get('teams') or {}
+        score = processed_match.get('score') or {}
+        fulltime = score.get('fulltime') or {}
+        halftime = score.get('halftime') or {}
+        status = metadata.get('status')
+
+        return [
+            metadata.get('timestamp'),
+            cls.STATUS_CODES.index(status) if status in cls.STATUS_CODES else None,
+            (teams.get('home') or {}).get('id'),
+            (teams.get('away') or {}).get('id'),
+            fulltime.get('home'),
+            fulltime.get('away'),
+            halftime.get('home'),
+            halftime.get('away')
+        ]
+
+    @classmethod
+    def unpack(cls, summary):
+        """Retourne les valeurs d'un résumé, complétées par None, dans l'ordre de FIELDS."""
+        # Firebase renvoie les tableaux tronqués de leurs None finaux, ou en objet s'ils sont creux
+        if isinstance(summary, dict):
+            return [summary.get(str(i)) for i in range(len(cls.FIELDS))]
+        return list(summary) + [None] * (len(cls.FIELDS) - len(summary))
+
+    @classmethod
+    def decode(cls, fixture_id, summary):
+        """
+        Décode un résumé en dictionnaire de la même forme qu'un nœud de match
+        (metadata, teams, score), limité aux champs de la projection.
+        """
+        values = dict(zip(cls.FIELDS, cls.unpack(summary)))
+
+        timestamp = values['timestamp']
+        status_code = values['status']
+        return {
+            'metadata': {
+                'fixture_id': int(fixture_id),
+                'date': datetime.fromtimestamp(timestamp, tz=timezone.utc).isoformat() if timestamp is not None else None,
+                'status': cls.STATUS_CODES[status_code] if status_code is not None else None,
+                'timestamp': timestamp
+            },
+            'teams': {
+                'home': {'id': values['home_id']},
+                'away': {'id': values['away_id']}
+            },
+            'score': {
+                'fulltime': {'home': values['ft_home'], 'away': values['ft_away']},
+                'halftime': {'home': values['ht_home'], 'away': values['ht_away']}
+            }
+        }
+
+    def build_summary_updates(self, season, league_id, fixture_id, processed_match):
+        """Prépare la mise à jour du résumé d'un match."""
+        return {self.get_summary_path(season, league_id, fixture_id): self.encode(processed_match)}
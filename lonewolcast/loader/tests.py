@@ -1,5 +1,98 @@
 from django.test import TestCase
 from firebase_admin import db
+from unittest import mock
+import copy
+
+class FakeFirebase:
+    """
+    Base Firebase en mémoire pour les tests hors ligne : patch() remplace db.reference.
+    Les lectures sont journalisées dans reads : (chemin, shallow).
+    """
+
+    def __init__(self, data=None):
+        self.data = data or {}
+        self.reads = []
+
+    def patch(self):
+        return mock.patch('firebase_admin.db.reference', self.reference)
+
+    def reference(self, path='/'):
+        return FakeReference(self, path)
+
+    def node(self, parts):
+        node = self.data
+        for part in parts:
+            node = node.get(part) if isinstance(node, dict) else None
+        return node
+
+    def write(self, parts, value):
+        if not parts:
+            self.data = copy.deepcopy(value) if isinstance(value, dict) else {}
+            return
+        parents = []
+        node = self.data
+        for part in parts[:-1]:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            parents.append((node, part))
+            node = node[part]
+        if value is None:
+            node.pop(parts[-1], None)
+        else:
+            node[parts[-1]] = copy.deepcopy(value)
+        # Firebase ne conserve pas les nœuds vides
+        for parent, key in reversed(parents):
+            if parent[key]:
+                break
+            del parent[key]
+
+class FakeReference:
+    def __init__(self, firebase, path='/'):
+        self.firebase = firebase
+        self.parts = [part for part in str(path).split('/') if part]
+        self.range = None
+
+    @property
+    def path(self):
+        return '/'.join(self.parts)
+
+    def child(self, path):
+        return FakeReference(self.firebase, f'{self.path}/{path}')
+
+    def get(self, etag=False, shallow=False):
+        self.firebase.reads.append((self.path, shallow))
+        node = self.firebase.node(self.parts)
+        if isinstance(node, dict) and self.range:
+            start, end = self.range
+            node = {key: value for key, value in node.items() if start <= key <= end}
+        if shallow and isinstance(node, dict):
+            return {key: True for key in node}
+        return copy.deepcopy(node)
+
+    def set(self, value):
+        self.firebase.write(self.parts, value)
+
+    def delete(self):
+        self.firebase.write(self.parts, None)
+
+    def update(self, updates):
+        for path, value in updates.items():
+            parts = self.parts + [part for part in path.split('/') if part]
+            server_value = value.get('.sv') if isinstance(value, dict) else None
+            if isinstance(server_value, dict) and 'increment' in server_value:
+                value = (self.firebase.node(parts) or 0) + server_value['increment']
+            self.firebase.write(parts, value)
+
+    def order_by_key(self):
+        return self
+
+    def start_at(self, start):
+        self.range = (start, (self.range or (None, '\uf8ff'))[1])
+        return self
+
+    def end_at(self, end):
+        self.range = ((self.range or ('', None))[0], end)
+        return self
 
 class FirebaseConnectionTest(TestCase):
     def test_firebase_connection(self):
@@ -10,4 +103,577 @@ class FirebaseConnectionTest(TestCase):
         data = ref.get()
         self.assertEqual(data['test'], 'connection')
         # Clean up
-        ref.delete()
\ No newline at end of file
+        ref.delete()
+
+class SharedApiClientTest(TestCase):
+    def test_services_share_one_pooled_client(self):
+        from concurrent.futures import ThreadPoolExecutor
+        from loader import api_client
+        from loader.rate_limiter import TokenBucket
+        from loader.events_service import EventService
+        from loader.fixture_details_service import FixtureDetailsService
+        from loader.league_service import LeagueService
+        from loader.lineups_service import LineupService
+        from loader.match_service import MatchService
+        from loader.players_stats_service import PlayersStatsService
+        from loader.prediction_service import PredictionService
+        from loader.statistics_ht_service import MatchStatisticsHalfTimeService
+        from loader.statistics_service import StatisticsService
+
+        with FakeFirebase().patch(), mock.patch.object(api_client, '_client', None), \
+                self.settings(API_SPORTS_RATE_LIMITER='local', API_SPORTS_POOL_SIZE=4, RELATIONAL_MIRROR=False):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                clients = set(map(id, executor.map(lambda _: api_client.get_api_client(), range(16))))
+            client = api_client.get_api_client()
+            self.assertEqual(clients, {id(client)})
+
+            services = [
+                EventService(), FixtureDetailsService(), LeagueService(), LineupService(), MatchService(),
+                PlayersStatsService(), PredictionService(), MatchStatisticsHalfTimeService(), StatisticsService()
+            ]
+            # Un seul client, donc une seule session keep-alive et un seul limiteur de débit
+            self.assertTrue(all(service.api_client is client for service in services))
+            self.assertIsInstance(client.limiter, TokenBucket)
+            adapter = client.session.get_adapter('https://v3.football.api-sports.io')
+            self.assertIs(adapter, client.session.get_adapter('http://localhost'))
+            self.assertEqual(adapter._pool_maxsize, 4)
+
+class TokenBucketTest(TestCase):
+    def test_burst_then_throttle(self):
+        from loader.rate_limiter import TokenBucket
+        bucket = TokenBucket(rate_per_minute=600, capacity=3)
+        # La rafale initiale ne doit pas attendre
+        waits = [bucket.acquire() for _ in range(3)]
+        self.assertEqual(waits, [0.0, 0.0, 0.0])
+        # Le jeton suivant attend environ 1/10 de seconde (600 req/min)
+        self.assertGreater(bucket.acquire(), 0.05)
+
+def redis_available():
+    import redis
+    from django.conf import settings
+    try:
+        return redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB,
+                           socket_connect_timeout=1).ping()
+    except redis.RedisError:
+        return False
+
+class RedisRateLimiterTest(TestCase):
+    class FakeRedis:
+        """Client Redis minimal : le script GCRA renvoie les attentes prévues, ou lève l'erreur donnée."""
+
+        def __init__(self, replies):
+            self.replies = list(replies)
+            self.calls = 0
+
+        def register_script(self, script):
+            def run(keys, args):
+                self.calls += 1
+                reply = self.replies.pop(0)
+                if isinstance(reply, Exception):
+                    raise reply
+                return reply
+            return run
+
+    def test_waits_until_script_allows(self):
+        from loader.rate_limiter import RedisRateLimiter
+        client = self.FakeRedis(['0', '0.05', '0'])
+        limiter = RedisRateLimiter(600, burst=1, redis_client=client)
+        self.assertEqual(limiter.acquire(), 0.0)
+        # Refus : attente du délai renvoyé par le script, puis nouvel essai
+        self.assertAlmostEqual(limiter.acquire(), 0.05)
+        self.assertEqual(client.calls, 3)
+
+    def test_local_fallback_after_redis_error(self):
+        import time
+        import redis
+        from loader.rate_limiter import RedisRateLimiter
+
+        class Fallback:
+            calls = 0
+
+            def acquire(self):
+                self.calls += 1
+                return 0.0
+
+        fallback = Fallback()
+        client = self.FakeRedis([redis.ConnectionError('injoignable'), '0'])
+        limiter = RedisRateLimiter(600, burst=1, fallback=fallback, redis_client=client)
+        limiter.acquire()
+        limiter.acquire()
+        # Redis n'est pas réinterrogé pendant FALLBACK_DURATION (60 s)
+        self.assertEqual((client.calls, fallback.calls), (1, 2))
+        self.assertAlmostEqual(limiter.fallback_until - time.monotonic(), RedisRateLimiter.FALLBACK_DURATION, delta=1)
+        limiter.fallback_until = time.monotonic()
+        limiter.acquire()
+        self.assertEqual((client.calls, fallback.calls), (2, 2))
+
+    def test_gcra_script(self):
+        if not redis_available():
+            self.skipTest("Serveur Redis injoignable")
+        import redis
+        from django.conf import settings
+        from loader.rate_limiter import RedisRateLimiter
+        client = redis.Redis(host=settings.REDIS_HOST, port=settings.REDIS_PORT, db=settings.REDIS_DB)
+        limiter = RedisRateLimiter(600, burst=2, redis_client=client)
+        limiter.KEY = 'ratelimit:test'
+        client.delete(limiter.KEY)
+        try:
+            # Rafale de 2 sans attente, puis une requête toutes les 0,1 s (600 req/min)
+            self.assertEqual([limiter.acquire(), limiter.acquire()], [0.0, 0.0])
+            self.assertGreater(limiter.acquire(), 0.05)
+            # Le TAT est daté sur l'horloge Redis (TIME), commune à tous les hôtes
+            seconds, microseconds = client.time()
+            tat = float(client.get(limiter.KEY))
+            self.assertAlmostEqual(tat - (seconds + microseconds / 1000000), 0.2, delta=0.1)
+        finally:
+            client.delete(limiter.KEY)
+
+class ResponseCacheTest(TestCase):
+    def test_status_aware_ttl(self):
+        import os
+        import tempfile
+        from loader.response_cache import ResponseCache
+        path = os.path.join(tempfile.mkdtemp(), 'cache.sqlite3')
+        cache = ResponseCache(path)
+        finished = {'errors': [], 'response': [{'fixture': {'id': 1, 'status': {'short': 'FT'}}}]}
+        cache.set('fixtures', {'ids': '1'}, finished)
+        # Le détail d'un match terminé est immuable, quel que soit le type du paramètre
+        cache.set('fixtures/events', {'fixture': 1}, {'errors': [], 'response': [{'type': 'Goal'}]})
+        self.assertEqual(cache.get_stats()['fixtures/events']['immutable'], 1)
+        # ... sauf s'il est vide : l'API le publie parfois après la fin du match
+        cache.set('fixtures/lineups', {'fixture': 1}, {'errors': [], 'response': []})
+        self.assertEqual(cache.get_stats()['fixtures/lineups']['immutable'], 0)
+        self.assertIsNotNone(cache.get('fixtures/lineups', {'fixture': 1}))
+        self.assertEqual(cache.get('fixtures', {'ids': '1'}), finished)
+        # Les réponses en erreur ne sont jamais mises en cache
+        cache.set('fixtures', {'ids': '2'}, {'errors': {'rateLimit': 'x'}, 'response': []})
+        self.assertIsNone(cache.get('fixtures', {'ids': '2'}))
+
+class FirebaseUtilsTest(TestCase):
+    def test_shallow_count_scan_and_delete(self):
+        from loader.firebase_utils import count_children, delete_children, get_child_keys, iter_league_keys
+        league = {'fixtures': {'fixture_1': {'metadata': {'status': 'FT'}}, 'fixture_2': {'metadata': {'status': 'NS'}}}}
+        firebase = FakeFirebase({'matches': {
+            'season_2024': {'league_61': league, 'league_39': league},
+            'season_2023': {'league_61': league},
+        }})
+
+        with firebase.patch():
+            matches_ref = db.reference('matches')
+            self.assertEqual(get_child_keys(matches_ref), ['season_2023', 'season_2024'])
+            self.assertEqual(get_child_keys(matches_ref.child('season_2022')), [])
+            self.assertEqual(count_children(matches_ref.child('season_2024/league_61/fixtures')), 2)
+            self.assertEqual(list(iter_league_keys(matches_ref)), [
+                ('season_2023', 'league_61'), ('season_2024', 'league_39'), ('season_2024', 'league_61')
+            ])
+            self.assertEqual(list(iter_league_keys(matches_ref, league_id=61)), [('season_2023', 'league_61'), ('season_2024', 'league_61')])
+            self.assertEqual(list(iter_league_keys(matches_ref, season=2024, league_id=39)), [('season_2024', 'league_39')])
+            # Énumérer et compter ne télécharge jamais le contenu des nœuds
+            self.assertTrue(firebase.reads)
+            self.assertTrue(all(shallow for _, shallow in firebase.reads))
+
+            # Suppression de plusieurs enfants en une seule écriture
+            season_ref = matches_ref.child('season_2024')
+            season_ref.update = mock.Mock(wraps=season_ref.update)
+            self.assertEqual(delete_children(season_ref, get_child_keys(season_ref)), 2)
+            self.assertEqual(delete_children(season_ref, []), 0)
+            self.assertEqual(season_ref.update.call_count, 1)
+        self.assertEqual(list(firebase.node(['matches'])), ['season_2023'])
+
+class FixtureManifestTest(TestCase):
+    def test_unchanged_fixtures_are_skipped(self):
+        from datetime import datetime, timezone
+        from loader.match_service import MatchService
+        firebase = FakeFirebase()
+        season, league_id = 2024, 61
+        kickoff = datetime(2024, 9, 1, 15, tzinfo=timezone.utc)
+
+        def match(home_goals):
+            return {
+                'fixture': {'id': 1, 'date': kickoff.isoformat(), 'timestamp': int(kickoff.timestamp()), 'status': {'short': 'FT'}},
+                'teams': {'home': {'id': 10}, 'away': {'id': 20}},
+                'goals': {'home': home_goals, 'away': 0},
+                'score': {'fulltime': {'home': home_goals, 'away': 0}}
+            }
+
+        with firebase.patch():
+            service = MatchService()
+            self.assertEqual(service.save_matches_batch([match(1)], season, league_id), 1)
+            since = datetime.now().isoformat()
+            # Même contenu, seul metadata.updated_at diffère : rien n'est écrit
+            self.assertEqual(service.save_matches_batch([match(1)], season, league_id), 0)
+            self.assertEqual(service.manifest.get_changes_since(season, league_id, since), [])
+            # Score modifié : le match est réécrit et apparaît dans le flux de changements
+            self.assertEqual(service.save_matches_batch([match(2)], season, league_id), 1)
+            self.assertEqual(service.manifest.get_changes_since(season, league_id, since), ['1'])
+            self.assertEqual(firebase.node(['matches', 'season_2024', 'league_61', 'fixtures', 'fixture_1', 'goals', 'home']), 2)
+            # Les cardinalités du planificateur ne comptent le match qu'à sa première écriture
+            self.assertEqual(firebase.node(['match_summaries_meta', 'statistics']), {
+                'leagues': {'season_2024': {'league_61': 1}},
+                'teams': {'team_10': 1, 'team_20': 1},
+                'h2h': {'10_20': 1},
+                'dates': {'2024-09-01': 1}
+            })
+
+            # Échec de l'écriture : l'erreur est propagée, pas confondue avec « rien n'a changé »
+            service.root_ref = mock.Mock(**{'update.side_effect': RuntimeError('écriture refusée')})
+            with self.assertRaises(RuntimeError):
+                service.save_matches_batch([match(3)], season, league_id)
+
+class SyncAllMatchesTest(TestCase):
+    def test_parallel_pairs_and_failure_isolation(self):
+        import threading
+        from collections import Counter
+        from loader.match_service import MatchService
+        firebase = FakeFirebase({'leagues': {
+            str(league_id): {'league': {'id': league_id}, 'country': {'name': 'Europe'}, 'seasons': [{'year': 2023}, {'year': 2024}]}
+            for league_id in (39, 61)
+        }})
+        requested = Counter()
+        lock = threading.Lock()
+
+        def get(endpoint, params):
+            league_id, season = int(params['league']), int(params['season'])
+            with lock:
+                requested[(league_id, season)] += 1
+            fixture = {'id': league_id * 10 + season - 2023, 'date': '2024-09-01T15:00:00+00:00', 'status': {'short': 'FT'}}
+            if (league_id, season) == (39, 2024):
+                del fixture['status']  # Réponse malformée : l'écriture de ce couple échoue
+            return {'errors': [], 'response': [{'fixture': fixture, 'teams': {'home': {'id': 1}, 'away': {'id': 2}}}]}
+
+        with firebase.patch(), self.settings(LEAGUES=[61, 39], SEASON_YEAR=[2023, 2024], RELATIONAL_MIRROR=False):
+            service = MatchService()
+            service.api_client = mock.Mock(**{'get.side_effect': get})
+            self.assertEqual(service.sync_all_matches(workers=4), 3)
+
+        # Chaque couple (ligue, saison) est synchronisé une fois, l'échec de l'un n'arrête pas les autres
+        self.assertEqual(requested, Counter({(61, 2023): 1, (61, 2024): 1, (39, 2023): 1, (39, 2024): 1}))
+        written = {
+            (season_key, league_key): list(league.get('fixtures', {}))
+            for season_key, leagues in firebase.node(['matches']).items()
+            for league_key, league in leagues.items()
+        }
+        self.assertEqual(written, {
+            ('season_2023', 'league_61'): ['fixture_610'],
+            ('season_2024', 'league_61'): ['fixture_611'],
+            ('season_2023', 'league_39'): ['fixture_390'],
+            ('season_2024', 'league_39'): [],
+        })
+
+class FixtureIndexTest(TestCase):
+    def test_team_and_status_updates(self):
+        from loader.constants import MatchStatus
+        from loader.indexes import FixtureIndex
+        with FakeFirebase().patch():
+            index = FixtureIndex()
+
+        updates = index.build_team_updates(7, {'home': {'id': 10}, 'away': {'id': 20}}, '2024', '61', 1714762800, 'FT')
+        self.assertEqual(updates, {
+            'index/team/team_10/fixture_7': {'season': 2024, 'league': 61, 'timestamp': 1714762800, 'location': 'home', 'status': 'FT'},
+            'index/team/team_20/fixture_7': {'season': 2024, 'league': 61, 'timestamp': 1714762800, 'location': 'away', 'status': 'FT'},
+        })
+        # Équipe inconnue : pas d'entrée
+        self.assertEqual(list(index.build_team_updates(7, {'home': {'id': 10}, 'away': {}}, 2024, 61, None, 'NS')), ['index/team/team_10/fixture_7'])
+
+        # Statut précédent inconnu : champs de base réécrits, entrée retirée de tous les autres statuts
+        updates = index.build_status_updates(7, 'FT', 2024, 61, 1714762800)
+        self.assertEqual(updates['index/status/FT/fixture_7/season'], 2024)
+        removed = {path.split('/')[2] for path, value in updates.items() if value is None}
+        self.assertEqual(removed, MatchStatus.ALL_STATUSES - {'FT'})
+        # Changement de statut connu : entrée recréée avec ses indicateurs, retirée de l'ancien statut seulement
+        updates = index.build_status_updates(7, 'FT', 2024, 61, 1714762800, '2H', {'has_events': True})
+        self.assertEqual(updates, {
+            'index/status/FT/fixture_7': {'season': 2024, 'league': 61, 'timestamp': 1714762800, 'has_events': True},
+            'index/status/2H/fixture_7': None,
+        })
+
+    def test_flag_updates_without_reads(self):
+        from types import SimpleNamespace
+        from loader.indexes import FixtureIndex
+        with FakeFirebase().patch():
+            index = FixtureIndex()
+        index.root_ref = SimpleNamespace()  # Toute lecture Firebase échouerait
+
+        # Statut lu dans l'index : indicateur écrit avec saison et ligue, jamais seul
+        self.assertEqual(index.build_flag_updates(7, 'FT', 'events', season='2024', league_id='61'), {
+            'index/status/FT/fixture_7/has_events': True,
+            'index/status/FT/fixture_7/season': 2024,
+            'index/status/FT/fixture_7/league': 61,
+        })
+        self.assertEqual(index.build_flag_updates(7, 'FT', 'events', False), {'index/status/FT/fixture_7/has_events': None})
+        self.assertEqual(index.build_flag_updates(7, None, 'events'), {})
+
+    def test_h2h_updates(self):
+        from loader.indexes import FixtureIndex
+        with FakeFirebase().patch():
+            index = FixtureIndex()
+
+        # La clé de la paire ne dépend pas de l'équipe qui reçoit
+        self.assertEqual(index.get_h2h_key(20, '10'), index.get_h2h_key(10, 20))
+        home = index.build_h2h_updates(7, {'home': {'id': 20}, 'away': {'id': 10}}, 2024, 61, '2024-05-03T19:00:00+00:00', 1714762800, 'FT')
+        away = index.build_h2h_updates(8, {'home': {'id': 10}, 'away': {'id': 20}}, 2024, 61, '2024-09-01T15:00:00+00:00', 1725202800, 'NS')
+        self.assertEqual(list(home), ['index/h2h/10_20/fixture_7'])
+        self.assertEqual(list(away), ['index/h2h/10_20/fixture_8'])
+        self.assertEqual(home['index/h2h/10_20/fixture_7']['home'], 20)
+        self.assertEqual(index.build_h2h_updates(9, {'home': {'id': 10}}, 2024, 61, None, None, 'TBD'), {})
+
+    def test_date_updates_and_range_read(self):
+        from loader.indexes import FixtureIndex
+        firebase = FakeFirebase({'index': {'date': {
+            '2024-08-31': {'fixture_1': {'season': 2024, 'league': 61, 'timestamp': None, 'status': 'FT'}},
+            '2024-09-01': {'fixture_2': {'season': 2024, 'league': 61, 'timestamp': None, 'status': 'FT'}},
+            '2024-09-30': {'fixture_3': {'season': 2024, 'league': 61, 'timestamp': None, 'status': 'FT'}},
+            '2024-10-01': {'fixture_4': {'season': 2024, 'league': 61, 'timestamp': None, 'status': 'NS'}},
+        }}})
+        with firebase.patch():
+            index = FixtureIndex()
+
+            # Match reprogrammé : retiré de l'ancien jour
+            updates = index.build_date_updates(7, 2024, 61, '2024-09-02T15:00:00+00:00', None, 'PST', '2024-09-01')
+            self.assertEqual(updates['index/date/2024-09-01/fixture_7'], None)
+            self.assertEqual(updates['index/date/2024-09-02/fixture_7']['status'], 'PST')
+
+            # La plage de clés est inclusive, lue en une requête
+            self.assertEqual(sorted(index.get_date_entries('2024-09-01', '2024-09-30')), ['2', '3'])
+            self.assertEqual(list(index.get_date_entries('2024-10-01')), ['4'])
+            self.assertEqual(firebase.reads, [('index/date', False), ('index/date', False)])
+
+class UnfinishedMatchesTest(TestCase):
+    def test_window_sweep_and_ids_batches(self):
+        import time
+        from types import SimpleNamespace
+        from loader.match_service import MatchService
+
+        now = int(time.time())
+        active = {str(fixture_id): {'season': 2024, 'league': 61, 'timestamp': now - 3600, 'status': 'NS'} for fixture_id in range(1, 26)}
+        active['30'] = {'season': 2024, 'league': 61, 'timestamp': now - 30 * 86400, 'status': 'PST'}  # Hors fenêtre
+        active['31'] = {'season': 2024, 'league': 61, 'timestamp': None, 'status': 'TBD'}
+        requests = []
+
+        def get(endpoint, params):
+            requests.append(params)
+            ids = params.get('ids', '').split('-') if 'ids' in params else []
+            return {'errors': [], 'response': [
+                {'fixture': {'id': int(fixture_id), 'status': {'short': 'FT' if fixture_id == '1' else active[fixture_id]['status']}},
+                 'league': {'id': 61, 'season': 2024}}
+                for fixture_id in ids
+            ]}
+
+        firebase = FakeFirebase({'index': {'status': {'NS': {'fixture_1': {'season': 2024, 'league': 61}}}}})
+        with firebase.patch():
+            service = MatchService()
+        service.api_client = SimpleNamespace(get=get, request_count=0)
+        service.leagues, service.seasons = [61], [2024]
+        service.get_active_fixtures = lambda: active
+        saved = []
+        service.save_matches_batch = lambda matches, season, league_id: saved.extend(matches) or 0
+        service.root_ref = firebase.reference()
+
+        # Fenêtre : les 25 matchs récents, par appels fixtures?ids= de 20 au plus
+        service.update_unfinished_matches()
+        self.assertIn('live', requests[0])
+        self.assertEqual([len(params['ids'].split('-')) for params in requests[1:]], [20, 5])
+        self.assertEqual(len(saved), 25)
+        # Le match 1, passé à FT, est retiré de l'index NS même sans réécriture de son contenu
+        self.assertIsNone(firebase.node(['index', 'status', 'NS']))
+
+        # Balayage : tous les matchs actifs, hors fenêtre compris
+        requests.clear()
+        service.update_unfinished_matches(sweep=True)
+        requested = [fixture_id for params in requests[1:] for fixture_id in params['ids'].split('-')]
+        self.assertEqual(sorted(requested, key=int), [str(fixture_id) for fixture_id in range(1, 26)] + ['30', '31'])
+
+class MatchSummariesTest(TestCase):
+    def test_encode_decode_roundtrip(self):
+        from loader.summaries import MatchSummaries
+        match = {
+            'metadata': {'fixture_id': 7, 'date': '2024-05-03T19:00:00+00:00', 'status': 'FT', 'timestamp': 1714762800},
+            'teams': {'home': {'id': 1, 'name': 'A'}, 'away': {'id': 2, 'name': 'B'}},
+            'score': {'fulltime': {'home': 2, 'away': 1}, 'halftime': {'home': 0, 'away': 1}}
+        }
+        summary = MatchSummaries.encode(match)
+        self.assertEqual(summary, [1714762800, MatchSummaries.STATUS_CODES.index('FT'), 1, 2, 2, 1, 0, 1])
+        decoded = MatchSummaries.decode('7', summary)
+        self.assertEqual(decoded['metadata']['date'], match['metadata']['date'])
+        self.assertEqual(decoded['score'], match['score'])
+        # Firebase tronque les None finaux d'un tableau
+        self.assertEqual(MatchSummaries.decode('7', summary[:4])['score']['halftime'], {'home': None, 'away': None})
+
+class FixtureDetailsServiceTest(TestCase):
+    def test_bulk_ids_split_into_detail_trees(self):
+        from loader.fixture_details_service import FixtureDetailsService
+        firebase = FakeFirebase()
+        team = {'id': 10, 'name': 'Home'}
+        player = {'id': 7, 'name': 'Player', 'number': 9, 'pos': 'F', 'grid': '4:1'}
+        requested = []
+
+        def fixture(fixture_id):
+            data = {
+                'fixture': {'id': fixture_id},
+                'events': [{
+                    'time': {'elapsed': 12}, 'team': team, 'player': player, 'assist': {},
+                    'type': 'Goal', 'detail': 'Normal Goal', 'comments': None
+                }],
+                'lineups': [], 'statistics': [], 'players': []
+            }
+            if fixture_id != 2:
+                # Le match 2 n'a que ses événements
+                data['lineups'] = [{'team': team, 'coach': {'id': 1}, 'formation': '4-3-3',
+                                    'startXI': [{'player': player}], 'substitutes': []}]
+                data['statistics'] = [{'team': team, 'statistics': [{'type': 'Ball Possession', 'value': '55%'}]}]
+                data['players'] = [{'team': team, 'players': [{'player': player, 'statistics': [{'goals': {'total': 1}}]}]}]
+            return data
+
+        def get_response(endpoint, params):
+            self.assertEqual(endpoint, 'fixtures')
+            fixture_ids = [int(fixture_id) for fixture_id in params['ids'].split('-')]
+            requested.append(fixture_ids)
+            # Le match 25 est absent de la réponse
+            return [fixture(fixture_id) for fixture_id in fixture_ids if fixture_id != 25]
+
+        matches = [{'fixture_id': fixture_id, 'season': '2024', 'league_id': '61', 'status': 'FT'} for fixture_id in range(1, 26)]
+        with firebase.patch():
+            service = FixtureDetailsService()
+            service.api_client = mock.Mock(**{'get_response.side_effect': get_response})
+            self.assertEqual(service.sync_matches(matches), 24)
+
+        # Requêtes groupées d'au plus 20 IDs
+        self.assertEqual(requested, [list(range(1, 21)), list(range(21, 26))])
+
+        def detail(kind, fixture_id):
+            return firebase.node(['fixture_details', kind, f'fixture_{fixture_id}'])
+
+        self.assertEqual(detail('events', 1)[0]['type'], 'Goal')
+        self.assertEqual(detail('lineups', 1)[0]['startXI'][0]['position'], 'F')
+        self.assertEqual(detail('statistics_global', 1)[0]['statistics'], {'Ball Possession': 55.0})
+        self.assertEqual(detail('players_stats', 1)[0]['players'][0]['statistics'], [{'goals': {'total': 1}}])
+        self.assertEqual(
+            [kind for kind in ('events', 'lineups', 'statistics_global', 'players_stats') if detail(kind, 2)], ['events']
+        )
+        self.assertFalse(any(detail(kind, 25) for kind in ('events', 'lineups', 'statistics_global', 'players_stats')))
+
+        # Indicateurs de l'index positionnés dans la même écriture
+        entry = firebase.node(['index', 'status', 'FT', 'fixture_1'])
+        self.assertEqual(entry, {
+            'season': 2024, 'league': 61,
+            'has_events': True, 'has_lineups': True, 'has_stats': True, 'has_players_stats': True
+        })
+        self.assertEqual(set(firebase.node(['index', 'status', 'FT', 'fixture_2'])), {'season', 'league', 'has_events'})
+        self.assertIn('events_updated_at', firebase.node(['matches', 'season_2024', 'league_61', 'fixtures', 'fixture_1']))
+
+class FixtureDetailStoreTest(TestCase):
+    def test_migration_and_round_trip(self):
+        from loader.details import FixtureDetailStore
+        from loader.events_service import EventService
+        event = {
+            'time': {'elapsed': 12}, 'team': {'id': 10}, 'player': {'id': 7}, 'assist': {'id': 8},
+            'type': 'Goal', 'detail': 'Normal Goal', 'comments': 'Penalty'
+        }
+        fixtures_path = ['matches', 'season_2024', 'league_61', 'fixtures']
+        firebase = FakeFirebase({'matches': {'season_2024': {'league_61': {'fixtures': {
+            # Ancien format : détails stockés dans le nœud du match
+            'fixture_1': {'metadata': {'status': 'FT'}, 'events': [event], 'lineups': [{'formation': '4-3-3'}]},
+            'fixture_2': {'metadata': {'status': 'FT'}},
+        }}}}})
+
+        with firebase.patch():
+            details = FixtureDetailStore()
+            self.assertEqual(details.migrate(dry_run=True), 1)
+            self.assertIn('events', firebase.node(fixtures_path + ['fixture_1']))
+            self.assertEqual(details.migrate(), 1)
+
+            # Les détails quittent le nœud du match, qui garde son résumé
+            self.assertEqual(firebase.node(fixtures_path + ['fixture_1']), {'metadata': {'status': 'FT'}})
+            self.assertEqual(details.get_detail('events', 1), [event])
+            self.assertEqual(details.get_detail('lineups', 1), [{'formation': '4-3-3'}])
+            self.assertIsNone(details.get_detail('events', 2))
+
+            # Écriture par le service, relecture, puis suppression
+            self.assertTrue(EventService().save_events(2, [event], 2024, 61, 'FT'))
+            self.assertEqual(details.get_detail('events', 2), [event])
+            firebase.reads.clear()
+            self.assertEqual(details.get_fixture_keys('events'), {'fixture_1', 'fixture_2'})
+            self.assertEqual(firebase.reads, [('fixture_details/events', True)])
+
+            details.root_ref.update(details.build_clear_updates([1, 2]))
+            self.assertIsNone(firebase.node(['fixture_details']))
+            self.assertIn('events_updated_at', firebase.node(fixtures_path + ['fixture_2']))
+
+class FixtureDetailPipelineTest(TestCase):
+    def test_window_batches_and_error_isolation(self):
+        import time
+        from types import SimpleNamespace
+        from loader.pipeline import FixtureDetailPipeline
+
+        started, started_during_write, writes, flushed = [], [], [], []
+
+        def fetch(fixture_id):
+            started.append(fixture_id)
+            if fixture_id == 4:
+                raise ValueError('réponse invalide')
+            return {'id': fixture_id}
+
+        def build_updates(fixture_id, data, *args):
+            if not started_during_write:
+                # Traitement lent : les workers ne récupèrent que la fenêtre déjà soumise
+                time.sleep(0.2)
+                started_during_write.append(len(started))
+            return {f'details/{fixture_id}': data}
+
+        with FakeFirebase().patch():
+            pipeline = FixtureDetailPipeline(fetch, build_updates, workers=2, batch_size=3, on_flush=flushed.append)
+        pipeline.root_ref = SimpleNamespace(update=lambda updates: writes.append(len(updates)))
+        matches = [{'fixture_id': fixture_id, 'season': 2024, 'league_id': 61} for fixture_id in range(1, 9)]
+
+        # L'échec du match 4 n'interrompt pas les autres : 7 matchs écrits par lots de 3
+        self.assertEqual(pipeline.run(matches), 7)
+        self.assertEqual(writes, [3, 3, 1])
+        self.assertEqual(sorted(sum(flushed, [])), [1, 2, 3, 5, 6, 7, 8])
+        # Pas plus de 2 × workers récupérations soumises pendant le traitement d'un résultat
+        self.assertLessEqual(started_during_write[0], 4)
+
+class SyncCheckpointTest(TestCase):
+    def test_resume_after_quota_exhaustion(self):
+        import tempfile
+        from types import SimpleNamespace
+        from loader.api_client import ApiError, ApiQuotaExceeded
+        from loader.checkpoint import FileCheckpointStore, SyncCheckpoint
+        from loader.pipeline import FixtureDetailPipeline
+
+        store = FileCheckpointStore(tempfile.mkdtemp())
+        api_client = SimpleNamespace(request_count=0)
+        matches = [{'fixture_id': fixture_id, 'season': 2024, 'league_id': 61} for fixture_id in range(1, 7)]
+        written = []
+
+        def run(fetch, find_matches):
+            checkpoint = SyncCheckpoint('test', store=store, api_client=api_client)
+            with FakeFirebase().patch():
+                pipeline = FixtureDetailPipeline(
+                    fetch, lambda fixture_id, data, *args: {f'details/{fixture_id}': data},
+                    workers=1, batch_size=1, on_flush=checkpoint.mark_done
+                )
+            pipeline.root_ref = SimpleNamespace(update=lambda updates: written.extend(updates))
+            pipeline.run(checkpoint.get_matches(find_matches))
+            return checkpoint.finish()
+
+        def interrupted_fetch(fixture_id):
+            fixture_id = int(fixture_id)  # Les IDs du plan sont des chaînes
+            if fixture_id == 2:
+                return None  # Réponse valide, sans données
+            if fixture_id == 3:
+                raise ApiError('erreur réseau')
+            if fixture_id >= 4:
+                raise ApiQuotaExceeded('quota quotidien')
+            return {'id': fixture_id}
+
+        self.assertFalse(run(interrupted_fetch, lambda: matches))
+        # Seuls les matchs sauvegardés ou sans données sont terminés ; le point de reprise est conservé
+        self.assertEqual(store.get_done('test'), {'1', '2'})
+        self.assertEqual(written, ['details/1'])
+
+        def find_matches():
+            raise AssertionError("Le plan existant doit être repris sans rebalayer Firebase")
+
+        self.assertTrue(run(lambda fixture_id: {'id': fixture_id}, find_matches))
+        self.assertEqual(sorted(written), ['details/1', 'details/3', 'details/4', 'details/5', 'details/6'])
+        self.assertIsNone(store.load_plan('test'))
@@ -59,10 +59,15 @@ TEMPLATES = [
 WSGI_APPLICATION = "lonewolcast.wsgi.application"
 
 # Database
+# SQLite en local ; Postgres en production (DB_ENGINE=django.db.backends.postgresql)
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        "ENGINE": config('DB_ENGINE', default="django.db.backends.sqlite3"),
+        "NAME": config('DB_NAME', default=str(BASE_DIR / "db.sqlite3")),
+        "USER": config('DB_USER', default=''),
+        "PASSWORD": config('DB_PASSWORD', default=''),
+        "HOST": config('DB_HOST', default=''),
+        "PORT": config('DB_PORT', default=''),
     }
 }
 
@@ -103,6 +108,29 @@ LEAGUES = config('LEAGUES', cast=lambda v: [int(x) for x in v.split(',')])
 SEASON_YEAR = config('SEASON_YEAR', cast=lambda v: [int(x) for x in v.split(',')])
 API_SPORTS_KEY = config('API_SPORTS_KEY')
 API_SPORTS_BASE_URL = config('API_SPORTS_BASE_URL', default='https://v3.football.api-sports.io')
+API_SPORTS_RATE_LIMIT = config('API_SPORTS_RATE_LIMIT', default=450, cast=int)  # Requêtes max par minute
+API_SPORTS_BURST = config('API_SPORTS_BURST', default=10, cast=int)  # Rafale max du seau de jetons
+API_SPORTS_POOL_SIZE = config('API_SPORTS_POOL_SIZE', default=10, cast=int)  # Connexions keep-alive
+API_SPORTS_RATE_LIMITER = config('API_SPORTS_RATE_LIMITER', default='redis')  # 'redis' (partagé) ou 'local'
+API_SPORTS_CACHE = config('API_SPORTS_CACHE', default='on')  # 'on', 'off' ou 'replay' (cache seul, sans quota)
+API_SPORTS_CACHE_PATH = config('API_SPORTS_CACHE_PATH', default=str(BASE_DIR / 'api_cache.sqlite3'))
+
+# Points de reprise des synchronisations longues
+SYNC_CHECKPOINT_BACKEND = config('SYNC_CHECKPOINT_BACKEND', default='file')  # 'file' (local) ou 'redis' (partagé)
+SYNC_CHECKPOINT_DIR = config('SYNC_CHECKPOINT_DIR', default=str(BASE_DIR / 'checkpoints'))
+
+# Instantané local (colonnes NumPy) des résumés de matchs, lu par les métriques
+METRICS_SNAPSHOT_DIR = config('METRICS_SNAPSHOT_DIR', default=str(BASE_DIR / 'snapshots'))
+METRICS_SNAPSHOT_MAX_AGE = config('METRICS_SNAPSHOT_MAX_AGE', default=3600, cast=int)  # Secondes ; 0 = instantané ignoré
+
+# Réplica en mémoire de match_summaries, tenu à jour par un listener Firebase (processus API)
+METRICS_REPLICA = config('METRICS_REPLICA', default=False, cast=bool)
+METRICS_REPLICA_WAIT = config('METRICS_REPLICA_WAIT', default=30, cast=int)  # Secondes d'attente du chargement initial
+METRICS_REPLICA_MAX_IDLE = config('METRICS_REPLICA_MAX_IDLE', default=3600, cast=int)  # Secondes sans événement avant repli ; 0 = sans limite
+
+# Miroir relationnel des matchs (loader.models) et moteur de calcul des métriques
+RELATIONAL_MIRROR = config('RELATIONAL_MIRROR', default=False, cast=bool)  # Upsert des matchs écrits dans Firebase
+METRICS_BACKEND = config('METRICS_BACKEND', default='firebase')  # 'firebase' (arbres JSON) ou 'orm' (agrégats SQL)
 
 # Firebase Configuration
 FIREBASE_CREDENTIALS_PATH = config('FIREBASE_CREDENTIALS_PATH', default=str(BASE_DIR / "serviceAccountKey.json"))
@@ -144,6 +172,6 @@ LOGGING = {
 }
 
 # Settings pour Redis
-REDIS_HOST = 'localhost'
-REDIS_PORT = 6379
-REDIS_DB = 0
\ No newline at end of file
+REDIS_HOST = config('REDIS_HOST', default='localhost')
+REDIS_PORT = config('REDIS_PORT', default=6379, cast=int)
+REDIS_DB = config('REDIS_DB', default=0, cast=int)
\ No newline at end of file
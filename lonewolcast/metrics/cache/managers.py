@@ -5,6 +5,7 @@ import hashlib
 import logging
 from django.conf import settings
 from datetime import timedelta
+from metrics.services.replica import MatchReplica
 
 logger = logging.getLogger(__name__)
 
@@ -27,6 +28,10 @@ class MetricsCacheManager:
         """Génère une clé de cache unique basée sur l'endpoint et les paramètres."""
         # Trier les paramètres pour assurer la cohérence des clés
         sorted_params = dict(sorted(params.items()))
+        # Avec le réplica, la version du jeu de données invalide les résultats dès qu'il change
+        dataset_version = MatchReplica.get_dataset_version()
+        if dataset_version is not None:
+            sorted_params['_dataset_version'] = dataset_version
         # Créer une chaîne représentant les paramètres
         params_str = json.dumps(sorted_params, sort_keys=True)
         # Générer un hash unique
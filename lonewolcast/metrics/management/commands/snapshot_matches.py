@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from metrics.services.snapshot import MatchSnapshot
+import time
+
+class Command(BaseCommand):
+    help = """
+    Exporte la projection match_summaries vers un instantané local en colonnes (NumPy),
+    lu par les métriques sans accès réseau tant qu'il a moins de METRICS_SNAPSHOT_MAX_AGE secondes.
+
+    Commandes disponibles:
+        (sans option)  : Construit l'instantané une fois
+        --interval N   : Reconstruit l'instantané toutes les N secondes (rafraîchissement en tâche de fond)
+
+    Exemples:
+        python manage.py snapshot_matches
+        python manage.py snapshot_matches --interval 300
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=0,
+            help='Secondes entre deux reconstructions (0 = une seule fois)'
+        )
+
+    def handle(self, *args, **options):
+        interval = options['interval']
+
+        while True:
+            try:
+                start_time = time.time()
+                metadata = MatchSnapshot.build()
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ Instantané {metadata['version']} : {metadata['count']} match(s) "
+                    f"en {time.time() - start_time:.1f}s"
+                ))
+            except Exception as e:
+                if not interval:
+                    raise CommandError(str(e))
+                self.stderr.write(self.style.ERROR(f'Erreur: {str(e)}'))
+
+            if not interval:
+                break
+            time.sleep(interval)
@@ -0,0 +1,192 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime, timezone
+from loader.summaries import MatchSummaries
+from .records import MatchRecord
+from .snapshot import MatchSnapshot
+from .summaries import MatchSnapshotReference
+import threading
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class ColumnarMatchStore:
+    """
+    Résumés de matchs en colonnes NumPy contiguës, construits depuis l'instantané local
+    (MatchSnapshot) : chaque filtre s'y évalue en un masque vectorisé (BaseFilter.mask),
+    combinés par &, et les métriques sont agrégées directement sur les colonnes retenues.
+
+    Mêmes méthodes d'agrégation que FixtureQueryBackend, appliquées à un tableau d'indices
+    (voir CompositeFilter.filter_store) au lieu d'un QuerySet.
+
+    Jour, heure, année et mois sont dérivés du coup d'envoi en UTC, comme les dates ISO de
+    la projection ; les valeurs absentes sont codées -1 (MatchSnapshot.MISSING).
+    """
+
+    MISSING = MatchSnapshot.MISSING
+    FINISHED_STATUSES = {'FT', 'AET', 'PEN'}
+    COLUMNS = (
+        'fixture_id', 'season', 'league', 'kickoff', 'status', 'home_id', 'away_id',
+        'ft_home', 'ft_away', 'ht_home', 'ht_away', 'weekday', 'seconds', 'year', 'month', 'finished'
+    )
+
+    _snapshot_store: Optional['ColumnarMatchStore'] = None
+    _cache_lock = threading.Lock()
+
+    def __init__(self, data: np.ndarray, version: Optional[str] = None):
+        self.version = version
+        self._team_index = None
+        self.fixture_id = np.ascontiguousarray(data['fixture_id'], dtype=np.int64)
+        self.season = np.ascontiguousarray(data['season'], dtype=np.int32)
+        self.league = np.ascontiguousarray(data['league'], dtype=np.int32)
+        self.kickoff = np.ascontiguousarray(data['timestamp'], dtype=np.int64)
+        self.status = np.ascontiguousarray(data['status'], dtype=np.int16)
+        self.home_id = np.ascontiguousarray(data['home_id'], dtype=np.int32)
+        self.away_id = np.ascontiguousarray(data['away_id'], dtype=np.int32)
+        self.ft_home = np.ascontiguousarray(data['ft_home'], dtype=np.int32)
+        self.ft_away = np.ascontiguousarray(data['ft_away'], dtype=np.int32)
+        self.ht_home = np.ascontiguousarray(data['ht_home'], dtype=np.int32)
+        self.ht_away = np.ascontiguousarray(data['ht_away'], dtype=np.int32)
+
+        dated = self.kickoff != self.MISSING
+        days = self.kickoff // 86400
+        months = self.kickoff.astype('datetime64[s]').astype('datetime64[M]').astype(np.int64)
+        # 1970-01-01 est un jeudi (lundi = 0)
+        self.weekday = np.where(dated, (days + 3) % 7, self.MISSING).astype(np.int8)
+        self.seconds = np.where(dated, self.kickoff - days * 86400, self.MISSING).astype(np.int32)
+        self.year = np.where(dated, months // 12 + 1970, self.MISSING).astype(np.int16)
+        self.month = np.where(dated, months % 12 + 1, self.MISSING).astype(np.int8)
+
+        finished_codes = [MatchSummaries.STATUS_CODES.index(status) for status in self.FINISHED_STATUSES]
+        self.finished = (
+            np.isin(self.status, finished_codes)
+            & (self.ft_home != self.MISSING) & (self.ft_away != self.MISSING)
+        )
+
+    def __len__(self) -> int:
+        return len(self.fixture_id)
+
+    @classmethod
+    def for_snapshot(cls, snapshot: MatchSnapshot) -> 'ColumnarMatchStore':
+        """Retourne les colonnes de l'instantané, construites une fois par version."""
+        version = snapshot.metadata.get('version')
+        with cls._cache_lock:
+            store = cls._snapshot_store
+            if store is None or store.version != version:
+                store = cls(snapshot.data, version)
+                cls._snapshot_store = store
+                logger.info(f"Colonnes des matchs construites : {len(store)} matchs (version {version})")
+            return store
+
+    @classmethod
+    def for_reference(cls, matches_ref) -> Optional['ColumnarMatchStore']:
+        """Colonnes de la source de lecture des métriques, None si elle n'est pas l'instantané."""
+        if isinstance(matches_ref, MatchSnapshotReference):
+            return cls.for_snapshot(matches_ref.snapshot)
+        return None
+
+    def base_mask(self, season: Optional[int] = None, league_id: Optional[int] = None) -> np.ndarray:
+        """Matchs terminés (avec score), restreints au chemin season/league."""
+        mask = self.finished.copy()
+        if season is not None:
+            mask &= self.season == season
+        if league_id is not None:
+            mask &= self.league == league_id
+        return mask
+
+    def take(self, rows: np.ndarray) -> 'ColumnarMatchStore':
+        """Colonnes restreintes aux lignes rows, pour évaluer les masques d'un lot de lignes."""
+        subset = object.__new__(type(self))
+        subset.version = self.version
+        subset._team_index = None
+        for column in self.COLUMNS:
+            setattr(subset, column, getattr(self, column)[rows])
+        return subset
+
+    def team_rows(self, team_id: int) -> np.ndarray:
+        """
+        Lignes datées des matchs d'une équipe (domicile et extérieur), triées par coup d'envoi
+        puis par ligne. L'index de toutes les équipes est construit au premier appel.
+        """
+        if self._team_index is None:
+            self._team_index = self._build_team_index()
+        teams, bounds, rows = self._team_index
+        position = np.searchsorted(teams, team_id)
+        if position == len(teams) or teams[position] != team_id:
+            return np.empty(0, dtype=rows.dtype)
+        return rows[bounds[position]:bounds[position + 1]]
+
+    def _build_team_index(self):
+        dated = np.flatnonzero(self.kickoff != self.MISSING)
+        away = dated[self.away_id[dated] != self.home_id[dated]]
+        rows = np.concatenate([dated, away])
+        teams = np.concatenate([self.home_id[dated], self.away_id[away]])
+        order = np.lexsort((rows, self.kickoff[rows], teams))
+        rows, teams = rows[order], teams[order]
+        keys, starts = np.unique(teams, return_index=True)
+        return keys, np.append(starts, len(rows)), rows
+
+    def records(self, indices: np.ndarray) -> List[MatchRecord]:
+        """Convertit les lignes retenues en MatchRecord (petits ensembles : H2H, derniers matchs)."""
+        columns = (self.kickoff, self.status, self.home_id, self.away_id,
+                   self.ft_home, self.ft_away, self.ht_home, self.ht_away)
+        rows = zip(self.fixture_id[indices].tolist(), *(column[indices].tolist() for column in columns))
+        return [
+            MatchRecord.from_summary(fixture_id, [None if value == self.MISSING else value for value in values])
+            for fixture_id, *values in rows
+        ]
+
+    def get_period(self, indices: np.ndarray) -> Dict[str, Any]:
+        """Nombre de matchs et bornes du coup d'envoi."""
+        kickoff = self.kickoff[indices]
+        kickoff = kickoff[kickoff != self.MISSING]
+        if not len(kickoff):
+            return {'matches': len(indices), 'start': None, 'end': None}
+        return {
+            'matches': len(indices),
+            'start': datetime.fromtimestamp(int(kickoff.min()), tz=timezone.utc),
+            'end': datetime.fromtimestamp(int(kickoff.max()), tz=timezone.utc)
+        }
+
+    def get_league_stats(self, indices: np.ndarray) -> Dict[str, int]:
+        """Résultats et buts d'un ensemble de matchs."""
+        home = self.ft_home[indices]
+        away = self.ft_away[indices]
+        return {
+            'matches': len(indices),
+            'home_wins': int(np.count_nonzero(home > away)),
+            'away_wins': int(np.count_nonzero(home < away)),
+            'draws': int(np.count_nonzero(home == away)),
+            'goals': int(home.sum() + away.sum()),
+            'btts': int(np.count_nonzero((home > 0) & (away > 0))),
+            'clean_sheets': int(np.count_nonzero((home == 0) | (away == 0)))
+        }
+
+    def get_team_stats(self, indices: np.ndarray, team_id: int, side: Optional[str] = None) -> Dict[str, int]:
+        """Statistiques d'une équipe (toutes positions, ou side='home'/'away')."""
+        if side == 'home':
+            indices = indices[self.home_id[indices] == team_id]
+        elif side == 'away':
+            indices = indices[self.away_id[indices] == team_id]
+
+        is_home = self.home_id[indices] == team_id
+        home = self.ft_home[indices]
+        away = self.ft_away[indices]
+        goals_for = np.where(is_home, home, away)
+        goals_against = np.where(is_home, away, home)
+        return {
+            'matches': len(indices),
+            'wins': int(np.count_nonzero(goals_for > goals_against)),
+            'draws': int(np.count_nonzero(goals_for == goals_against)),
+            'losses': int(np.count_nonzero(goals_for < goals_against)),
+            'goals_for': int(goals_for.sum()),
+            'goals_against': int(goals_against.sum()),
+            'clean_sheets': int(np.count_nonzero(goals_against == 0)),
+            'failed_to_score': int(np.count_nonzero(goals_for == 0)),
+            'btts': int(np.count_nonzero((goals_for > 0) & (goals_against > 0)))
+        }
+
+    def get_threshold_counts(self, indices: np.ndarray, thresholds: List[float]) -> Dict[float, int]:
+        """Nombre de matchs au-dessus de chaque seuil de buts."""
+        total_goals = self.ft_home[indices] + self.ft_away[indices]
+        return {threshold: int(np.count_nonzero(total_goals > threshold)) for threshold in thresholds}
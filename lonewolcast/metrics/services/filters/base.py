@@ -1,33 +1,139 @@
-from abc import ABC, abstractmethod
-from typing import List, Dict
+from abc import ABC
+from typing import List, Dict, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from itertools import takewhile
 from firebase_admin import db
-from datetime import datetime
+from loader.firebase_utils import get_child_keys
+from ..records import MatchRecord
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
 class BaseFilter(ABC):
-    """Classe de base abstraite pour tous les filtres."""
+    """
+    Classe de base abstraite pour tous les filtres.
+
+    Un filtre se décrit par :
+    - matches(match) : prédicat pur évalué sur un match décodé (MatchRecord) ;
+    - get_path_hint() : contraintes sur le chemin season_{s}/league_{l} des matchs ;
+    - get_index_entries() : matchs candidats lus dans un index (None sans index utilisable) ;
+    - select(matches) : sélection sur l'ensemble des matchs retenus (séquences) ;
+    - get_recency_limit() : borne (N, derniers ?) de cette sélection, qui permet de parcourir
+      les candidats par coup d'envoi et de s'arrêter aux N premiers retenus ;
+    - mask(store) / select_indices(store, indices) : mêmes prédicat et sélection, vectorisés
+      sur les colonnes d'un ColumnarMatchStore ; get_sorted_rows(store) : lignes candidates
+      triées par coup d'envoi ;
+    - estimate_index_rows() / estimate_selectivity() : estimations du planificateur.
+
+    CompositeFilter combine ces éléments pour ne récupérer les matchs qu'une fois.
+    """
     
     FINISHED_STATUSES = {'FT', 'AET', 'PEN'}  # Statuts des matchs terminés
-    
-    @abstractmethod
-    def apply(self, matches_ref: db.Reference) -> List[Dict]:
+    FETCH_WORKERS = 8  # Lectures Firebase simultanées des matchs indexés
+    MAX_INDEXED_FETCHES = 200  # Sans plan, au-delà : matchs indexés lus par nœud de ligue
+    INDEX = None  # Nom du chemin d'accès par index (voir QueryPlanner)
+
+    def matches(self, match: MatchRecord) -> bool:
+        """Indique si un match satisfait le filtre."""
+        return True
+
+    def get_path_hint(self) -> Dict[str, int]:
+        """Contraintes de chemin : {'season': s} et/ou {'league': l}."""
+        return {}
+
+    def get_index_entries(self) -> Optional[Dict[str, Dict]]:
+        """
+        Entrées d'index {fixture_id: {season, league, status, ...}} couvrant tous les matchs
+        que le filtre peut retenir ; None si aucun index n'est utilisable.
+        """
+        return None
+
+    def select(self, matches: List[MatchRecord]) -> List[MatchRecord]:
+        """Sélectionne parmi les matchs retenus par les prédicats (par défaut, tous)."""
+        return matches
+
+    def get_recency_limit(self) -> Optional[Tuple[int, bool]]:
+        """(N, True) pour les N derniers matchs, (N, False) pour les N premiers ; None sans séquence."""
+        return None
+
+    def mask(self, store) -> Optional[np.ndarray]:
+        """Prédicat vectorisé sur les colonnes du store ; None si le filtre n'écarte aucun match."""
+        return None
+
+    def get_sorted_rows(self, store) -> Optional[np.ndarray]:
+        """
+        Lignes du store pouvant satisfaire le filtre, triées par coup d'envoi (voir
+        ColumnarMatchStore.team_rows) ; None si le filtre n'en désigne pas.
+        """
+        return None
+
+    def select_indices(self, store, indices: np.ndarray) -> np.ndarray:
+        """Équivalent de select sur les indices des lignes retenues du store."""
+        return indices
+
+    def estimate_index_rows(self, statistics) -> Optional[int]:
+        """Nombre de candidats que fournirait l'index du filtre ; None sans index utilisable."""
+        return None
+
+    def estimate_selectivity(self, statistics, total: int) -> float:
+        """Part estimée des matchs retenus par le prédicat (1.0 : aucun match écarté)."""
+        return 1.0
+
+    def describe_plan(self) -> Optional[Dict]:
+        """Plan d'exécution retenu (voir QueryPlanner), exposé dans les métadonnées."""
+        return None
+
+    def apply(self, matches_ref: db.Reference) -> List[MatchRecord]:
         """
         Applique le filtre sur une référence Firebase.
         Args:
             matches_ref: Référence Firebase vers le nœud 'matches'.
         Returns:
-            Liste des matchs filtrés.
+            Liste des matchs terminés filtrés, décodés en MatchRecord.
         """
-        pass
+        return CompositeFilter([self]).apply(matches_ref)
+
+    def filter_store(self, store) -> np.ndarray:
+        """Indices des matchs terminés du store retenus par le filtre."""
+        return CompositeFilter([self]).filter_store(store)
 
-    def filter_finished_matches(self, matches: List[Dict]) -> List[Dict]:
+    def filter_finished_matches(self, matches: List[MatchRecord]) -> List[MatchRecord]:
         """Filtre pour ne garder que les matchs terminés."""
-        return [
-            match for match in matches
-            if match.get('metadata', {}).get('status') in self.FINISHED_STATUSES
-        ]
+        return [match for match in matches if match.status in self.FINISHED_STATUSES]
+
+    def fetch_indexed_matches(self, matches_ref: db.Reference,
+                              entries: List[Tuple[str, Dict]]) -> List[Union[MatchRecord, Dict]]:
+        """
+        Récupère les matchs désignés par des entrées d'index (fixture_id, {season, league, ...}),
+        par lectures ciblées et simultanées : MatchRecord sur les sources match_summaries,
+        nœuds de match sur l'arbre 'matches' (voir MatchRecord.build).
+        """
+        def fetch(item):
+            fixture_id, entry = item
+            path = f"season_{entry['season']}/league_{entry['league']}/fixtures/fixture_{fixture_id}"
+            return matches_ref.child(path).get(etag=False)
+
+        with ThreadPoolExecutor(max_workers=self.FETCH_WORKERS) as executor:
+            return [match for match in executor.map(fetch, entries) if match]
+
+    def fetch_indexed_leagues(self, matches_ref: db.Reference,
+                              entries: List[Tuple[str, Dict]]) -> List[Union[MatchRecord, Dict]]:
+        """
+        Même résultat que fetch_indexed_matches, en une lecture par nœud de ligue désigné par
+        les entrées (season_{s}/league_{l}/fixtures) au lieu d'une lecture par match.
+        """
+        leagues: Dict[Tuple, List[str]] = {}
+        for fixture_id, entry in entries:
+            leagues.setdefault((entry['season'], entry['league']), []).append(f'fixture_{fixture_id}')
+
+        def fetch(item):
+            (season, league), fixture_keys = item
+            fixtures = matches_ref.child(f'season_{season}/league_{league}/fixtures').get(etag=False) or {}
+            return [fixtures.get(fixture_key) for fixture_key in fixture_keys]
+
+        with ThreadPoolExecutor(max_workers=self.FETCH_WORKERS) as executor:
+            return [match for matches in executor.map(fetch, leagues.items()) for match in matches if match]
 
     def __and__(self, other: 'BaseFilter') -> 'CompositeFilter':
         """Permet la composition de filtres avec l'opérateur &."""
@@ -35,57 +141,178 @@ class BaseFilter(ABC):
 
 class NoFilter(BaseFilter):
     """Filtre qui retourne tous les matchs terminés sans autre filtrage."""
-    
-    def apply(self, matches_ref: db.Reference) -> List[Dict]:
-        matches = []
-        try:
-            seasons_data = matches_ref.get(etag=False)
-            if not seasons_data:
-                return matches
-
-            for season_data in seasons_data.values():
-                for league_data in season_data.values():
-                    if isinstance(league_data, dict) and 'fixtures' in league_data:
-                        matches.extend(league_data['fixtures'].values())
-
-            return self.filter_finished_matches(matches)
-        except Exception as e:
-            logger.error(f"Erreur lors de la récupération des matchs: {e}")
-            return matches
 
 class CompositeFilter(BaseFilter):
-    """Permet de combiner plusieurs filtres."""
+    """
+    Combine plusieurs filtres en une seule récupération des matchs : le chemin d'accès du
+    plan (voir QueryPlanner) ou, sans plan, les candidats des index (intersection) ou les
+    seuls nœuds de saison/ligue désignés par les contraintes de chemin (toujours ces nœuds sur
+    une source en mémoire) ; tous les prédicats restants sont ensuite évalués en une passe.
+    """
     
-    def __init__(self, filters: List[BaseFilter]):
+    def __init__(self, filters: List[BaseFilter], plan=None):
         self.filters = filters
+        self.plan = plan
 
-    def apply(self, matches_ref: db.Reference) -> List[Dict]:
-        matches = []
-        try:
-            season_filter = next((f for f in self.filters if f.__class__.__name__ == 'SeasonFilter'), None)
-            league_filter = next((f for f in self.filters if f.__class__.__name__ == 'LeagueFilter'), None)
-            other_filters = [f for f in self.filters if f not in (season_filter, league_filter)]
+    def matches(self, match: MatchRecord) -> bool:
+        return all(filter_instance.matches(match) for filter_instance in self.filters)
+
+    def get_path_hint(self) -> Optional[Dict[str, int]]:
+        """Contraintes de chemin combinées ; None si elles sont contradictoires."""
+        hint: Dict[str, int] = {}
+        for filter_instance in self.filters:
+            filter_hint = filter_instance.get_path_hint()
+            if filter_hint is None:
+                return None
+            for key, value in filter_hint.items():
+                if hint.get(key, value) != value:
+                    return None
+                hint[key] = value
+        return hint
+
+    def get_index_entries(self) -> Optional[Dict[str, Dict]]:
+        """Intersection des candidats des filtres indexés ; None si aucun filtre n'est indexé."""
+        entries = None
+        for filter_instance in self.filters:
+            filter_entries = filter_instance.get_index_entries()
+            if filter_entries is None:
+                continue
+            if entries is None:
+                entries = filter_entries
+            else:
+                entries = {fixture_id: entry for fixture_id, entry in entries.items() if fixture_id in filter_entries}
+        return entries
+
+    def select(self, matches: List[MatchRecord]) -> List[MatchRecord]:
+        for filter_instance in self.filters:
+            matches = filter_instance.select(matches)
+        return matches
+
+    def get_recency_limit(self) -> Optional[Tuple[int, bool]]:
+        """Borne de l'unique sélection de séquence ; None s'il n'y en a pas (ou plusieurs)."""
+        limits = [limit for limit in (f.get_recency_limit() for f in self.filters) if limit is not None]
+        return limits[0] if len(limits) == 1 else None
+
+    def get_sorted_rows(self, store) -> Optional[np.ndarray]:
+        """Lignes triées la plus courte parmi celles des filtres."""
+        candidates = [rows for rows in (f.get_sorted_rows(store) for f in self.filters) if rows is not None]
+        return min(candidates, key=len) if candidates else None
+
+    def mask(self, store) -> Optional[np.ndarray]:
+        mask = None
+        for filter_instance in self.filters:
+            filter_mask = filter_instance.mask(store)
+            if filter_mask is not None:
+                mask = filter_mask if mask is None else mask & filter_mask
+        return mask
+
+    def select_indices(self, store, indices: np.ndarray) -> np.ndarray:
+        for filter_instance in self.filters:
+            indices = filter_instance.select_indices(store, indices)
+        return indices
+
+    def filter_store(self, store) -> np.ndarray:
+        """
+        Combine le chemin et les masques des filtres par &, puis applique les sélections.
+        Pour les N derniers (ou premiers) matchs d'une équipe, seules les lignes de l'équipe
+        sont évaluées, par lots dans l'ordre des coups d'envoi, jusqu'à en retenir N.
+        """
+        path_hint = self.get_path_hint()
+        if path_hint is None:
+            return np.empty(0, dtype=np.intp)
+
+        limit = self.get_recency_limit()
+        sorted_rows = self.get_sorted_rows(store) if limit is not None else None
+        if sorted_rows is not None:
+            indices = self._scan_sorted_rows(store, sorted_rows, path_hint, *limit)
+        else:
+            indices = np.flatnonzero(self._store_mask(store, path_hint))
+        return self.select_indices(store, indices)
 
-            seasons_data = matches_ref.get(etag=False) or {}
+    def _store_mask(self, store, path_hint: Dict[str, int]) -> np.ndarray:
+        mask = store.base_mask(path_hint.get('season'), path_hint.get('league'))
+        filter_mask = self.mask(store)
+        if filter_mask is not None:
+            mask &= filter_mask
+        return mask
 
-            for season_id, season_data in seasons_data.items():
-                if season_filter:
-                    season_num = int(season_id.split('_')[1])
-                    if season_num != season_filter.season:
-                        continue
+    def _scan_sorted_rows(self, store, rows: np.ndarray, path_hint: Dict[str, int],
+                          count: int, latest: bool) -> np.ndarray:
+        """
+        Curseur de récence sur des lignes triées par coup d'envoi : lots de taille croissante,
+        évalués sur leurs seules lignes (store.take), jusqu'à count lignes retenues. Les lignes
+        sont rendues dans l'ordre du store, comme np.flatnonzero.
+        """
+        if latest:
+            rows = rows[::-1]
+        selected = []
+        found = 0
+        position = 0
+        batch_size = max(count, 1)
+        while position < len(rows) and found < count:
+            batch = rows[position:position + batch_size]
+            position += len(batch)
+            batch_size *= 2
+            batch = batch[self._store_mask(store.take(batch), path_hint)]
+            selected.append(batch)
+            found += len(batch)
+        logger.debug(f"Curseur de récence : {position}/{len(rows)} lignes évaluées")
+        return np.sort(np.concatenate(selected)) if selected else np.empty(0, dtype=np.intp)
+
+    def describe_plan(self) -> Optional[Dict]:
+        return self.plan.to_dict() if self.plan is not None else None
+
+    def apply(self, matches_ref: db.Reference) -> List[MatchRecord]:
+        try:
+            path_hint = self.get_path_hint()
+            if path_hint is None:
+                logger.info("Contraintes de saison/ligue contradictoires : aucun match")
+                return []
 
-                for league_key, league_data in season_data.items():
-                    if league_filter:
-                        if league_key != f'league_{league_filter.league_id}':
-                            continue
+            if getattr(matches_ref, 'LOCAL', False):
+                # Source en mémoire (réplica, instantané) : parcours du chemin, sans index Firebase
+                entries = None
+                predicates = self.filters
+            elif self.plan is None:
+                entries = self.get_index_entries()
+                predicates = self.filters
+            elif self.plan.index_filters:
+                entries = CompositeFilter(self.plan.index_filters).get_index_entries()
+                predicates = self.plan.residual
+            else:
+                entries = None
+                predicates = self.plan.residual
 
-                    if 'fixtures' in league_data:
-                        matches.extend(league_data['fixtures'].values())
+            if entries is not None:
+                candidates = [
+                    (fixture_id, entry) for fixture_id, entry in entries.items()
+                    if entry.get('status') in self.FINISHED_STATUSES and self._in_path(entry, path_hint)
+                ]
+                limit = self.get_recency_limit()
+                if limit is not None and all(entry.get('timestamp') is not None for _, entry in candidates):
+                    matches = self._fetch_recent(matches_ref, candidates, predicates, *limit)
+                elif self.plan is None and len(candidates) > self.MAX_INDEXED_FETCHES:
+                    # Sans estimation du planificateur, pas de lectures individuelles en nombre
+                    matches = self.fetch_indexed_leagues(matches_ref, candidates)
+                else:
+                    matches = self.fetch_indexed_matches(matches_ref, candidates)
+                logger.debug(f"{len(matches)}/{len(entries)} matchs indexés récupérés")
+            else:
+                if self.plan is not None and self.plan.index_filters:
+                    # Index devenu vide depuis l'estimation : les prédicats des filtres indexés sont réévalués
+                    predicates = self.filters
+                matches = self._scan(matches_ref, path_hint)
 
-            matches = self.filter_finished_matches(matches)
+            if self.plan is not None:
+                self.plan.fetched_rows = len(matches)
 
-            for filter_instance in other_filters:
-                matches = [m for m in matches if self._match_passes_filter(m, filter_instance)]
+            # Chaque match récupéré est décodé une fois, puis évalué sur ses champs à plat
+            records = [MatchRecord.build(match) for match in matches if match]
+            matches = [
+                match for match in self.filter_finished_matches(records)
+                if all(filter_instance.matches(match) for filter_instance in predicates)
+            ]
+            matches = self.select(matches)
 
             logger.debug(f"Nombre de matchs terminés après filtrage: {len(matches)}")
             return matches
@@ -93,32 +320,79 @@ class CompositeFilter(BaseFilter):
             logger.error(f"Erreur lors de l'application des filtres composites: {e}")
             return []
 
-    def _match_passes_filter(self, match: Dict, filter_instance: BaseFilter) -> bool:
-        try:
-            filter_name = filter_instance.__class__.__name__
+    def _fetch_recent(self, matches_ref: db.Reference, candidates: List[Tuple[str, Dict]],
+                      predicates: List[BaseFilter], count: int, latest: bool) -> List[MatchRecord]:
+        """
+        Curseur de récence sur les entrées d'index : candidats parcourus par coup d'envoi
+        (champ timestamp des entrées) et récupérés par lots de taille croissante, jusqu'à ce
+        que count matchs satisfassent les prédicats ; les candidats de même coup d'envoi que
+        le dernier lu sont aussi récupérés. Retourne les matchs lus dans l'ordre des candidats.
+        """
+        positions = {fixture_id: position for position, (fixture_id, _) in enumerate(candidates)}
+        ordered = sorted(candidates, key=lambda item: item[1]['timestamp'], reverse=latest)
+        records = []
+        found = 0
+        position = 0
+        batch_size = max(count, 1)
+        while position < len(ordered):
+            if found >= count:
+                boundary = ordered[position - 1][1]['timestamp']
+                batch = list(takewhile(lambda item: item[1]['timestamp'] == boundary, ordered[position:]))
+                if not batch:
+                    break
+            else:
+                batch = ordered[position:position + batch_size]
+                batch_size *= 2
+            position += len(batch)
 
-            match_date_str = match.get('metadata', {}).get('date')
-            if not match_date_str:
-                return False
+            fetched = [MatchRecord.build(match) for match in self.fetch_indexed_matches(matches_ref, batch)]
+            records.extend(fetched)
+            found += sum(
+                1 for match in fetched
+                if match.status in self.FINISHED_STATUSES and match.kickoff is not None
+                and all(filter_instance.matches(match) for filter_instance in predicates)
+            )
 
-            # Conversion de la date ISO 8601 en objet datetime
-            match_date = datetime.fromisoformat(match_date_str.replace("Z", "+00:00"))
+        logger.debug(f"Curseur de récence : {len(records)}/{len(candidates)} matchs indexés récupérés")
+        records.sort(key=lambda match: positions.get(str(match.fixture_id), len(positions)))
+        return records
 
-            if filter_name == 'YearFilter':
-                return match_date.year == filter_instance.year
+    def _in_path(self, entry: Dict, path_hint: Dict[str, int]) -> bool:
+        return all(entry.get(key) == value for key, value in path_hint.items())
 
-            if filter_name == 'MonthFilter':
-                return match_date.year == filter_instance.year and match_date.month == filter_instance.month
+    def _scan(self, matches_ref: db.Reference, path_hint: Dict[str, int]) -> List[Dict]:
+        """Parcourt une fois les nœuds de ligue désignés par le chemin."""
+        matches = []
+        for league_data in self._get_league_nodes(matches_ref, path_hint):
+            if isinstance(league_data, dict) and 'fixtures' in league_data:
+                matches.extend(league_data['fixtures'].values())
+        return matches
 
-            if filter_name == 'WeekdayFilter':
-                return match_date.weekday() == filter_instance.weekday.value
+    def _get_league_nodes(self, matches_ref: db.Reference, path_hint: Dict[str, int]) -> List[Dict]:
+        """
+        Lit les nœuds de ligue au niveau le plus étroit permis par le chemin :
+        season_{s}/league_{l} (un nœud), season_{s} (une saison), league_{l} de chaque
+        saison (lectures simultanées après énumération superficielle), sinon la racine.
+        """
+        season = path_hint.get('season')
+        league = path_hint.get('league')
 
-            if filter_name == 'GameTimeFilter':
-                match_time = match_date.time()
-                start_time, end_time = filter_instance.get_time_range(filter_instance.time_slot)
-                return start_time <= match_time <= end_time
+        if season is not None and league is not None:
+            return [matches_ref.child(f'season_{season}/league_{league}').get(etag=False)]
 
-            return True
-        except Exception as e:
-            logger.error(f"Erreur lors de la vérification du filtre {filter_instance.__class__.__name__}: {e}")
-            return False
+        if season is not None:
+            return list((matches_ref.child(f'season_{season}').get(etag=False) or {}).values())
+
+        if league is not None:
+            def fetch(season_key):
+                return matches_ref.child(f'{season_key}/league_{league}').get(etag=False)
+
+            with ThreadPoolExecutor(max_workers=self.FETCH_WORKERS) as executor:
+                return list(executor.map(fetch, get_child_keys(matches_ref)))
+
+        seasons_data = matches_ref.get(etag=False) or {}
+        return [
+            league_data
+            for season_data in seasons_data.values() if isinstance(season_data, dict)
+            for league_data in season_data.values()
+        ]
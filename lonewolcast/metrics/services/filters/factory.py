@@ -8,6 +8,7 @@ from .team import TeamFilter, TeamLocation
 from .game_time import GameTimeFilter, GameTimeSlot
 from .weekday import WeekdayFilter, Weekday
 from .h2h import H2HFilter, H2HLocation
+from .planner import QueryPlanner
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,11 +17,13 @@ class FilterFactory:
     """Factory pour créer et combiner des filtres de manière flexible."""
 
     @staticmethod
-    def create_filter(**params) -> BaseFilter:
+    def create_filter(plan: bool = True, **params) -> BaseFilter:
         """
         Crée une combinaison de filtres basée sur les paramètres fournis.
         
         Args:
+            plan (bool): Choisit le chemin d'accès (QueryPlanner) ; False lorsque le filtre
+                ne sert que de prédicat (matches)
             **params: Paramètres de filtrage incluant:
                 - team1_id (int): ID de la première équipe (optionnel)
                 - team2_id (int): ID de la deuxième équipe (optionnel)
@@ -36,7 +39,8 @@ class FilterFactory:
                 - weekday (Weekday): Jour de la semaine
         
         Returns:
-            BaseFilter: Filtre composite combinant tous les critères spécifiés
+            BaseFilter: Filtre composite combinant tous les critères spécifiés, avec le
+            plan d'exécution choisi par QueryPlanner
         """
         filters = []
         try:
@@ -84,7 +88,15 @@ class FilterFactory:
             if params.get('weekday'):
                 filters.append(WeekdayFilter(params['weekday']))
 
-            return CompositeFilter(filters) if filters else NoFilter()
+            composite = CompositeFilter(filters)
+            path_hint = composite.get_path_hint()
+            if plan and path_hint is not None:
+                try:
+                    composite.plan = QueryPlanner().plan(filters, path_hint)
+                except Exception as e:
+                    # Sans plan, CompositeFilter utilise les index disponibles puis le chemin
+                    logger.error(f"Erreur lors de la planification des filtres: {e}")
+            return composite
 
         except Exception as e:
             logger.error(f"Erreur lors de la création des filtres: {e}")
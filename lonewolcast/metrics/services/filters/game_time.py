@@ -1,8 +1,8 @@
 from .base import BaseFilter
-from typing import List, Dict, Any
+from ..records import MatchRecord
 from enum import Enum
-from datetime import datetime, time
-from firebase_admin import db
+from datetime import time
+import numpy as np
 
 class GameTimeSlot(Enum):
     SLOT_12_14 = 'slot_12_14'  # 12:00-13:59
@@ -11,7 +11,7 @@ class GameTimeSlot(Enum):
     SLOT_20_23 = 'slot_20_23'  # 20:00-22:59
 
 class GameTimeFilter(BaseFilter):
-    """Filtre les matchs par plage horaire."""
+    """Filtre les matchs par plage horaire (heure de la date ISO du match)."""
 
     def __init__(self, time_slot: GameTimeSlot):
         self.time_slot = time_slot
@@ -25,22 +25,18 @@ class GameTimeFilter(BaseFilter):
         }
         return ranges[time_slot]
 
-    def apply(self, ref: db.Reference) -> List[Dict]:
+    def matches(self, match: MatchRecord) -> bool:
+        if match.seconds is None:
+            return False
         start_time, end_time = self.get_time_range(self.time_slot)
-        matches = []
-        
-        seasons = ref.get()
-        if not seasons:
-            return matches
-            
-        for season_data in seasons.values():
-            for league_data in season_data.values():
-                if 'fixtures' in league_data:
-                    for match in league_data['fixtures'].values():
-                        match_timestamp = match.get('metadata', {}).get('timestamp', 0)
-                        match_datetime = datetime.fromtimestamp(match_timestamp)
-                        match_time = match_datetime.time()
-                        
-                        if start_time <= match_time <= end_time:
-                            matches.append(match)
-        return matches
\ No newline at end of file
+        return self._seconds(start_time) <= match.seconds <= self._seconds(end_time)
+
+    def mask(self, store) -> np.ndarray:
+        start_time, end_time = self.get_time_range(self.time_slot)
+        return (store.seconds >= self._seconds(start_time)) & (store.seconds <= self._seconds(end_time))
+
+    def _seconds(self, value: time) -> int:
+        return value.hour * 3600 + value.minute * 60 + value.second
+
+    def estimate_selectivity(self, statistics, total: int) -> float:
+        return 1 / len(GameTimeSlot)
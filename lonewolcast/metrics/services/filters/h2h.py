@@ -1,9 +1,11 @@
 # filters/h2h.py
 from enum import Enum
-from typing import List, Dict, Optional
-from firebase_admin import db
+from typing import Dict, Optional
+from loader.indexes import FixtureIndex
 from .base import BaseFilter
+from ..records import MatchRecord
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -15,6 +17,8 @@ class H2HLocation(Enum):
 
 class H2HFilter(BaseFilter):
     """Filtre pour les confrontations directes entre deux équipes."""
+
+    INDEX = 'h2h_index'
     
     def __init__(self, team1_id: int, team2_id: int, location: H2HLocation = H2HLocation.ANY):
         """
@@ -32,42 +36,58 @@ class H2HFilter(BaseFilter):
         if self.team1_id == self.team2_id:
             raise ValueError("Les deux équipes doivent être différentes pour le H2H")
 
-    def apply(self, ref: db.Reference) -> List[Dict]:
+    def get_index_entries(self) -> Optional[Dict[str, Dict]]:
         """
-        Applique le filtre H2H sur les données.
-        
-        Args:
-            ref: Référence Firebase vers le nœud des matchs
-            
-        Returns:
-            Liste des matchs entre les deux équipes spécifiées
+        Confrontations lues dans l'index des paires (index/h2h/{min_id}_{max_id}), restreintes à la
+        configuration demandée ; sans entrée d'index, None (le prédicat est évalué sur l'arbre parcouru).
         """
-        filtered_matches = []
-        try:
-            seasons_data = ref.get(etag=False)
-            if not seasons_data:
-                return filtered_matches
-
-            for season_data in seasons_data.values():
-                for league_data in season_data.values():
-                    if not isinstance(league_data, dict) or 'fixtures' not in league_data:
-                        continue
-
-                    for match in league_data['fixtures'].values():
-                        if self._is_h2h_match(match):
-                            filtered_matches.append(match)
-
-            logger.info(
-                f"H2HFilter: {len(filtered_matches)} matchs trouvés entre équipes "
-                f"{self.team1_id} et {self.team2_id} ({self.location.value})"
+        entries = FixtureIndex().get_h2h_entries(self.team1_id, self.team2_id)
+        if not entries:
+            logger.warning(
+                f"H2HFilter: aucune entrée d'index pour {self.team1_id}/{self.team2_id}, parcours complet"
             )
-            return filtered_matches
+            return None
 
-        except Exception as e:
-            logger.error(f"Erreur dans H2HFilter.apply: {str(e)}")
-            return filtered_matches
+        selected = {
+            fixture_id: entry for fixture_id, entry in entries.items()
+            if self.matches_location(entry.get('home'))
+        }
+        logger.info(
+            f"H2HFilter: {len(selected)} matchs indexés entre équipes "
+            f"{self.team1_id} et {self.team2_id} ({self.location.value})"
+        )
+        return selected
 
-    def _is_h2h_match(self, match: Dict) -> bool:
+    def matches(self, match: MatchRecord) -> bool:
+        return self._is_h2h_match(match)
+
+    def mask(self, store) -> np.ndarray:
+        team1_home = (store.home_id == self.team1_id) & (store.away_id == self.team2_id)
+        team1_away = (store.home_id == self.team2_id) & (store.away_id == self.team1_id)
+        if self.location == H2HLocation.TEAM1_HOME:
+            return team1_home
+        if self.location == H2HLocation.TEAM1_AWAY:
+            return team1_away
+        return team1_home | team1_away
+
+    def estimate_index_rows(self, statistics) -> Optional[int]:
+        count = statistics.h2h_count(self.team1_id, self.team2_id)
+        if not count:
+            return None
+        return count if self.location == H2HLocation.ANY else round(count / 2)
+
+    def estimate_selectivity(self, statistics, total: int) -> float:
+        return (self.estimate_index_rows(statistics) or 0) / total
+
+    def matches_location(self, home_id: Optional[int]) -> bool:
+        """Vérifie la configuration domicile/extérieur d'une confrontation à partir de l'équipe à domicile."""
+        if self.location == H2HLocation.TEAM1_HOME:
+            return home_id == self.team1_id
+        if self.location == H2HLocation.TEAM1_AWAY:
+            return home_id == self.team2_id
+        return True
+
+    def _is_h2h_match(self, match: MatchRecord) -> bool:
         """
         Vérifie si un match correspond aux critères H2H.
         
@@ -78,12 +98,8 @@ class H2HFilter(BaseFilter):
             True si le match correspond aux critères, False sinon
         """
         try:
-            teams = match.get('teams', {})
-            if not teams:
-                return False
-
-            home_id = int(teams.get('home', {}).get('id', 0))
-            away_id = int(teams.get('away', {}).get('id', 0))
+            home_id = match.home_id
+            away_id = match.away_id
 
             # Vérifier d'abord si les deux équipes sont impliquées
             teams_match = (
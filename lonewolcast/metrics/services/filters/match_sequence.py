@@ -1,97 +1,57 @@
-from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Optional, Tuple
 from .base import BaseFilter
-from firebase_admin import db
+from ..records import MatchRecord
+import heapq
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
-class LastMatchesFilter(BaseFilter):
-    """Filtre pour obtenir les X derniers matchs."""
-    
-    def __init__(self, count: int):
-        self.count = count
-
-    def apply(self, ref: db.Reference) -> List[Dict]:
-        matches = []
-        try:
-            # Récupérer tous les matches
-            seasons_data = ref.get(etag=False)
-            if not seasons_data:
-                return matches
-
-            # Collecter tous les matches avec leur date
-            matches_with_dates = []
-            for season_data in seasons_data.values():
-                for league_data in season_data.values():
-                    if not isinstance(league_data, dict) or 'fixtures' not in league_data:
-                        continue
-                        
-                    for fixture in league_data['fixtures'].values():
-                        try:
-                            metadata = fixture.get('metadata', {})
-                            date_str = metadata.get('date')
-                            if not date_str:
-                                continue
-
-                            match_date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                            matches_with_dates.append((match_date, fixture))
-                        except Exception as e:
-                            logger.error(f"Erreur lors du parsing de la date: {e}")
-                            continue
-
-            # Trier par date décroissante et prendre les N derniers
-            sorted_matches = sorted(matches_with_dates, key=lambda x: x[0], reverse=True)
-            matches = [match for _, match in sorted_matches[:self.count]]
-
-            logger.info(f"LastMatchesFilter: Retourne {len(matches)} matchs sur {len(matches_with_dates)} disponibles")
-            return matches
+class SequenceFilter(BaseFilter):
+    """
+    Base des filtres de séquence : sélection des N premiers ou derniers matchs datés parmi
+    ceux retenus par les prédicats, sans trier l'ensemble (tas de N éléments, ou partition
+    des coups d'envoi sur les colonnes du store). Les matchs retenus sont rendus dans
+    l'ordre chronologique ; à coup d'envoi égal, l'ordre d'arrivée est conservé.
+    """
 
-        except Exception as e:
-            logger.error(f"Erreur lors du filtrage des derniers matchs: {e}")
-            return matches
+    LATEST = True  # N derniers (True) ou N premiers (False)
 
-class FirstMatchesFilter(BaseFilter):
-    """Filtre pour obtenir les X premiers matchs."""
-    
     def __init__(self, count: int):
-        self.count = count
-
-    def apply(self, ref: db.Reference) -> List[Dict]:
-        matches = []
-        try:
-            # Récupérer tous les matches
-            seasons_data = ref.get(etag=False)
-            if not seasons_data:
-                return matches
-
-            # Collecter tous les matches avec leur date
-            matches_with_dates = []
-            for season_data in seasons_data.values():
-                for league_data in season_data.values():
-                    if not isinstance(league_data, dict) or 'fixtures' not in league_data:
-                        continue
-                        
-                    for fixture in league_data['fixtures'].values():
-                        try:
-                            metadata = fixture.get('metadata', {})
-                            date_str = metadata.get('date')
-                            if not date_str:
-                                continue
-
-                            match_date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                            matches_with_dates.append((match_date, fixture))
-                        except Exception as e:
-                            logger.error(f"Erreur lors du parsing de la date: {e}")
-                            continue
+        self.count = int(count)
+
+    def get_recency_limit(self) -> Optional[Tuple[int, bool]]:
+        return self.count, self.LATEST
+
+    def select(self, matches: List[MatchRecord]) -> List[MatchRecord]:
+        # La position départage les coups d'envoi égaux (comme un tri stable)
+        dated = ((match.kickoff, position, match) for position, match in enumerate(matches) if match.kickoff is not None)
+        pick = heapq.nlargest if self.LATEST else heapq.nsmallest
+        selected = [match for _, _, match in sorted(pick(self.count, dated))]
+        logger.info(f"{self.__class__.__name__}: Retourne {len(selected)} matchs sur {len(matches)} disponibles")
+        return selected
+
+    def select_indices(self, store, indices: np.ndarray) -> np.ndarray:
+        """Équivalent de select sur les indices des lignes du store (partition puis tri des N retenus)."""
+        indices = indices[store.kickoff[indices] != store.MISSING]
+        if self.count < len(indices):
+            kickoff = store.kickoff[indices]
+            kth = len(kickoff) - self.count if self.LATEST else self.count - 1
+            bound = np.partition(kickoff, kth)[kth]
+            selected = kickoff > bound if self.LATEST else kickoff < bound
+            # Coups d'envoi égaux à la borne : les derniers (ou premiers) dans l'ordre des indices
+            ties = np.flatnonzero(kickoff == bound)
+            missing = self.count - np.count_nonzero(selected)
+            selected[ties[len(ties) - missing:] if self.LATEST else ties[:missing]] = True
+            indices = indices[selected]
+        return indices[np.argsort(store.kickoff[indices], kind='stable')]
+
+class LastMatchesFilter(SequenceFilter):
+    """Filtre pour obtenir les X derniers matchs."""
 
-            # Trier par date croissante et prendre les N premiers
-            sorted_matches = sorted(matches_with_dates, key=lambda x: x[0])
-            matches = [match for _, match in sorted_matches[:self.count]]
+    LATEST = True
 
-            logger.info(f"FirstMatchesFilter: Retourne {len(matches)} matchs sur {len(matches_with_dates)} disponibles")
-            return matches
+class FirstMatchesFilter(SequenceFilter):
+    """Filtre pour obtenir les X premiers matchs."""
 
-        except Exception as e:
-            logger.error(f"Erreur lors du filtrage des premiers matchs: {e}")
-            return matches
\ No newline at end of file
+    LATEST = False
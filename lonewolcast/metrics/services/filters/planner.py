@@ -0,0 +1,199 @@
+from typing import Any, Dict, List, Optional, Tuple
+from loader.indexes import FixtureIndex
+from .base import BaseFilter, CompositeFilter
+import math
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class IndexStatistics:
+    """
+    Cardinalités utilisées par le planificateur, écrites avec les index
+    (match_summaries_meta/statistics, voir FixtureIndex.get_statistics_keys), lues en une
+    requête et conservées CACHE_TTL secondes par processus.
+    """
+
+    CACHE_TTL = 300
+
+    _cache: Optional[Tuple[float, Dict[str, Any]]] = None
+    _cache_lock = threading.Lock()
+
+    def __init__(self):
+        self.index = FixtureIndex()
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Nœud match_summaries_meta/statistics ; LookupError avant le premier rebuild_indexes."""
+        now = time.time()
+        with self._cache_lock:
+            cached = IndexStatistics._cache
+            if cached and now - cached[0] < self.CACHE_TTL:
+                return cached[1]
+        statistics = self.index.get_statistics()
+        if not statistics:
+            raise LookupError("Cardinalités des index absentes (rebuild_indexes non lancé)")
+        with self._cache_lock:
+            IndexStatistics._cache = (now, statistics)
+        return statistics
+
+    def league_count(self, season: Optional[int] = None, league_id: Optional[int] = None) -> int:
+        """Nombre de matchs des nœuds season_{s}/league_{l} (tous si season et league_id sont None)."""
+        return sum(
+            count
+            for season_key, leagues in self.get_statistics().get('leagues', {}).items()
+            if season is None or season_key == f'season_{season}'
+            for league_key, count in leagues.items()
+            if league_id is None or league_key == f'league_{league_id}'
+        )
+
+    def total_count(self) -> int:
+        return self.league_count()
+
+    def season_count(self) -> int:
+        """Nombre de saisons (une lecture par saison pour un filtre de ligue seul)."""
+        return len(self.get_statistics().get('leagues', {}))
+
+    def team_count(self, team_id: int) -> int:
+        return self.get_statistics().get('teams', {}).get(f'team_{team_id}', 0)
+
+    def h2h_count(self, team1_id: int, team2_id: int) -> int:
+        return self.get_statistics().get('h2h', {}).get(self.index.get_h2h_key(team1_id, team2_id), 0)
+
+    def date_count(self, start_date: str, end_date: str) -> Optional[int]:
+        """Nombre de matchs entre deux jours (inclus) ; None sans index des dates."""
+        days = self.get_statistics().get('dates')
+        if not days:
+            return None
+        return sum(count for day, count in days.items() if start_date <= day <= end_date)
+
+class QueryPlan:
+    """Chemin d'accès retenu pour un ensemble de filtres, avec ses estimations."""
+
+    def __init__(self, access_path: str, cost: float, estimated_rows: int,
+                 index_filters: Optional[List[BaseFilter]] = None, path_hint: Optional[Dict[str, int]] = None,
+                 residual: Optional[List[BaseFilter]] = None, alternatives: Optional[Dict[str, float]] = None):
+        self.access_path = access_path
+        self.cost = cost
+        self.estimated_rows = estimated_rows
+        self.index_filters = index_filters or []
+        self.path_hint = path_hint or {}
+        self.residual = residual or []
+        self.alternatives = alternatives or {}
+        self.fetched_rows: Optional[int] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'access_path': self.access_path,
+            'path': self.path_hint,
+            'estimated_rows': self.estimated_rows,
+            'fetched_rows': self.fetched_rows,
+            'cost': round(self.cost, 1),
+            'residual_predicates': [f.__class__.__name__ for f in self.residual],
+            'alternatives': {path: round(cost, 1) for path, cost in self.alternatives.items()}
+        }
+
+class QueryPlanner:
+    """
+    Planificateur à coûts : choisit le chemin d'accès le moins coûteux (index des équipes,
+    des confrontations, des dates, leur intersection, nœuds de saison/ligue ou parcours
+    complet) à partir des cardinalités des index, puis ordonne les prédicats restants par
+    sélectivité croissante.
+
+    Les coûts sont exprimés en résumés de matchs transférés : un aller-retour Firebase vaut
+    REQUEST_COST, une entrée d'index ENTRY_COST ; les matchs d'un index sont lus un par un
+    (FETCH_WORKERS en parallèle), ceux d'un nœud de ligue en bloc. Pour les N derniers ou
+    premiers matchs, un index n'est lu que jusqu'au N-ième match retenu (curseur de récence).
+    """
+
+    REQUEST_COST = 20.0
+    ENTRY_COST = 0.25
+
+    def __init__(self, statistics: Optional[IndexStatistics] = None):
+        self.statistics = statistics or IndexStatistics()
+
+    def index_read_cost(self, entries: int) -> float:
+        """Lecture complète d'un index de entries entrées."""
+        return self.REQUEST_COST + entries * self.ENTRY_COST
+
+    def fetch_cost(self, rows: int) -> float:
+        """Récupération individuelle des matchs candidats."""
+        return rows * (1 + self.REQUEST_COST / BaseFilter.FETCH_WORKERS)
+
+    def cursor_rows(self, rows: int, filters: List[BaseFilter], index_filters: List[BaseFilter],
+                    limit: Optional[Tuple[int, bool]], total: int) -> int:
+        """
+        Matchs récupérés depuis un index : tous les candidats, ou pour les N derniers (premiers)
+        matchs, ceux que lit le curseur de récence avant d'en retenir N (voir CompositeFilter).
+        """
+        if limit is None:
+            return rows
+        selectivity = 1.0
+        for filter_instance in filters:
+            if filter_instance not in index_filters:
+                selectivity *= filter_instance.estimate_selectivity(self.statistics, total)
+        return min(rows, math.ceil(limit[0] / max(selectivity, 1 / total)))
+
+    def path_cost(self, rows: int, reads: int) -> float:
+        """Lecture en bloc de reads nœuds contenant rows matchs."""
+        return reads * self.REQUEST_COST + rows
+
+    def get_path_rows(self, path_hint: Dict[str, int]) -> Tuple[int, int]:
+        """Nombre de matchs et de lectures des nœuds désignés par le chemin (voir CompositeFilter)."""
+        season = path_hint.get('season')
+        league_id = path_hint.get('league')
+        rows = self.statistics.league_count(season, league_id)
+        if league_id is not None and season is None:
+            return rows, self.statistics.season_count() + 1
+        return rows, 1
+
+    def plan(self, filters: List[BaseFilter], path_hint: Optional[Dict[str, int]] = None) -> QueryPlan:
+        path_hint = path_hint or {}
+        total = max(self.statistics.total_count(), 1)
+        path_rows, path_reads = self.get_path_rows(path_hint)
+        path_fraction = path_rows / total
+        limit = CompositeFilter(filters).get_recency_limit()
+
+        access_path = 'league_path' if path_hint else 'full_scan'
+        candidates = {access_path: (self.path_cost(path_rows, path_reads), path_rows, [])}
+
+        indexed = []
+        for filter_instance in filters:
+            index_rows = filter_instance.estimate_index_rows(self.statistics)
+            if index_rows is not None:
+                indexed.append((filter_instance, index_rows))
+
+        for filter_instance, index_rows in indexed:
+            # Les entrées d'index hors du chemin sont écartées avant la récupération des matchs
+            rows = self.cursor_rows(round(index_rows * path_fraction), filters, [filter_instance], limit, total)
+            cost = self.index_read_cost(index_rows) + self.fetch_cost(rows)
+            name = filter_instance.INDEX
+            if name not in candidates or cost < candidates[name][0]:
+                candidates[name] = (cost, rows, [filter_instance])
+
+        if len(indexed) > 1:
+            # Intersection des index, sous hypothèse d'indépendance des filtres
+            fraction = path_fraction
+            for _, index_rows in indexed:
+                fraction *= index_rows / total
+            index_filters = [filter_instance for filter_instance, _ in indexed]
+            rows = self.cursor_rows(round(total * fraction), filters, index_filters, limit, total)
+            cost = sum(self.index_read_cost(index_rows) for _, index_rows in indexed) + self.fetch_cost(rows)
+            name = '+'.join(filter_instance.INDEX for filter_instance, _ in indexed)
+            candidates[name] = (cost, rows, index_filters)
+
+        access_path = min(candidates, key=lambda name: candidates[name][0])
+        cost, rows, index_filters = candidates[access_path]
+
+        residual = [
+            f for f in filters
+            if f not in index_filters and type(f).matches is not BaseFilter.matches
+        ]
+        residual.sort(key=lambda f: f.estimate_selectivity(self.statistics, total))
+
+        plan = QueryPlan(
+            access_path, cost, rows, index_filters, path_hint, residual,
+            {name: candidate[0] for name, candidate in candidates.items()}
+        )
+        logger.info(f"Plan retenu: {plan.to_dict()}")
+        return plan
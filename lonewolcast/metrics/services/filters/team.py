@@ -1,8 +1,10 @@
 from .base import BaseFilter
-from typing import List, Dict, Any
+from ..records import MatchRecord
+from typing import Dict, Optional
 from enum import Enum
-from firebase_admin import db
+from loader.indexes import FixtureIndex
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,8 @@ class TeamLocation(Enum):
     ALL = 'all'
 
 class TeamFilter(BaseFilter):
+    INDEX = 'team_index'
+
     def __init__(self, team_id: int, location: TeamLocation = TeamLocation.ALL):
         """
         Initialise le filtre d'équipe avec l'ID et la position.
@@ -24,71 +28,61 @@ class TeamFilter(BaseFilter):
         self.location = location
         logger.info(f"TeamFilter initialisé - team_id: {team_id}, location: {location.value}")
 
-    def apply(self, ref: db.Reference) -> List[Dict]:
+    def get_index_entries(self) -> Optional[Dict[str, Dict]]:
         """
-        Applique le filtre sur les données Firebase.
-        
-        Args:
-            ref: Référence Firebase vers le nœud des matchs
-            
-        Returns:
-            Liste des matchs filtrés selon les critères
+        Matchs de l'équipe lus dans l'index des équipes (index/team/team_{id}), restreints à la
+        position demandée ; sans entrée d'index, None (le prédicat est évalué sur l'arbre parcouru).
         """
-        filtered_matches = []
-        try:
-            seasons_data = ref.get(etag=False)
-            if not seasons_data:
-                return filtered_matches
+        entries = FixtureIndex().get_team_entries(self.team_id)
+        if not entries:
+            logger.warning(f"TeamFilter: aucune entrée d'index pour l'équipe {self.team_id}, parcours complet")
+            return None
 
-            total_matches = 0
-            # Parcours des saisons et ligues
-            for season_data in seasons_data.values():
-                for league_data in season_data.values():
-                    if not isinstance(league_data, dict) or 'fixtures' not in league_data:
-                        continue
+        selected = {
+            fixture_id: entry for fixture_id, entry in entries.items()
+            if self.location == TeamLocation.ALL or entry.get('location') == self.location.value
+        }
+        logger.info(
+            f"TeamFilter: {len(selected)}/{len(entries)} matchs indexés pour "
+            f"équipe {self.team_id} en {self.location.value}"
+        )
+        return selected
 
-                    # Pour chaque match, vérifier la condition de position
-                    for match in league_data['fixtures'].values():
-                        total_matches += 1
-                        if self._check_team_position(match):
-                            filtered_matches.append(match)
+    def matches(self, match: MatchRecord) -> bool:
+        return self._check_team_position(match)
 
-            logger.info(
-                f"TeamFilter: {len(filtered_matches)}/{total_matches} matchs pour "
-                f"équipe {self.team_id} en {self.location.value}"
-            )
-            return filtered_matches
+    def mask(self, store) -> np.ndarray:
+        if self.location == TeamLocation.HOME:
+            return store.home_id == self.team_id
+        if self.location == TeamLocation.AWAY:
+            return store.away_id == self.team_id
+        return (store.home_id == self.team_id) | (store.away_id == self.team_id)
 
-        except Exception as e:
-            logger.error(f"Erreur dans TeamFilter.apply: {str(e)}")
-            return filtered_matches
+    def get_sorted_rows(self, store) -> np.ndarray:
+        return store.team_rows(self.team_id)
 
-    def _check_team_position(self, match: Dict) -> bool:
+    def estimate_index_rows(self, statistics) -> Optional[int]:
+        count = statistics.team_count(self.team_id)
+        if not count:
+            return None
+        # Domicile ou extérieur : environ la moitié des matchs de l'équipe
+        return count if self.location == TeamLocation.ALL else round(count / 2)
+
+    def estimate_selectivity(self, statistics, total: int) -> float:
+        return (self.estimate_index_rows(statistics) or 0) / total
+
+    def _check_team_position(self, match: MatchRecord) -> bool:
         """
         Vérifie si un match correspond aux critères de position de l'équipe.
         """
         try:
-            teams = match.get('teams', {})
-            if not teams:
-                return False
-
-            # Extraire les IDs des équipes
-            home_id = int(teams.get('home', {}).get('id', 0))
-            away_id = int(teams.get('away', {}).get('id', 0))
-
             # Vérifier selon la location demandée
             if self.location == TeamLocation.HOME:
-                matches = home_id == self.team_id
+                return match.home_id == self.team_id
             elif self.location == TeamLocation.AWAY:
-                matches = away_id == self.team_id
+                return match.away_id == self.team_id
             else:  # ALL
-                matches = home_id == self.team_id or away_id == self.team_id
-
-            logger.debug(
-                f"Match {match.get('metadata', {}).get('fixture_id')} - "
-                f"home: {home_id}, away: {away_id}, matches: {matches}"
-            )
-            return matches
+                return match.involves(self.team_id)
 
         except Exception as e:
             logger.error(f"Erreur dans check_team_position: {str(e)}")
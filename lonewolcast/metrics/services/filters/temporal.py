@@ -1,86 +1,96 @@
-from datetime import datetime
-from typing import List, Dict, Any
+from abc import abstractmethod
+from calendar import monthrange
+from typing import Dict, Optional, Tuple
 from .base import BaseFilter
-from firebase_admin import db
+from ..records import MatchRecord
+from loader.indexes import FixtureIndex
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
-class YearFilter(BaseFilter):
+class DateRangeFilter(BaseFilter):
+    """
+    Base des filtres temporels : les matchs de la période sont lus dans l'index des dates
+    (index/date/{YYYY-MM-DD}) par une requête sur une plage de clés ; sans index des dates,
+    le prédicat est évalué sur les matchs parcourus.
+    """
+
+    INDEX = 'date_index'
+
+    @abstractmethod
+    def get_date_range(self) -> Tuple[str, str]:
+        """Retourne les jours de début et de fin (YYYY-MM-DD, inclus) de la période."""
+        pass
+
+    @abstractmethod
+    def matches_date(self, match: MatchRecord) -> bool:
+        """Indique si la date d'un match (année, mois) appartient à la période."""
+        pass
+
+    @abstractmethod
+    def describe(self) -> str:
+        """Décrit la période pour les journaux (ex. « l'année 2024 »)."""
+        pass
+
+    def matches(self, match: MatchRecord) -> bool:
+        return match.year is not None and self.matches_date(match)
+
+    def get_index_entries(self) -> Optional[Dict[str, Dict]]:
+        index = FixtureIndex()
+        if not index.has_date_index():
+            logger.warning(f"{self.__class__.__name__}: index des dates absent, parcours complet")
+            return None
+
+        start_date, end_date = self.get_date_range()
+        entries = index.get_date_entries(start_date, end_date)
+        logger.info(f"{self.__class__.__name__}: {len(entries)} matchs indexés pour {self.describe()}")
+        return entries
+
+    def estimate_index_rows(self, statistics) -> Optional[int]:
+        return statistics.date_count(*self.get_date_range())
+
+    def estimate_selectivity(self, statistics, total: int) -> float:
+        count = self.estimate_index_rows(statistics)
+        return count / total if count is not None else 1.0
+
+class YearFilter(DateRangeFilter):
     """Filtre les matchs par année civile."""
-    
+
     def __init__(self, year: int):
         self.year = year
 
-    def apply(self, matches_ref: db.Reference) -> List[Dict]:
-        matches = []
-        try:
-            seasons_data = matches_ref.get(etag=False)
-            if not seasons_data:
-                return matches
-
-            for season_data in seasons_data.values():
-                for league_data in season_data.values():
-                    if not isinstance(league_data, dict) or 'fixtures' not in league_data:
-                        continue
-
-                    for fixture in league_data['fixtures'].values():
-                        try:
-                            metadata = fixture.get('metadata', {})
-                            date_str = metadata.get('date')
-                            if not date_str:
-                                continue
-
-                            match_date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                            if match_date.year == self.year:
-                                matches.append(fixture)
-                        except Exception as e:
-                            logger.error(f"Erreur lors du traitement d'un match: {e}")
-                            continue
-
-            logger.info(f"YearFilter: {len(matches)} matchs trouvés pour l'année {self.year}")
-            return matches
-
-        except Exception as e:
-            logger.error(f"Erreur lors du filtrage par année: {e}")
-            return matches
-
-class MonthFilter(BaseFilter):
+    def get_date_range(self) -> Tuple[str, str]:
+        return f"{self.year:04d}-01-01", f"{self.year:04d}-12-31"
+
+    def matches_date(self, match: MatchRecord) -> bool:
+        return match.year == self.year
+
+    def mask(self, store) -> np.ndarray:
+        return store.year == self.year
+
+    def describe(self) -> str:
+        return f"l'année {self.year}"
+
+class MonthFilter(DateRangeFilter):
     """Filtre les matchs par mois d'une année."""
-    
+
     def __init__(self, year: int, month: int):
         self.year = year
         self.month = month
 
-    def apply(self, matches_ref: db.Reference) -> List[Dict]:
-        matches = []
-        try:
-            seasons_data = matches_ref.get(etag=False)
-            if not seasons_data:
-                return matches
-
-            for season_data in seasons_data.values():
-                for league_data in season_data.values():
-                    if not isinstance(league_data, dict) or 'fixtures' not in league_data:
-                        continue
-
-                    for fixture in league_data['fixtures'].values():
-                        try:
-                            metadata = fixture.get('metadata', {})
-                            date_str = metadata.get('date')
-                            if not date_str:
-                                continue
-
-                            match_date = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                            if match_date.year == self.year and match_date.month == self.month:
-                                matches.append(fixture)
-                        except Exception as e:
-                            logger.error(f"Erreur lors du traitement d'un match: {e}")
-                            continue
-
-            logger.info(f"MonthFilter: {len(matches)} matchs trouvés pour {self.month}/{self.year}")
-            return matches
-
-        except Exception as e:
-            logger.error(f"Erreur lors du filtrage par mois: {e}")
-            return matches
+    def get_date_range(self) -> Tuple[str, str]:
+        last_day = monthrange(self.year, self.month)[1]
+        return (
+            f"{self.year:04d}-{self.month:02d}-01",
+            f"{self.year:04d}-{self.month:02d}-{last_day:02d}"
+        )
+
+    def matches_date(self, match: MatchRecord) -> bool:
+        return match.year == self.year and match.month == self.month
+
+    def mask(self, store) -> np.ndarray:
+        return (store.year == self.year) & (store.month == self.month)
+
+    def describe(self) -> str:
+        return f"{self.month}/{self.year}"
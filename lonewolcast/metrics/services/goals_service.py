@@ -1,10 +1,14 @@
 from typing import Dict, Any, List, Optional
 from .results_service import ResultsService
 from .h2h_service import H2HService
+from .orm_backend import FixtureQueryBackend
+from .columnar import ColumnarMatchStore
 from datetime import datetime
 import logging
+from django.conf import settings
 from firebase_admin import db
 from .filters.factory import FilterFactory
+from .records import MatchRecord
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +31,18 @@ class GoalsService(ResultsService):
             if params.get('team1_id') and params.get('team2_id'):
                 return self.h2h_service.get_goals_stats(**params)
 
-            # Récupération et filtrage initial des matchs
-            filter_instance = FilterFactory.create_filter(**params)
+            if settings.METRICS_BACKEND == 'orm':
+                backend = FixtureQueryBackend()
+                return self._get_results_from_backend(backend, backend.get_queryset(**params), params)
+
+            # Instantané local : masques vectorisés sur les colonnes
+            store = ColumnarMatchStore.for_reference(self.matches_ref)
+            if store is not None:
+                filter_instance = FilterFactory.create_filter(plan=False, **params)
+                return self._get_results_from_backend(store, filter_instance.filter_store(store), params)
+
+            # Récupération et filtrage initial des matchs (sans planificateur sur une source locale)
+            filter_instance = FilterFactory.create_filter(plan=not getattr(self.matches_ref, 'LOCAL', False), **params)
             matches = filter_instance.apply(self.matches_ref)
             filtered_matches = self._filter_finished_matches(matches)
 
@@ -36,16 +50,16 @@ class GoalsService(ResultsService):
             team_id = params.get('team_id')
             if team_id:
                 team_id = int(team_id)
-                filtered_matches = [m for m in filtered_matches 
-                                 if team_id in [m['teams']['home']['id'],
-                                              m['teams']['away']['id']]]
+                filtered_matches = [m for m in filtered_matches if m.involves(team_id)]
 
             # Ensuite on applique le filtre de séquence
             final_matches = self._apply_sequence_filter(filtered_matches, params)
             logger.info(f"Matches après filtrage complet: {len(final_matches)}")
 
             if not final_matches:
-                return self._build_empty_response(params)
+                response = self._build_empty_response(params)
+                response['metadata']['plan'] = filter_instance.describe_plan()
+                return response
 
             # Construction de la réponse selon le type
             if team_id:
@@ -54,16 +68,17 @@ class GoalsService(ResultsService):
                 results = self._build_league_response(final_matches)
 
             results['metadata'] = self._build_metadata(final_matches, params)
+            results['metadata']['plan'] = filter_instance.describe_plan()
             return results
 
         except Exception as e:
             logger.error(f"Erreur lors du calcul des métriques: {str(e)}", exc_info=True)
             raise
 
-    def _build_team_response(self, matches: List[Dict], team_id: int) -> Dict[str, Any]:
+    def _build_team_response(self, matches: List[MatchRecord], team_id: int) -> Dict[str, Any]:
         """Construit les statistiques de buts pour une équipe."""
-        home_matches = [m for m in matches if m['teams']['home']['id'] == team_id]
-        away_matches = [m for m in matches if m['teams']['away']['id'] == team_id]
+        home_matches = [m for m in matches if m.home_id == team_id]
+        away_matches = [m for m in matches if m.away_id == team_id]
         team_matches = home_matches + away_matches
 
         return {
@@ -73,38 +88,59 @@ class GoalsService(ResultsService):
             "thresholds": self._calculate_thresholds(team_matches)
         }
 
-    def _build_league_response(self, matches: List[Dict]) -> Dict[str, Any]:
+    def _build_league_response(self, matches: List[MatchRecord]) -> Dict[str, Any]:
         """Construit les statistiques de buts pour une ligue."""
         total_matches = len(matches)
         if total_matches == 0:
             return {"total_matches": 0}
 
-        total_goals = sum(m['score']['fulltime']['home'] + m['score']['fulltime']['away'] 
-                         for m in matches)
-        btts_matches = sum(1 for m in matches 
-                          if m['score']['fulltime']['home'] > 0 
-                          and m['score']['fulltime']['away'] > 0)
-        clean_sheets = sum(1 for m in matches 
-                          if m['score']['fulltime']['home'] == 0 
-                          or m['score']['fulltime']['away'] == 0)
+        total_goals = sum(m.total_goals() for m in matches)
+        btts_matches = sum(1 for m in matches if m.ft_home > 0 and m.ft_away > 0)
+        clean_sheets = sum(1 for m in matches if m.ft_home == 0 or m.ft_away == 0)
 
+        response = self._format_league_stats({
+            "matches": total_matches,
+            "goals": total_goals,
+            "btts": btts_matches,
+            "clean_sheets": clean_sheets
+        })
+        response["thresholds"] = self._calculate_thresholds(matches)
+        return response
+
+    def _build_aggregate_team_response(self, backend, fixtures, team_id: int) -> Dict[str, Any]:
+        response = super()._build_aggregate_team_response(backend, fixtures, team_id)
+        response["thresholds"] = self._format_thresholds(
+            response["total"]["matches"], backend.get_threshold_counts(fixtures, self.metrics_thresholds)
+        )
+        return response
+
+    def _build_aggregate_league_response(self, backend, fixtures) -> Dict[str, Any]:
+        stats = backend.get_league_stats(fixtures)
+        response = self._format_league_stats(stats)
+        response["thresholds"] = self._format_thresholds(
+            stats["matches"], backend.get_threshold_counts(fixtures, self.metrics_thresholds)
+        )
+        return response
+
+    def _format_league_stats(self, stats: Dict[str, int]) -> Dict[str, Any]:
+        """Met en forme les buts d'une ligue (comptages Python ou agrégats SQL), hors seuils."""
+        total_matches = stats['matches']
         return {
             "goals": {
-                "total": total_goals,
-                "average": round(total_goals / total_matches, 2)
+                "total": stats['goals'],
+                "average": round(stats['goals'] / total_matches, 2)
             },
             "btts": {
-                "matches": btts_matches,
-                "percentage": round(btts_matches / total_matches * 100, 2)
+                "matches": stats['btts'],
+                "percentage": round(stats['btts'] / total_matches * 100, 2)
             },
             "clean_sheets": {
-                "matches": clean_sheets,
-                "percentage": round(clean_sheets / total_matches * 100, 2)
-            },
-            "thresholds": self._calculate_thresholds(matches)
+                "matches": stats['clean_sheets'],
+                "percentage": round(stats['clean_sheets'] / total_matches * 100, 2)
+            }
         }
 
-    def _calculate_team_stats(self, matches: List[Dict], team_id: int) -> Dict[str, Any]:
+    def _calculate_team_stats(self, matches: List[MatchRecord], team_id: int) -> Dict[str, Any]:
         """Calcule les statistiques globales de buts pour une équipe."""
         total_matches = len(matches)
         if total_matches == 0:
@@ -117,9 +153,8 @@ class GoalsService(ResultsService):
         btts = 0
 
         for match in matches:
-            is_home = match['teams']['home']['id'] == team_id
-            goals_scored = match['score']['fulltime']['home' if is_home else 'away']
-            goals_conceded = match['score']['fulltime']['away' if is_home else 'home']
+            goals_scored = match.goals_for(team_id)
+            goals_conceded = match.goals_against(team_id)
             
             total_goals_scored += goals_scored
             total_goals_conceded += goals_conceded
@@ -131,60 +166,75 @@ class GoalsService(ResultsService):
             if goals_scored > 0 and goals_conceded > 0:
                 btts += 1
 
-        return {
+        return self._format_team_stats({
             "matches": total_matches,
-            "goals_scored": total_goals_scored,
-            "goals_conceded": total_goals_conceded,
-            "goals_per_game": round(total_goals_scored / total_matches, 2),
+            "goals_for": total_goals_scored,
+            "goals_against": total_goals_conceded,
             "clean_sheets": clean_sheets,
-            "clean_sheets_percentage": round(clean_sheets / total_matches * 100, 2),
             "failed_to_score": failed_to_score,
-            "failed_to_score_percentage": round(failed_to_score / total_matches * 100, 2),
-            "btts": btts,
-            "btts_percentage": round(btts / total_matches * 100, 2)
-        }
+            "btts": btts
+        })
 
-    def _calculate_position_stats(self, matches: List[Dict], is_home: bool, team_id: int) -> Dict[str, Any]:
+    def _calculate_position_stats(self, matches: List[MatchRecord], is_home: bool, team_id: int) -> Dict[str, Any]:
         """Calcule les statistiques de buts pour une position spécifique."""
         total_matches = len(matches)
         if total_matches == 0:
             return self._get_empty_position_stats()
 
-        goals_scored = sum(m['score']['fulltime']['home' if is_home else 'away'] for m in matches)
-        goals_conceded = sum(m['score']['fulltime']['away' if is_home else 'home'] for m in matches)
-        clean_sheets = sum(1 for m in matches 
-                          if m['score']['fulltime']['away' if is_home else 'home'] == 0)
-        failed_to_score = sum(1 for m in matches 
-                            if m['score']['fulltime']['home' if is_home else 'away'] == 0)
-        btts = sum(1 for m in matches 
-                  if m['score']['fulltime']['home'] > 0 and m['score']['fulltime']['away'] > 0)
+        goals_scored = sum(m.goals_for(team_id) for m in matches)
+        goals_conceded = sum(m.goals_against(team_id) for m in matches)
+        clean_sheets = sum(1 for m in matches if m.goals_against(team_id) == 0)
+        failed_to_score = sum(1 for m in matches if m.goals_for(team_id) == 0)
+        btts = sum(1 for m in matches if m.ft_home > 0 and m.ft_away > 0)
 
-        return {
+        return self._format_team_stats({
             "matches": total_matches,
-            "goals_scored": goals_scored,
-            "goals_conceded": goals_conceded,
-            "goals_per_game": round(goals_scored / total_matches, 2),
+            "goals_for": goals_scored,
+            "goals_against": goals_conceded,
             "clean_sheets": clean_sheets,
-            "clean_sheets_percentage": round(clean_sheets / total_matches * 100, 2),
             "failed_to_score": failed_to_score,
-            "failed_to_score_percentage": round(failed_to_score / total_matches * 100, 2),
-            "btts": btts,
-            "btts_percentage": round(btts / total_matches * 100, 2)
+            "btts": btts
+        })
+
+    def _format_team_stats(self, stats: Dict[str, int]) -> Dict[str, Any]:
+        """Met en forme les buts d'une équipe (comptages Python ou agrégats SQL)."""
+        total_matches = stats['matches']
+        if total_matches == 0:
+            return self._get_empty_team_stats()
+
+        return {
+            "matches": total_matches,
+            "goals_scored": stats['goals_for'],
+            "goals_conceded": stats['goals_against'],
+            "goals_per_game": round(stats['goals_for'] / total_matches, 2),
+            "clean_sheets": stats['clean_sheets'],
+            "clean_sheets_percentage": round(stats['clean_sheets'] / total_matches * 100, 2),
+            "failed_to_score": stats['failed_to_score'],
+            "failed_to_score_percentage": round(stats['failed_to_score'] / total_matches * 100, 2),
+            "btts": stats['btts'],
+            "btts_percentage": round(stats['btts'] / total_matches * 100, 2)
         }
 
-    def _calculate_thresholds(self, matches: List[Dict]) -> Dict[str, Any]:
+    def _calculate_thresholds(self, matches: List[MatchRecord]) -> Dict[str, Any]:
         """Calcule les statistiques de seuils de buts."""
         total_matches = len(matches)
         if total_matches == 0:
             return {}
 
-        thresholds = {}
-        for threshold in self.metrics_thresholds:
-            over_matches = sum(
-                1 for m in matches
-                if m['score']['fulltime']['home'] + m['score']['fulltime']['away'] > threshold
-            )
+        totals = [m.total_goals() for m in matches]
+        over_counts = {
+            threshold: sum(1 for total_goals in totals if total_goals > threshold)
+            for threshold in self.metrics_thresholds
+        }
+        return self._format_thresholds(total_matches, over_counts)
 
+    def _format_thresholds(self, total_matches: int, over_counts: Dict[float, int]) -> Dict[str, Any]:
+        """Met en forme les seuils de buts à partir du nombre de matchs au-dessus de chaque seuil."""
+        if total_matches == 0:
+            return {}
+
+        thresholds = {}
+        for threshold, over_matches in over_counts.items():
             threshold_key = f"over_{str(threshold).replace('.', '_')}"
             under_key = f"under_{str(threshold).replace('.', '_')}"
             
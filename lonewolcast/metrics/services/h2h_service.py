@@ -1,9 +1,12 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List
 from datetime import datetime
 import logging
-from firebase_admin import db
-from .filters.h2h import H2HLocation
+from loader.indexes import FixtureIndex
+from .filters.h2h import H2HFilter, H2HLocation
 from .filters.factory import FilterFactory
+from .records import MatchRecord
+from .columnar import ColumnarMatchStore
+from .summaries import MatchSummaryReference
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +16,14 @@ class H2HService:
     FINISHED_STATUSES = {'FT', 'AET', 'PEN'}
 
     def __init__(self):
-        self.matches_ref = db.reference('matches')
+        self._matches_ref = None
+
+    @property
+    def matches_ref(self):
+        """Source de lecture des métriques, résolue à la première utilisation (jamais en mode ORM)."""
+        if self._matches_ref is None:
+            self._matches_ref = MatchSummaryReference.for_metrics()
+        return self._matches_ref
 
     def get_results_stats(self, **params) -> Dict[str, Any]:
         """Récupère les statistiques complètes de résultats H2H."""
@@ -45,7 +55,7 @@ class H2HService:
             logger.error(f"Erreur lors du calcul des statistiques H2H (buts): {str(e)}", exc_info=True)
             raise
 
-    def _get_h2h_matches(self, params: Dict[str, Any]) -> List[Dict]:
+    def _get_h2h_matches(self, params: Dict[str, Any]) -> List[MatchRecord]:
         """Récupère les matchs H2H filtrés."""
         try:
             team1_id = int(params['team1_id'])
@@ -65,38 +75,26 @@ class H2HService:
 
             logger.info(f"Récupération des matchs H2H entre {team1_id} et {team2_id} avec location: {location.value}")
 
-            # Appliquer d'abord tous les filtres via FilterFactory
-            filter_params = params.copy()
-            # Retirer les paramètres H2H spécifiques pour éviter les conflits
-            filter_params.pop('team1_id', None)
-            filter_params.pop('team2_id', None)
-            filter_params.pop('h2h_location', None)
-            
-            filter_instance = FilterFactory.create_filter(**filter_params)
-            filtered_matches = filter_instance.apply(self.matches_ref)
-            filtered_matches = self._filter_finished_matches(filtered_matches)
-
-            # Ensuite appliquer le filtre H2H avec la location
-            h2h_matches = []
-            for match in filtered_matches:
-                home_id = match['teams']['home']['id']
-                away_id = match['teams']['away']['id']
-
-                # Vérifier la configuration selon l'enum
-                if location == H2HLocation.TEAM1_HOME:
-                    if not (home_id == team1_id and away_id == team2_id):
-                        continue
-                elif location == H2HLocation.TEAM1_AWAY:
-                    if not (home_id == team2_id and away_id == team1_id):
-                        continue
-                else:  # H2HLocation.ANY
-                    if not ((home_id == team1_id and away_id == team2_id) or
-                           (home_id == team2_id and away_id == team1_id)):
-                        continue
-                h2h_matches.append(match)
-
-            # Tri chronologique
-            sorted_matches = sorted(h2h_matches, key=lambda m: m['metadata']['date'])
+            # Les séquences portent sur les confrontations : N dernières (ou premières) parmi
+            # les matchs H2H retenus, quel que soit le chemin de lecture
+            sequence_params = {key: params[key] for key in ('last_matches', 'first_matches') if params.get(key)}
+            params = {key: value for key, value in params.items() if key not in sequence_params}
+
+            store = ColumnarMatchStore.for_reference(self.matches_ref)
+            entries = FixtureIndex().get_h2h_entries(team1_id, team2_id) if store is None else None
+            if store is not None:
+                h2h_matches = self._get_columnar_h2h_matches(store, params, location)
+            elif entries:
+                h2h_matches = self._get_indexed_h2h_matches(entries, params, team1_id, team2_id, location)
+            else:
+                logger.warning(f"Aucune entrée d'index H2H pour {team1_id}/{team2_id}, parcours complet")
+                h2h_matches = self._scan_h2h_matches(params, team1_id, team2_id, location)
+
+            if sequence_params:
+                h2h_matches = FilterFactory.create_filter(plan=False, **sequence_params).select(h2h_matches)
+
+            # Tri chronologique, matchs sans date en fin de liste
+            sorted_matches = sorted(h2h_matches, key=lambda m: (m.kickoff is None, m.kickoff or 0))
             logger.info(f"Matchs H2H trouvés: {len(sorted_matches)}")
             return sorted_matches
 
@@ -104,14 +102,82 @@ class H2HService:
             logger.error(f"Erreur lors de la récupération des matchs H2H: {e}")
             return []
 
-    def _filter_finished_matches(self, matches: List[Dict]) -> List[Dict]:
-        """Filtre pour ne garder que les matchs terminés."""
-        return [
-            match for match in matches
-            if match.get('metadata', {}).get('status') in self.FINISHED_STATUSES
+    def _scan_h2h_matches(self, params: Dict[str, Any], team1_id: int, team2_id: int,
+                          location: H2HLocation) -> List[MatchRecord]:
+        """Parcourt tous les matchs filtrés pour trouver les confrontations (sans index H2H)."""
+        # Appliquer d'abord tous les filtres via FilterFactory
+        filter_params = params.copy()
+        # Retirer les paramètres H2H spécifiques pour éviter les conflits
+        filter_params.pop('team1_id', None)
+        filter_params.pop('team2_id', None)
+        filter_params.pop('h2h_location', None)
+        
+        filter_instance = FilterFactory.create_filter(**filter_params)
+        filtered_matches = filter_instance.apply(self.matches_ref)
+        filtered_matches = self._filter_finished_matches(filtered_matches)
+
+        # Ensuite appliquer le filtre H2H avec la location
+        h2h_matches = []
+        for match in filtered_matches:
+            home_id = match.home_id
+            away_id = match.away_id
+
+            # Vérifier la configuration selon l'enum
+            if location == H2HLocation.TEAM1_HOME:
+                if not (home_id == team1_id and away_id == team2_id):
+                    continue
+            elif location == H2HLocation.TEAM1_AWAY:
+                if not (home_id == team2_id and away_id == team1_id):
+                    continue
+            else:  # H2HLocation.ANY
+                if not ((home_id == team1_id and away_id == team2_id) or
+                       (home_id == team2_id and away_id == team1_id)):
+                    continue
+            h2h_matches.append(match)
+
+        return h2h_matches
+
+    def _get_columnar_h2h_matches(self, store: ColumnarMatchStore, params: Dict[str, Any],
+                                  location: H2HLocation) -> List[MatchRecord]:
+        """Confrontations sélectionnées par masques vectorisés sur les colonnes de l'instantané."""
+        filter_params = dict(params, h2h_location=location)
+        filter_instance = FilterFactory.create_filter(plan=False, **filter_params)
+        return store.records(filter_instance.filter_store(store))
+
+    def _get_indexed_h2h_matches(self, entries: Dict[str, Dict], params: Dict[str, Any],
+                                 team1_id: int, team2_id: int, location: H2HLocation) -> List[MatchRecord]:
+        """
+        Récupère les confrontations depuis l'index des paires : statut, configuration, saison
+        et ligue sont filtrés sur l'index, les autres filtres sur les seuls matchs récupérés.
+        """
+        h2h_filter = H2HFilter(team1_id, team2_id, location)
+        season = params.get('season')
+        league_id = params.get('league_id')
+
+        selected = [
+            (fixture_id, entry) for fixture_id, entry in entries.items()
+            if entry.get('status') in self.FINISHED_STATUSES
+            and h2h_filter.matches_location(entry.get('home'))
+            and (not season or entry.get('season') == int(season))
+            and (not league_id or entry.get('league') == int(league_id))
         ]
+        matches = self._filter_finished_matches([
+            MatchRecord.build(match) for match in h2h_filter.fetch_indexed_matches(self.matches_ref, selected)
+        ])
+
+        # Filtres temporels restants (année, mois, jour, créneau horaire)
+        filter_params = {
+            key: value for key, value in params.items()
+            if key not in ('team1_id', 'team2_id', 'h2h_location', 'season', 'league_id')
+        }
+        filter_instance = FilterFactory.create_filter(plan=False, **filter_params)
+        return [m for m in matches if filter_instance.matches(m)]
+
+    def _filter_finished_matches(self, matches: List[MatchRecord]) -> List[MatchRecord]:
+        """Filtre pour ne garder que les matchs terminés."""
+        return [match for match in matches if match.status in self.FINISHED_STATUSES]
 
-    def _build_results_response(self, matches: List[Dict], params: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_results_response(self, matches: List[MatchRecord], params: Dict[str, Any]) -> Dict[str, Any]:
         """Construit la réponse pour les statistiques de résultats H2H."""
         team1_id = int(params['team1_id'])
         team2_id = int(params['team2_id'])
@@ -130,7 +196,7 @@ class H2HService:
             "metadata": self._build_metadata(matches, params)
         }
 
-    def _build_goals_response(self, matches: List[Dict], params: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_goals_response(self, matches: List[MatchRecord], params: Dict[str, Any]) -> Dict[str, Any]:
         """Construit la réponse pour les statistiques de buts H2H."""
         team1_id = int(params['team1_id'])
         team2_id = int(params['team2_id'])
@@ -139,9 +205,7 @@ class H2HService:
         team1_stats = self._calculate_team_goals_stats(matches, team1_id)
         team2_stats = self._calculate_team_goals_stats(matches, team2_id)
 
-        btts_matches = sum(1 for m in matches 
-                          if m['score']['fulltime']['home'] > 0 
-                          and m['score']['fulltime']['away'] > 0)
+        btts_matches = sum(1 for m in matches if m.ft_home > 0 and m.ft_away > 0)
         
         return {
             "head_to_head": {
@@ -160,7 +224,7 @@ class H2HService:
             "metadata": self._build_metadata(matches, params)
         }
 
-    def _calculate_team_stats(self, matches: List[Dict], team_id: int) -> Dict[str, Any]:
+    def _calculate_team_stats(self, matches: List[MatchRecord], team_id: int) -> Dict[str, Any]:
         """Calcule les statistiques de résultats pour une équipe."""
         total_matches = len(matches)
         if total_matches == 0:
@@ -175,9 +239,9 @@ class H2HService:
         away_wins = 0
 
         for match in matches:
-            is_home = match['teams']['home']['id'] == team_id
-            team_score = match['score']['fulltime']['home' if is_home else 'away']
-            opp_score = match['score']['fulltime']['away' if is_home else 'home']
+            is_home = match.home_id == team_id
+            team_score = match.goals_for(team_id)
+            opp_score = match.goals_against(team_id)
 
             goals_for += team_score
             goals_against += opp_score
@@ -211,7 +275,7 @@ class H2HService:
             }
         }
 
-    def _calculate_team_goals_stats(self, matches: List[Dict], team_id: int) -> Dict[str, Any]:
+    def _calculate_team_goals_stats(self, matches: List[MatchRecord], team_id: int) -> Dict[str, Any]:
         """Calcule les statistiques de buts pour une équipe."""
         total_matches = len(matches)
         if total_matches == 0:
@@ -223,9 +287,8 @@ class H2HService:
         failed_to_score = 0
 
         for match in matches:
-            is_home = match['teams']['home']['id'] == team_id
-            team_score = match['score']['fulltime']['home' if is_home else 'away']
-            opp_score = match['score']['fulltime']['away' if is_home else 'home']
+            team_score = match.goals_for(team_id)
+            opp_score = match.goals_against(team_id)
 
             goals_scored += team_score
             goals_conceded += opp_score
@@ -249,7 +312,7 @@ class H2HService:
             }
         }
 
-    def _calculate_thresholds(self, matches: List[Dict]) -> Dict[str, Any]:
+    def _calculate_thresholds(self, matches: List[MatchRecord]) -> Dict[str, Any]:
         """Calcule les statistiques de seuils de buts."""
         thresholds = [0.5, 1.5, 2.5, 3.5, 4.5]
         total_matches = len(matches)
@@ -259,10 +322,7 @@ class H2HService:
 
         results = {}
         for threshold in thresholds:
-            over_count = sum(
-                1 for m in matches
-                if m['score']['fulltime']['home'] + m['score']['fulltime']['away'] > threshold
-            )
+            over_count = sum(1 for m in matches if m.total_goals() > threshold)
 
             results[f"over_{str(threshold).replace('.', '_')}"] = {
                 "matches": over_count,
@@ -275,33 +335,30 @@ class H2HService:
 
         return results
 
-    def _get_last_matches_info(self, matches: List[Dict], team1_id: int, limit: int = 5) -> List[Dict]:
+    def _get_last_matches_info(self, matches: List[MatchRecord], team1_id: int, limit: int = 5) -> List[Dict]:
         """Récupère les informations des derniers matchs."""
         last_matches = matches[-limit:] if matches else []
         return [
             {
-                "date": match['metadata']['date'],
+                "date": match.date,
                 "home_team": {
-                    "id": match['teams']['home']['id'],
-                    "score": match['score']['fulltime']['home']
+                    "id": match.home_id,
+                    "score": match.ft_home
                 },
                 "away_team": {
-                    "id": match['teams']['away']['id'],
-                    "score": match['score']['fulltime']['away']
+                    "id": match.away_id,
+                    "score": match.ft_away
                 },
                 "winner": "team1" if (
-                    (match['teams']['home']['id'] == team1_id and 
-                     match['score']['fulltime']['home'] > match['score']['fulltime']['away']) or
-                    (match['teams']['away']['id'] == team1_id and 
-                     match['score']['fulltime']['away'] > match['score']['fulltime']['home'])
+                    match.goals_for(team1_id) > match.goals_against(team1_id)
                 ) else "team2" if (
-                    match['score']['fulltime']['home'] != match['score']['fulltime']['away']
+                    match.ft_home != match.ft_away
                 ) else "draw"
             }
             for match in last_matches
         ]
 
-    def _build_metadata(self, matches: List[Dict], params: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_metadata(self, matches: List[MatchRecord], params: Dict[str, Any]) -> Dict[str, Any]:
         """Construit les métadonnées."""
         h2h_location = params.get('h2h_location')
         if h2h_location:
@@ -319,7 +376,7 @@ class H2HService:
             'period': self._get_period_info(matches)
         }
 
-    def _get_period_info(self, matches: List[Dict]) -> Dict[str, Any]:
+    def _get_period_info(self, matches: List[MatchRecord]) -> Dict[str, Any]:
         """Calcule les informations de période."""
         if not matches:
             return {
@@ -330,11 +387,7 @@ class H2HService:
             }
 
         try:
-            timestamps = [
-                datetime.fromisoformat(m.get('metadata', {}).get('date', '').replace("Z", "+00:00")).timestamp()
-                for m in matches
-                if m.get('metadata', {}).get('date')
-            ]
+            timestamps = [m.kickoff for m in matches if m.kickoff is not None]
 
             if not timestamps:
                 return {
@@ -0,0 +1,130 @@
+from typing import Any, Dict, List, Optional
+from datetime import timezone
+from django.db.models import Case, Count, F, Max, Min, Q, QuerySet, Sum, When
+from django.db.models.functions import ExtractIsoWeekDay, ExtractMonth, ExtractYear, TruncTime
+from loader.models import Fixture
+from .filters.game_time import GameTimeFilter
+from .filters.team import TeamLocation
+import logging
+
+logger = logging.getLogger(__name__)
+
+class FixtureQueryBackend:
+    """
+    Calcul des métriques par agrégats SQL (Count/Sum/Case) sur le miroir relationnel
+    des matchs (loader.models.Fixture), activé par METRICS_BACKEND='orm'.
+
+    Les filtres de dates et d'horaires portent sur l'heure UTC du coup d'envoi, comme
+    les filtres Firebase qui lisent la date ISO des métadonnées.
+    """
+
+    FINISHED_STATUSES = {'FT', 'AET', 'PEN'}
+
+    def get_queryset(self, **params) -> QuerySet:
+        """Retourne les matchs terminés correspondant aux paramètres de FilterFactory."""
+        fixtures = Fixture.objects.filter(
+            status__in=self.FINISHED_STATUSES,
+            ft_home__isnull=False,
+            ft_away__isnull=False
+        )
+
+        if params.get('team_id'):
+            team_id = int(params['team_id'])
+            location = params.get('location', TeamLocation.ALL)
+            if location == TeamLocation.HOME:
+                fixtures = fixtures.filter(home_team_id=team_id)
+            elif location == TeamLocation.AWAY:
+                fixtures = fixtures.filter(away_team_id=team_id)
+            else:
+                fixtures = fixtures.filter(Q(home_team_id=team_id) | Q(away_team_id=team_id))
+
+        if params.get('league_id'):
+            fixtures = fixtures.filter(league_id=params['league_id'])
+        if params.get('season'):
+            fixtures = fixtures.filter(season=params['season'])
+
+        if params.get('year'):
+            fixtures = fixtures.annotate(kickoff_year=ExtractYear('kickoff', tzinfo=timezone.utc)).filter(
+                kickoff_year=params['year']
+            )
+            if params.get('month'):
+                fixtures = fixtures.annotate(kickoff_month=ExtractMonth('kickoff', tzinfo=timezone.utc)).filter(
+                    kickoff_month=params['month']
+                )
+
+        if params.get('weekday'):
+            # ISO : lundi = 1 ... dimanche = 7 (Weekday : lundi = 0)
+            fixtures = fixtures.annotate(kickoff_weekday=ExtractIsoWeekDay('kickoff', tzinfo=timezone.utc)).filter(
+                kickoff_weekday=params['weekday'].value + 1
+            )
+
+        if params.get('game_time'):
+            start_time, end_time = GameTimeFilter(params['game_time']).get_time_range(params['game_time'])
+            fixtures = fixtures.annotate(kickoff_time=TruncTime('kickoff', tzinfo=timezone.utc)).filter(
+                kickoff_time__gte=start_time,
+                kickoff_time__lte=end_time
+            )
+
+        # Séquences : les N derniers / premiers matchs, sélectionnés par l'index du coup d'envoi
+        if params.get('last_matches'):
+            ids = list(fixtures.order_by('-kickoff').values_list('id', flat=True)[:int(params['last_matches'])])
+            fixtures = Fixture.objects.filter(id__in=ids)
+        elif params.get('first_matches'):
+            ids = list(fixtures.order_by('kickoff').values_list('id', flat=True)[:int(params['first_matches'])])
+            fixtures = Fixture.objects.filter(id__in=ids)
+
+        return fixtures
+
+    def get_period(self, fixtures: QuerySet) -> Dict[str, Any]:
+        """Nombre de matchs et bornes du coup d'envoi, en une requête."""
+        return fixtures.aggregate(matches=Count('id'), start=Min('kickoff'), end=Max('kickoff'))
+
+    def get_league_stats(self, fixtures: QuerySet) -> Dict[str, int]:
+        """Résultats et buts d'un ensemble de matchs, en une requête."""
+        stats = fixtures.aggregate(
+            matches=Count('id'),
+            home_wins=Count('id', filter=Q(ft_home__gt=F('ft_away'))),
+            away_wins=Count('id', filter=Q(ft_home__lt=F('ft_away'))),
+            draws=Count('id', filter=Q(ft_home=F('ft_away'))),
+            goals=Sum(F('ft_home') + F('ft_away')),
+            btts=Count('id', filter=Q(ft_home__gt=0, ft_away__gt=0)),
+            clean_sheets=Count('id', filter=Q(ft_home=0) | Q(ft_away=0))
+        )
+        stats['goals'] = stats['goals'] or 0
+        return stats
+
+    def get_team_stats(self, fixtures: QuerySet, team_id: int, side: Optional[str] = None) -> Dict[str, int]:
+        """
+        Statistiques d'une équipe (toutes positions, ou side='home'/'away'), en une requête :
+        buts marqués et encaissés sont exprimés du point de vue de l'équipe par Case/When.
+        """
+        if side == 'home':
+            fixtures = fixtures.filter(home_team_id=team_id)
+        elif side == 'away':
+            fixtures = fixtures.filter(away_team_id=team_id)
+
+        stats = fixtures.annotate(
+            goals_for=Case(When(home_team_id=team_id, then=F('ft_home')), default=F('ft_away')),
+            goals_against=Case(When(home_team_id=team_id, then=F('ft_away')), default=F('ft_home'))
+        ).aggregate(
+            matches=Count('id'),
+            wins=Count('id', filter=Q(goals_for__gt=F('goals_against'))),
+            draws=Count('id', filter=Q(goals_for=F('goals_against'))),
+            losses=Count('id', filter=Q(goals_for__lt=F('goals_against'))),
+            total_goals_for=Sum('goals_for'),
+            total_goals_against=Sum('goals_against'),
+            clean_sheets=Count('id', filter=Q(goals_against=0)),
+            failed_to_score=Count('id', filter=Q(goals_for=0)),
+            btts=Count('id', filter=Q(goals_for__gt=0, goals_against__gt=0))
+        )
+        stats['goals_for'] = stats.pop('total_goals_for') or 0
+        stats['goals_against'] = stats.pop('total_goals_against') or 0
+        return stats
+
+    def get_threshold_counts(self, fixtures: QuerySet, thresholds: List[float]) -> Dict[float, int]:
+        """Nombre de matchs au-dessus de chaque seuil de buts, en une requête."""
+        counts = fixtures.annotate(total_goals=F('ft_home') + F('ft_away')).aggregate(**{
+            f'over_{index}': Count('id', filter=Q(total_goals__gt=threshold))
+            for index, threshold in enumerate(thresholds)
+        })
+        return {threshold: counts[f'over_{index}'] for index, threshold in enumerate(thresholds)}
@@ -0,0 +1,128 @@
+from typing import Dict, List, Optional, Union
+from datetime import datetime, timezone
+from loader.summaries import MatchSummaries
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MatchRecord:
+    """
+    Match décodé une seule fois à la récupération : date analysée, équipes et scores à plat,
+    lus ensuite par les filtres, les séquences et les calculs de métriques sans parcourir
+    de dictionnaires imbriqués.
+
+    Construit directement depuis le résumé compact (from_summary) pour les sources
+    match_summaries, ou depuis un nœud de l'arbre 'matches' (from_match). Jour, heure,
+    année et mois sont ceux de la date ISO telle qu'écrite dans les métadonnées.
+    """
+
+    __slots__ = (
+        'fixture_id', 'date', 'kickoff', 'year', 'month', 'weekday', 'seconds',
+        'status', 'home_id', 'away_id', 'ft_home', 'ft_away', 'ht_home', 'ht_away'
+    )
+
+    def __init__(self, fixture_id: Optional[int], date: Optional[str], match_date: Optional[datetime],
+                 status: Optional[str], home_id: Optional[int], away_id: Optional[int],
+                 ft_home: Optional[int] = None, ft_away: Optional[int] = None,
+                 ht_home: Optional[int] = None, ht_away: Optional[int] = None):
+        self.fixture_id = fixture_id
+        self.date = date
+        self.status = status
+        self.home_id = home_id
+        self.away_id = away_id
+        self.ft_home = ft_home
+        self.ft_away = ft_away
+        self.ht_home = ht_home
+        self.ht_away = ht_away
+
+        if match_date is None:
+            self.kickoff = self.year = self.month = self.weekday = self.seconds = None
+        else:
+            self.kickoff = match_date.timestamp()
+            self.year = match_date.year
+            self.month = match_date.month
+            self.weekday = match_date.weekday()
+            self.seconds = match_date.hour * 3600 + match_date.minute * 60 + match_date.second
+
+    @staticmethod
+    def parse_date(date: Optional[str]) -> Optional[datetime]:
+        """Date du match (ISO 8601 des métadonnées), None si absente ou invalide."""
+        if not date:
+            return None
+        try:
+            return datetime.fromisoformat(date.replace("Z", "+00:00"))
+        except ValueError:
+            logger.error(f"Date de match invalide: {date}")
+            return None
+
+    @classmethod
+    def from_match(cls, match: Dict) -> 'MatchRecord':
+        """Construit un enregistrement à partir d'un nœud de match (metadata, teams, score)."""
+        metadata = match.get('metadata') or {}
+        teams = match.get('teams') or {}
+        score = match.get('score') or {}
+        fulltime = score.get('fulltime') or {}
+        halftime = score.get('halftime') or {}
+        fixture_id = metadata.get('fixture_id')
+        home_id = (teams.get('home') or {}).get('id')
+        away_id = (teams.get('away') or {}).get('id')
+        date = metadata.get('date')
+
+        return cls(
+            int(fixture_id) if fixture_id is not None else None,
+            date,
+            cls.parse_date(date),
+            metadata.get('status'),
+            int(home_id) if home_id is not None else None,
+            int(away_id) if away_id is not None else None,
+            fulltime.get('home'),
+            fulltime.get('away'),
+            halftime.get('home'),
+            halftime.get('away')
+        )
+
+    @classmethod
+    def from_summary(cls, fixture_id: Union[int, str], summary: Union[List, Dict]) -> 'MatchRecord':
+        """
+        Construit un enregistrement à partir d'un résumé match_summaries (voir MatchSummaries),
+        sans passer par un nœud décodé ni par la date ISO.
+        """
+        timestamp, status_code, home_id, away_id, ft_home, ft_away, ht_home, ht_away = MatchSummaries.unpack(summary)
+        match_date = datetime.fromtimestamp(timestamp, tz=timezone.utc) if timestamp is not None else None
+
+        return cls(
+            int(fixture_id),
+            match_date.isoformat() if match_date is not None else None,
+            match_date,
+            MatchSummaries.STATUS_CODES[status_code] if status_code is not None else None,
+            home_id,
+            away_id,
+            ft_home,
+            ft_away,
+            ht_home,
+            ht_away
+        )
+
+    @classmethod
+    def build(cls, match: Union['MatchRecord', Dict]) -> 'MatchRecord':
+        """Retourne l'enregistrement d'un match lu sur une référence (déjà décodé ou nœud de match)."""
+        return match if isinstance(match, cls) else cls.from_match(match)
+
+    def involves(self, team_id: int) -> bool:
+        return self.home_id == team_id or self.away_id == team_id
+
+    def goals_for(self, team_id: int) -> int:
+        """Buts marqués par l'équipe (score final)."""
+        return self.ft_home if self.home_id == team_id else self.ft_away
+
+    def goals_against(self, team_id: int) -> int:
+        return self.ft_away if self.home_id == team_id else self.ft_home
+
+    def total_goals(self) -> int:
+        return self.ft_home + self.ft_away
+
+    def __repr__(self) -> str:
+        return (
+            f"MatchRecord({self.fixture_id}, {self.date}, {self.status}, "
+            f"{self.home_id}-{self.away_id}, {self.ft_home}-{self.ft_away})"
+        )
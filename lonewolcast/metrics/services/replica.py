@@ -0,0 +1,200 @@
+from typing import Any, Dict, List, Optional
+from django.conf import settings
+from firebase_admin import db
+from loader.summaries import MatchSummaries
+import threading
+import time
+import uuid
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MatchReplica:
+    """
+    Réplica en mémoire de la projection match_summaries, propre au processus API.
+
+    Le premier événement du listener (put sur '/') fournit le chargement initial ; les
+    événements put/patch suivants sont appliqués au fil de l'eau, avec quelques secondes
+    de retard au plus. Un second listener suit match_summaries_meta : sa version, incrémentée
+    à chaque écriture de la projection et commune à tous les workers, sert de clé au cache
+    des métriques ; son marqueur complete_at indique que la projection est complète. Sans événement depuis METRICS_REPLICA_MAX_IDLE secondes,
+    ou si un listener s'est arrêté, le réplica est considéré comme périmé et les métriques
+    lisent les autres sources.
+
+    Activé par METRICS_REPLICA ; démarré à la première requête de chaque worker.
+    """
+
+    PATH = 'match_summaries'
+
+    _instance: Optional['MatchReplica'] = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, path: str = PATH):
+        self.path = path
+        self.data: Dict[str, Any] = {}
+        self.version = 0
+        self.replica_id = uuid.uuid4().hex[:8]
+        self.meta: Dict[str, Any] = {}
+        self.last_event_at: Optional[float] = None
+        self.lock = threading.Lock()
+        self.ready = threading.Event()
+        self.registration = None
+        self.meta_registration = None
+        self.started_at: Optional[float] = None
+
+    @classmethod
+    def get_instance(cls) -> Optional['MatchReplica']:
+        """Retourne le réplica du processus (démarré au besoin), ou None s'il est désactivé."""
+        if not settings.METRICS_REPLICA:
+            return None
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+                cls._instance.start()
+        return cls._instance
+
+    @classmethod
+    def get_dataset_version(cls) -> Optional[str]:
+        """
+        Version du jeu de données servi par le réplica (None sans réplica prêt et complet, ou périmé).
+        C'est la version partagée match_summaries_meta/version, identique pour tous les
+        workers ; en son absence (projection jamais réécrite depuis), le compteur d'événements
+        du réplica, préfixé de son identifiant car propre au worker.
+        """
+        replica = cls._instance
+        if replica is None or not replica.ready.is_set() or not replica.is_complete() or replica.is_stale():
+            return None
+        with replica.lock:
+            shared_version = replica.meta.get('version')
+            version = replica.version
+        if shared_version is not None:
+            return f"shared:{shared_version}"
+        return f'{replica.replica_id}:{version}'
+
+    def start(self) -> None:
+        logger.info(f"Démarrage du réplica de {self.path}")
+        self.started_at = time.time()
+        self.registration = db.reference(self.path).listen(self.on_event)
+        self.meta_registration = db.reference(MatchSummaries.META_PATH).listen(self.on_meta_event)
+
+    def stop(self) -> None:
+        for registration in (self.registration, self.meta_registration):
+            if registration is not None:
+                registration.close()
+        self.registration = None
+        self.meta_registration = None
+
+    def is_listening(self) -> bool:
+        """Indique si les deux listeners tournent (leur thread s'arrête sur une erreur de connexion)."""
+        return all(
+            registration is not None and registration._thread.is_alive()
+            for registration in (self.registration, self.meta_registration)
+        )
+
+    def is_stale(self) -> bool:
+        """
+        Indique si le réplica ne doit plus être lu : listener arrêté, ou aucun événement depuis
+        plus de METRICS_REPLICA_MAX_IDLE secondes (0 = sans limite).
+        """
+        if not self.is_listening():
+            return True
+        max_idle = settings.METRICS_REPLICA_MAX_IDLE
+        return bool(max_idle) and self.last_event_at is not None and time.time() - self.last_event_at > max_idle
+
+    def wait_ready(self) -> bool:
+        """
+        Attend le chargement initial, au plus METRICS_REPLICA_WAIT secondes après le démarrage :
+        passé ce délai, les requêtes suivantes n'attendent plus et retournent False.
+        """
+        if self.ready.is_set():
+            return True
+        remaining = (self.started_at or time.time()) + settings.METRICS_REPLICA_WAIT - time.time()
+        return self.ready.wait(max(remaining, 0))
+
+    def on_event(self, event: db.Event) -> None:
+        """Applique un événement put/patch du listener au réplica."""
+        parts = [part for part in (event.path or '/').split('/') if part]
+        with self.lock:
+            if event.event_type == 'put':
+                self._set(parts, event.data)
+            elif event.event_type == 'patch':
+                for key, value in (event.data or {}).items():
+                    self._set(parts + [part for part in key.split('/') if part], value)
+            else:
+                return
+            self.version += 1
+            self.last_event_at = time.time()
+
+        if not self.ready.is_set():
+            logger.info(f"Réplica de {self.path} chargé (version {self.version})")
+            self.ready.set()
+
+    def is_complete(self) -> bool:
+        """Indique si la projection répliquée est complète (marqueur écrit par rebuild_indexes)."""
+        with self.lock:
+            return self.meta.get('complete_at') is not None
+
+    def on_meta_event(self, event: db.Event) -> None:
+        """Suit les métadonnées de la projection (match_summaries_meta : version, complete_at)."""
+        parts = [part for part in (event.path or '/').split('/') if part]
+        with self.lock:
+            if event.event_type == 'put' and not parts:
+                meta = dict(event.data) if isinstance(event.data, dict) else {}
+            elif event.event_type == 'put' and len(parts) == 1:
+                meta = {**self.meta, parts[0]: event.data}
+            elif event.event_type == 'patch' and not parts:
+                meta = {**self.meta, **(event.data or {})}
+            else:
+                return
+            self.meta = {key: value for key, value in meta.items() if value is not None}
+            self.last_event_at = time.time()
+
+    def _set(self, parts: List[str], value: Any) -> None:
+        """Remplace (ou supprime si value est None) le nœud désigné par parts."""
+        if not parts:
+            self.data = value if isinstance(value, dict) else {}
+            return
+
+        node = self.data
+        parents = []
+        for part in parts[:-1]:
+            child = node.get(part)
+            if isinstance(child, list):
+                # Un élément de tableau modifié isolément : le tableau devient un objet indexé
+                child = {str(i): item for i, item in enumerate(child) if item is not None}
+                node[part] = child
+            elif not isinstance(child, dict):
+                if value is None:
+                    return
+                child = {}
+                node[part] = child
+            parents.append((node, part))
+            node = child
+
+        if value is None:
+            node.pop(parts[-1], None)
+            # Firebase ne conserve pas les nœuds vides
+            for parent, key in reversed(parents):
+                if parent[key]:
+                    break
+                del parent[key]
+        else:
+            node[parts[-1]] = value
+
+    def read(self, parts: List[str], shallow: bool = False) -> Any:
+        """Lit le réplica comme le nœud Firebase {path}/{parts}."""
+        with self.lock:
+            node: Any = self.data
+            for part in parts:
+                if not isinstance(node, dict) or part not in node:
+                    return None
+                node = node[part]
+            if shallow:
+                return {key: True for key in node} if isinstance(node, dict) else node
+            return self._copy(node)
+
+    def _copy(self, node: Any) -> Any:
+        # Les tableaux de résumés sont remplacés en bloc, jamais modifiés sur place
+        if isinstance(node, dict):
+            return {key: self._copy(value) for key, value in node.items()}
+        return node
@@ -1,8 +1,16 @@
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Union
 from datetime import datetime
 import logging
+from django.conf import settings
 from firebase_admin import db
+from loader.firebase_utils import get_child_keys
+from loader.models import League
 from .filters.factory import FilterFactory
+from .filters.match_sequence import LastMatchesFilter, FirstMatchesFilter
+from .records import MatchRecord
+from .summaries import MatchSummaryReference
+from .orm_backend import FixtureQueryBackend
+from .columnar import ColumnarMatchStore
 from .h2h_service import H2HService
 
 logger = logging.getLogger(__name__)
@@ -13,9 +21,16 @@ class ResultsService:
     FINISHED_STATUSES = {'FT', 'AET', 'PEN'}
 
     def __init__(self):
-        self.matches_ref = db.reference('matches')
+        self._matches_ref = None
         self.h2h_service = H2HService()
 
+    @property
+    def matches_ref(self):
+        """Source de lecture des métriques, résolue à la première utilisation (jamais en mode ORM)."""
+        if self._matches_ref is None:
+            self._matches_ref = MatchSummaryReference.for_metrics()
+        return self._matches_ref
+
     def get_results(self, **params) -> Dict[str, Any]:
         """
         Calcule les métriques de résultats selon les paramètres fournis.
@@ -27,8 +42,18 @@ class ResultsService:
             if params.get('team1_id') and params.get('team2_id'):
                 return self.h2h_service.get_results_stats(**params)
 
-            # Récupération et filtrage initial des matchs
-            filter_instance = FilterFactory.create_filter(**params)
+            if settings.METRICS_BACKEND == 'orm':
+                backend = FixtureQueryBackend()
+                return self._get_results_from_backend(backend, backend.get_queryset(**params), params)
+
+            # Instantané local : masques vectorisés sur les colonnes
+            store = ColumnarMatchStore.for_reference(self.matches_ref)
+            if store is not None:
+                filter_instance = FilterFactory.create_filter(plan=False, **params)
+                return self._get_results_from_backend(store, filter_instance.filter_store(store), params)
+
+            # Récupération et filtrage initial des matchs (sans planificateur sur une source locale)
+            filter_instance = FilterFactory.create_filter(plan=not getattr(self.matches_ref, 'LOCAL', False), **params)
             matches = filter_instance.apply(self.matches_ref)
             filtered_matches = self._filter_finished_matches(matches)
 
@@ -36,16 +61,16 @@ class ResultsService:
             team_id = params.get('team_id')
             if team_id:
                 team_id = int(team_id)
-                filtered_matches = [m for m in filtered_matches 
-                                 if team_id in [m['teams']['home']['id'],
-                                              m['teams']['away']['id']]]
+                filtered_matches = [m for m in filtered_matches if m.involves(team_id)]
 
             # Ensuite on applique le filtre de séquence
             final_matches = self._apply_sequence_filter(filtered_matches, params)
             logger.info(f"Matches après filtrage complet: {len(final_matches)}")
 
             if not final_matches:
-                return self._build_empty_response(params)
+                response = self._build_empty_response(params)
+                response['metadata']['plan'] = filter_instance.describe_plan()
+                return response
 
             # Construction de la réponse selon le type
             if team_id:
@@ -54,46 +79,76 @@ class ResultsService:
                 results = self._build_league_response(final_matches)
 
             results['metadata'] = self._build_metadata(final_matches, params)
+            results['metadata']['plan'] = filter_instance.describe_plan()
             return results
 
         except Exception as e:
             logger.error(f"Erreur lors du calcul des métriques: {str(e)}", exc_info=True)
             raise
 
-    def _apply_sequence_filter(self, matches: List[Dict], params: Dict[str, Any]) -> List[Dict]:
+    def _get_results_from_backend(self, backend: Union[FixtureQueryBackend, ColumnarMatchStore],
+                                  fixtures, params: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Applique les filtres de séquence (last_matches/first_matches).
-        Les matchs sont d'abord triés chronologiquement.
+        Calcule la réponse par agrégats : SQL sur le miroir relationnel (METRICS_BACKEND='orm',
+        fixtures est un QuerySet) ou NumPy sur les colonnes de l'instantané (fixtures est un
+        tableau d'indices). Le chemin d'accès est exposé dans les métadonnées, comme le plan
+        des filtres Firebase.
         """
-        # Tri chronologique
-        sorted_matches = sorted(
-            matches,
-            key=lambda m: datetime.fromisoformat(
-                m.get('metadata', {}).get('date', '').replace("Z", "+00:00")
-            )
+        period = backend.get_period(fixtures)
+        logger.info(f"Matches après filtrage complet ({backend.__class__.__name__}): {period['matches']}")
+        plan = {
+            'access_path': 'orm' if isinstance(backend, FixtureQueryBackend) else 'columnar',
+            'fetched_rows': period['matches']
+        }
+
+        if not period['matches']:
+            response = self._build_empty_response(params)
+            response['metadata']['plan'] = plan
+            return response
+
+        team_id = params.get('team_id')
+        if team_id:
+            results = self._build_aggregate_team_response(backend, fixtures, int(team_id))
+        else:
+            results = self._build_aggregate_league_response(backend, fixtures)
+
+        timestamps = [period['start'].timestamp(), period['end'].timestamp()] if period['start'] else []
+        results['metadata'] = self._build_period_metadata(
+            period['matches'], self._format_period(timestamps), params
         )
+        results['metadata']['plan'] = plan
+        return results
+
+    def _build_aggregate_team_response(self, backend, fixtures, team_id: int) -> Dict[str, Any]:
+        return {
+            "total": self._format_team_stats(backend.get_team_stats(fixtures, team_id)),
+            "home": self._format_team_stats(backend.get_team_stats(fixtures, team_id, 'home')),
+            "away": self._format_team_stats(backend.get_team_stats(fixtures, team_id, 'away'))
+        }
+
+    def _build_aggregate_league_response(self, backend, fixtures) -> Dict[str, Any]:
+        return self._format_league_stats(backend.get_league_stats(fixtures))
 
-        # Application des limites
+    def _apply_sequence_filter(self, matches: List[MatchRecord], params: Dict[str, Any]) -> List[MatchRecord]:
+        """
+        Applique les filtres de séquence (last_matches/first_matches) aux matchs déjà filtrés :
+        sélection des N derniers ou premiers par tas, sans trier l'ensemble.
+        """
         if params.get('last_matches'):
-            limit = int(params['last_matches'])
-            return sorted_matches[-limit:]  # Prendre les N derniers
+            return LastMatchesFilter(params['last_matches']).select(matches)
         elif params.get('first_matches'):
-            limit = int(params['first_matches'])
-            return sorted_matches[:limit]  # Prendre les N premiers
+            return FirstMatchesFilter(params['first_matches']).select(matches)
 
-        return sorted_matches
+        return matches
 
-    def _filter_finished_matches(self, matches: List[Dict]) -> List[Dict]:
+    def _filter_finished_matches(self, matches: List[MatchRecord]) -> List[MatchRecord]:
         """Filtre pour ne garder que les matchs terminés."""
-        return [
-            match for match in matches
-            if match.get('metadata', {}).get('status') in self.FINISHED_STATUSES
-        ]
+        return [match for match in matches if match.status in self.FINISHED_STATUSES]
 
-    def _build_team_response(self, matches: List[Dict], team_id: int) -> Dict[str, Any]:
+    def _build_team_response(self, matches: List[MatchRecord], team_id: int) -> Dict[str, Any]:
         """Construit les statistiques pour une équipe."""
-        home_matches = [m for m in matches if m['teams']['home']['id'] == team_id]
-        away_matches = [m for m in matches if m['teams']['away']['id'] == team_id]
+        home_matches = [m for m in matches if m.home_id == team_id]
+        away_matches = [m for m in matches if m.away_id == team_id]
 
         return {
             "total": self._calculate_aggregate_stats(home_matches + away_matches, team_id),
@@ -101,38 +156,45 @@ class ResultsService:
             "away": self._calculate_position_stats(away_matches, False)
         }
 
-    def _build_league_response(self, matches: List[Dict]) -> Dict[str, Any]:
+    def _build_league_response(self, matches: List[MatchRecord]) -> Dict[str, Any]:
         """Construit les statistiques globales pour une ligue."""
         total_matches = len(matches)
         if total_matches == 0:
             return {"total_matches": 0}
 
-        home_wins = sum(1 for m in matches 
-                       if m['score']['fulltime']['home'] > m['score']['fulltime']['away'])
-        away_wins = sum(1 for m in matches 
-                       if m['score']['fulltime']['home'] < m['score']['fulltime']['away'])
-        draws = sum(1 for m in matches 
-                   if m['score']['fulltime']['home'] == m['score']['fulltime']['away'])
+        home_wins = sum(1 for m in matches if m.ft_home > m.ft_away)
+        away_wins = sum(1 for m in matches if m.ft_home < m.ft_away)
+        draws = sum(1 for m in matches if m.ft_home == m.ft_away)
 
+        return self._format_league_stats({
+            "matches": total_matches,
+            "home_wins": home_wins,
+            "away_wins": away_wins,
+            "draws": draws
+        })
+
+    def _format_league_stats(self, stats: Dict[str, int]) -> Dict[str, Any]:
+        """Met en forme les résultats d'une ligue (comptages Python ou agrégats SQL)."""
+        total_matches = stats['matches']
         return {
             "total_matches": total_matches,
             "results": {
                 "home_wins": {
-                    "count": home_wins,
-                    "percentage": round(home_wins / total_matches * 100, 2)
+                    "count": stats['home_wins'],
+                    "percentage": round(stats['home_wins'] / total_matches * 100, 2)
                 },
                 "away_wins": {
-                    "count": away_wins,
-                    "percentage": round(away_wins / total_matches * 100, 2)
+                    "count": stats['away_wins'],
+                    "percentage": round(stats['away_wins'] / total_matches * 100, 2)
                 },
                 "draws": {
-                    "count": draws,
-                    "percentage": round(draws / total_matches * 100, 2)
+                    "count": stats['draws'],
+                    "percentage": round(stats['draws'] / total_matches * 100, 2)
                 }
             }
         }
 
-    def _calculate_aggregate_stats(self, matches: List[Dict], team_id: int) -> Dict[str, Any]:
+    def _calculate_aggregate_stats(self, matches: List[MatchRecord], team_id: int) -> Dict[str, Any]:
         """Calcule les statistiques agrégées pour une équipe."""
         total_matches = len(matches)
         if total_matches == 0:
@@ -145,9 +207,8 @@ class ResultsService:
         goals_against = 0
 
         for match in matches:
-            is_home = match['teams']['home']['id'] == team_id
-            team_score = match['score']['fulltime']['home' if is_home else 'away']
-            opp_score = match['score']['fulltime']['away' if is_home else 'home']
+            team_score = match.goals_for(team_id)
+            opp_score = match.goals_against(team_id)
 
             goals_for += team_score
             goals_against += opp_score
@@ -159,21 +220,16 @@ class ResultsService:
             else:
                 losses += 1
 
-        points = (wins * 3) + draws
-
-        return {
+        return self._format_team_stats({
             "matches": total_matches,
             "wins": wins,
             "draws": draws,
             "losses": losses,
             "goals_for": goals_for,
-            "goals_against": goals_against,
-            "points": points,
-            "win_percentage": round(wins / total_matches * 100, 2),
-            "points_per_game": round(points / total_matches, 2)
-        }
+            "goals_against": goals_against
+        })
 
-    def _calculate_position_stats(self, matches: List[Dict], is_home: bool) -> Dict[str, Any]:
+    def _calculate_position_stats(self, matches: List[MatchRecord], is_home: bool) -> Dict[str, Any]:
         """Calcule les statistiques pour une position spécifique."""
         total_matches = len(matches)
         if total_matches == 0:
@@ -186,8 +242,8 @@ class ResultsService:
         goals_against = 0
 
         for match in matches:
-            team_score = match['score']['fulltime']['home' if is_home else 'away']
-            opp_score = match['score']['fulltime']['away' if is_home else 'home']
+            team_score = match.ft_home if is_home else match.ft_away
+            opp_score = match.ft_away if is_home else match.ft_home
 
             goals_for += team_score
             goals_against += opp_score
@@ -199,24 +255,42 @@ class ResultsService:
             else:
                 losses += 1
 
-        points = (wins * 3) + draws
-
-        return {
+        return self._format_team_stats({
             "matches": total_matches,
             "wins": wins,
             "draws": draws,
             "losses": losses,
             "goals_for": goals_for,
-            "goals_against": goals_against,
+            "goals_against": goals_against
+        })
+
+    def _format_team_stats(self, stats: Dict[str, int]) -> Dict[str, Any]:
+        """Met en forme les résultats d'une équipe (comptages Python ou agrégats SQL)."""
+        total_matches = stats['matches']
+        if total_matches == 0:
+            return self._get_empty_position_stats()
+
+        points = (stats['wins'] * 3) + stats['draws']
+
+        return {
+            "matches": total_matches,
+            "wins": stats['wins'],
+            "draws": stats['draws'],
+            "losses": stats['losses'],
+            "goals_for": stats['goals_for'],
+            "goals_against": stats['goals_against'],
             "points": points,
-            "win_percentage": round(wins / total_matches * 100, 2) if total_matches > 0 else 0,
-            "points_per_game": round(points / total_matches, 2) if total_matches > 0 else 0
+            "win_percentage": round(stats['wins'] / total_matches * 100, 2),
+            "points_per_game": round(points / total_matches, 2)
         }
 
-    def _build_metadata(self, matches: List[Dict], params: Dict[str, Any]) -> Dict[str, Any]:
+    def _build_metadata(self, matches: List[MatchRecord], params: Dict[str, Any]) -> Dict[str, Any]:
         """Construit les métadonnées de la réponse."""
-        total_matches = len(matches)
+        return self._build_period_metadata(len(matches), self._get_period_info(matches), params)
 
+    def _build_period_metadata(self, total_matches: int, period: Dict[str, Any],
+                               params: Dict[str, Any]) -> Dict[str, Any]:
+        """Construit les métadonnées à partir du nombre de matchs et de la période."""
         metadata = {
             'total_matches': total_matches,
             'filters': {
@@ -224,7 +298,7 @@ class ResultsService:
                 'values': {k: str(v) for k, v in params.items()},
                 'description': FilterFactory.get_filter_description(**params)
             },
-            'period': self._get_period_info(matches)
+            'period': period
         }
 
         if params.get('league_id'):
@@ -233,16 +307,19 @@ class ResultsService:
         return metadata
 
     def _get_league_info(self, league_id: int) -> Dict[str, Any]:
-        """Récupère les informations d'une ligue."""
+        """Récupère les informations d'une ligue (miroir relationnel en mode ORM, sinon Firebase)."""
         try:
-            seasons = self.matches_ref.get(etag=False)
-            if not seasons:
-                return {}
-
-            for season_data in seasons.values():
-                league_key = f'league_{league_id}'
-                if league_key in season_data and 'metadata_league' in season_data[league_key]:
-                    league_data = season_data[league_key]['metadata_league']
+            if settings.METRICS_BACKEND == 'orm':
+                league = League.objects.filter(id=league_id).first()
+                if league is None:
+                    return {}
+                return {'id': league.id, 'name': league.name, 'country': league.country, 'type': league.type}
+
+            # Lecture ciblée de metadata_league, absente de la projection des matchs
+            matches_ref = db.reference('matches')
+            for season_key in get_child_keys(matches_ref):
+                league_data = matches_ref.child(f'{season_key}/league_{league_id}/metadata_league').get(etag=False)
+                if league_data:
                     return {
                         'id': league_data.get('id'),
                         'name': league_data.get('name'),
@@ -255,44 +332,18 @@ class ResultsService:
             logger.error(f"Erreur lors de la récupération des infos de la ligue: {e}")
             return {}
 
-    def _get_period_info(self, matches: List[Dict]) -> Dict[str, Any]:
+    def _get_period_info(self, matches: List[MatchRecord]) -> Dict[str, Any]:
         """Calcule les informations de période pour les matchs."""
-        if not matches:
-            return {
-                "start": None,
-                "end": None,
-                "start_formatted": None,
-                "end_formatted": None
-            }
-
         try:
-            timestamps = []
-            for match in matches:
-                date_str = match.get('metadata', {}).get('date')
-                if date_str:
-                    dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
-                    timestamps.append(dt.timestamp())
-
-            if not timestamps:
-                return {
-                    "start": None,
-                    "end": None,
-                    "start_formatted": None,
-                    "end_formatted": None
-                }
-
-            min_ts = min(timestamps)
-            max_ts = max(timestamps)
-
-            return {
-                "start": min_ts,
-                "end": max_ts,
-                "start_formatted": datetime.fromtimestamp(min_ts).strftime('%Y-%m-%d'),
-                "end_formatted": datetime.fromtimestamp(max_ts).strftime('%Y-%m-%d')
-            }
+            return self._format_period([match.kickoff for match in matches if match.kickoff is not None])
 
         except Exception as e:
             logger.error(f"Erreur lors du calcul de la période: {e}")
+            return self._format_period([])
+
+    def _format_period(self, timestamps: List[float]) -> Dict[str, Any]:
+        """Met en forme la période couverte par des coups d'envoi (timestamps)."""
+        if not timestamps:
             return {
                 "start": None,
                 "end": None,
@@ -300,6 +351,16 @@ class ResultsService:
                 "end_formatted": None
             }
 
+        min_ts = min(timestamps)
+        max_ts = max(timestamps)
+
+        return {
+            "start": min_ts,
+            "end": max_ts,
+            "start_formatted": datetime.fromtimestamp(min_ts).strftime('%Y-%m-%d'),
+            "end_formatted": datetime.fromtimestamp(max_ts).strftime('%Y-%m-%d')
+        }
+
     def _get_empty_position_stats(self) -> Dict[str, Any]:
         """Retourne des statistiques vides pour une position."""
         return {
@@ -0,0 +1,180 @@
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+from django.conf import settings
+from firebase_admin import db
+from loader.firebase_utils import iter_league_keys
+from loader.summaries import MatchSummaries
+import json
+import os
+import threading
+import time
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class MatchSnapshot:
+    """
+    Instantané local et en colonnes des résumés de matchs (match_summaries).
+
+    {METRICS_SNAPSHOT_DIR}/matches.npy : tableau structuré (une ligne par match), chargé en
+    mémoire partagée (mmap, lecture seule) par tous les workers ;
+    {METRICS_SNAPSHOT_DIR}/metadata.json : version, date de création et nombre de matchs.
+
+    Les valeurs absentes (score d'un match non joué...) sont codées -1.
+    """
+
+    DTYPE = np.dtype([
+        ('fixture_id', 'i8'),
+        ('season', 'i4'),
+        ('league', 'i4'),
+        ('timestamp', 'i8'),
+        ('status', 'i2'),
+        ('home_id', 'i4'),
+        ('away_id', 'i4'),
+        ('ft_home', 'i2'),
+        ('ft_away', 'i2'),
+        ('ht_home', 'i2'),
+        ('ht_away', 'i2'),
+    ])
+    MISSING = -1
+    DATA_FILE = 'matches.npy'
+    METADATA_FILE = 'metadata.json'
+
+    _cache: Dict[str, 'MatchSnapshot'] = {}
+    _cache_lock = threading.Lock()
+
+    def __init__(self, data: np.ndarray, metadata: Dict[str, Any]):
+        self.data = data
+        self.metadata = metadata
+
+    @classmethod
+    def get_directory(cls, directory: Optional[str] = None) -> str:
+        return str(directory or settings.METRICS_SNAPSHOT_DIR)
+
+    @classmethod
+    def build(cls, directory: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Exporte la projection match_summaries vers l'instantané local ; retourne ses métadonnées.
+        Lève ValueError si la projection est absente, incomplète ou vide : l'instantané existant
+        est conservé.
+        """
+        if not MatchSummaries().is_complete():
+            raise ValueError("Projection match_summaries incomplète (lancer rebuild_indexes), instantané non écrit")
+
+        summaries_ref = db.reference('match_summaries')
+        rows = []
+        for season_key, league_key in iter_league_keys(summaries_ref):
+            season = int(season_key.replace('season_', ''))
+            league_id = int(league_key.replace('league_', ''))
+            for fixture_key, summary in (summaries_ref.child(f'{season_key}/{league_key}').get() or {}).items():
+                if isinstance(summary, dict):
+                    summary = [summary.get(str(i)) for i in range(len(MatchSummaries.FIELDS))]
+                values = list(summary) + [None] * (len(MatchSummaries.FIELDS) - len(summary))
+                rows.append((
+                    int(fixture_key.replace('fixture_', '')), season, league_id,
+                    *(cls.MISSING if value is None else value for value in values)
+                ))
+
+        if not rows:
+            raise ValueError("Projection match_summaries absente ou vide (lancer rebuild_indexes), instantané non écrit")
+
+        data = np.array(rows, dtype=cls.DTYPE)
+        data.sort(order=['season', 'league', 'timestamp'])
+        return cls.write(data, directory)
+
+    @classmethod
+    def write(cls, data: np.ndarray, directory: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Écrit l'instantané de façon atomique : les workers qui ont déjà chargé l'ancien
+        fichier continuent de le lire jusqu'à leur prochain rechargement.
+        """
+        directory = cls.get_directory(directory)
+        os.makedirs(directory, exist_ok=True)
+        created_at = datetime.now()
+        metadata = {
+            'version': created_at.strftime('%Y%m%d%H%M%S%f'),
+            'created_at': created_at.isoformat(),
+            'created_ts': created_at.timestamp(),
+            'count': int(len(data)),
+            'source': 'match_summaries'
+        }
+
+        data_path = os.path.join(directory, cls.DATA_FILE)
+        tmp_path = f'{data_path}.{os.getpid()}.tmp.npy'
+        np.save(tmp_path, data)
+        os.replace(tmp_path, data_path)
+
+        metadata_path = os.path.join(directory, cls.METADATA_FILE)
+        with open(f'{metadata_path}.tmp', 'w') as f:
+            json.dump(metadata, f)
+        os.replace(f'{metadata_path}.tmp', metadata_path)
+        return metadata
+
+    @classmethod
+    def load(cls, directory: Optional[str] = None) -> Optional['MatchSnapshot']:
+        """
+        Retourne l'instantané courant (partagé par les threads du processus), rechargé
+        lorsque sa version change ; None s'il n'existe pas.
+        """
+        directory = cls.get_directory(directory)
+        metadata_path = os.path.join(directory, cls.METADATA_FILE)
+        try:
+            with open(metadata_path) as f:
+                metadata = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        with cls._cache_lock:
+            snapshot = cls._cache.get(directory)
+            if snapshot is None or snapshot.metadata.get('version') != metadata.get('version'):
+                data = np.load(os.path.join(directory, cls.DATA_FILE), mmap_mode='r')
+                snapshot = cls(data, metadata)
+                cls._cache[directory] = snapshot
+                logger.info(f"Instantané des matchs chargé : {metadata.get('count')} matchs (version {metadata.get('version')})")
+            return snapshot
+
+    def age(self) -> float:
+        """Âge de l'instantané en secondes."""
+        return time.time() - self.metadata.get('created_ts', 0)
+
+    def select(self, season: Optional[int] = None, league_id: Optional[int] = None,
+               fixture_id: Optional[int] = None) -> np.ndarray:
+        """Retourne les lignes correspondant aux critères (masque vectorisé)."""
+        mask = np.ones(len(self.data), dtype=bool)
+        if season is not None:
+            mask &= self.data['season'] == season
+        if league_id is not None:
+            mask &= self.data['league'] == league_id
+        if fixture_id is not None:
+            mask &= self.data['fixture_id'] == fixture_id
+        return self.data[mask]
+
+    def to_summary(self, row: tuple) -> List[Optional[int]]:
+        """Convertit une ligne (tuple du tableau structuré) en résumé au format de match_summaries."""
+        return [None if value == self.MISSING else int(value) for value in row[3:]]
+
+    def read(self, parts: List[str], shallow: bool = False) -> Any:
+        """Lit l'instantané comme le nœud Firebase match_summaries/{season_X}/{league_Y}/{fixture_Z}."""
+        try:
+            criteria = [int(part.rsplit('_', 1)[-1]) for part in parts]
+        except ValueError:
+            return None
+        rows = self.select(*criteria).tolist()
+
+        if len(parts) == 3:
+            return self.to_summary(rows[0]) if rows else None
+
+        tree: Dict[str, Any] = {}
+        for row in rows:
+            fixture_id, season, league_id = row[:3]
+            tree.setdefault(f'season_{season}', {}).setdefault(f'league_{league_id}', {})[
+                f'fixture_{fixture_id}'
+            ] = True if shallow and len(parts) == 2 else self.to_summary(row)
+
+        node = tree
+        for part in parts:
+            node = node.get(part, {})
+        if not node:
+            return None
+        return {key: True for key in node} if shallow else node
@@ -0,0 +1,142 @@
+from typing import Any, Dict, List, Optional, Tuple, Union
+from django.conf import settings
+from firebase_admin import db
+from loader.summaries import MatchSummaries
+from .records import MatchRecord
+from .replica import MatchReplica
+from .snapshot import MatchSnapshot
+import copy
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+class MatchSummaryReference:
+    """
+    Référence en lecture seule sur la projection match_summaries, qui expose la forme de
+    l'arbre 'matches' attendue par les filtres :
+    season_{s}/league_{l}/{metadata_season, fixtures/fixture_{id}}.
+
+    Les matchs sont décodés directement en MatchRecord, limités aux champs de la
+    projection (date, statut, équipes, scores).
+    """
+
+    COMPLETE_TTL = 300  # Secondes pendant lesquelles le marqueur complete_at lu est réutilisé
+    LOCAL = False  # Source en mémoire : les filtres la parcourent sans planificateur ni index Firebase
+
+    _complete: Optional[Tuple[float, bool]] = None
+    _complete_lock = threading.Lock()
+
+    def __init__(self, parts: Optional[List[str]] = None):
+        self.parts = parts or []
+
+    @classmethod
+    def is_projection_complete(cls) -> bool:
+        """Marqueur match_summaries_meta/complete_at, lu au plus une fois par COMPLETE_TTL et par processus."""
+        now = time.time()
+        with cls._complete_lock:
+            if cls._complete is None or now - cls._complete[0] >= cls.COMPLETE_TTL:
+                cls._complete = (now, MatchSummaries().is_complete())
+            return cls._complete[1]
+
+    @classmethod
+    def for_metrics(cls) -> Union['MatchSummaryReference', db.Reference]:
+        """
+        Retourne la source de lecture des métriques : le réplica en mémoire s'il est activé
+        (METRICS_REPLICA), chargé, complet et à jour (METRICS_REPLICA_MAX_IDLE), sinon
+        l'instantané local s'il est non vide et assez récent (METRICS_SNAPSHOT_MAX_AGE), sinon
+        la projection si elle est complète (match_summaries_meta/complete_at), sinon l'arbre
+        'matches'.
+        """
+        replica = MatchReplica.get_instance()
+        if replica is not None:
+            if not replica.wait_ready():
+                logger.warning("Réplica match_summaries non chargé, lecture des autres sources")
+            elif not replica.is_complete():
+                logger.warning("Projection match_summaries incomplète (rebuild_indexes non lancé), lecture des autres sources")
+            elif replica.is_stale():
+                logger.warning("Réplica match_summaries périmé (listener arrêté ou sans événement), lecture des autres sources")
+            else:
+                return MatchReplicaReference(replica)
+        if settings.METRICS_SNAPSHOT_MAX_AGE:
+            snapshot = MatchSnapshot.load()
+            # Un instantané sans matchs (projection vide lors de sa construction) est ignoré
+            if (snapshot is not None and snapshot.metadata.get('count')
+                    and snapshot.age() <= settings.METRICS_SNAPSHOT_MAX_AGE):
+                return MatchSnapshotReference(snapshot)
+        if cls.is_projection_complete():
+            return cls()
+        logger.warning("Projection match_summaries absente ou incomplète, lecture de l'arbre 'matches'")
+        return db.reference('matches')
+
+    def child(self, path: str) -> 'MatchSummaryReference':
+        reference = copy.copy(self)
+        reference.parts = self.parts + [part for part in str(path).split('/') if part]
+        return reference
+
+    def _read(self, parts: List[str], shallow: bool) -> Any:
+        """Lit le nœud match_summaries/{parts} (saison, ligue, match)."""
+        return db.reference('/'.join(['match_summaries'] + parts)).get(shallow=shallow)
+
+    def get(self, etag: bool = False, shallow: bool = False) -> Any:
+        # season_{s}/league_{l}/fixtures/fixture_{id} -> match_summaries/season_{s}/league_{l}/fixture_{id}
+        depth = len(self.parts)
+        if depth > 4 or (depth >= 3 and self.parts[2] != 'fixtures'):
+            return None
+
+        data = self._read(self.parts[:2] + self.parts[3:4], shallow)
+        if shallow or data is None:
+            return data
+
+        if depth == 4:
+            return MatchRecord.from_summary(self.parts[3].replace('fixture_', ''), data)
+        if depth == 3:
+            return self._decode_fixtures(data)
+        if depth == 2:
+            return self._decode_league(self.parts[0], data)
+        if depth == 1:
+            return {league_key: self._decode_league(self.parts[0], fixtures) for league_key, fixtures in data.items()}
+        return {
+            season_key: {
+                league_key: self._decode_league(season_key, fixtures)
+                for league_key, fixtures in leagues.items()
+            }
+            for season_key, leagues in data.items()
+        }
+
+    def _decode_fixtures(self, fixtures: Dict[str, Any]) -> Dict[str, MatchRecord]:
+        return {
+            fixture_key: MatchRecord.from_summary(fixture_key.replace('fixture_', ''), summary)
+            for fixture_key, summary in fixtures.items()
+        }
+
+    def _decode_league(self, season_key: str, fixtures: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'metadata_season': {'year': int(season_key.replace('season_', ''))},
+            'fixtures': self._decode_fixtures(fixtures)
+        }
+
+class MatchSnapshotReference(MatchSummaryReference):
+    """Même interface que MatchSummaryReference, servie par l'instantané local (sans accès réseau)."""
+
+    LOCAL = True
+
+    def __init__(self, snapshot: MatchSnapshot, parts: Optional[List[str]] = None):
+        super().__init__(parts)
+        self.snapshot = snapshot
+
+    def _read(self, parts: List[str], shallow: bool) -> Any:
+        return self.snapshot.read(parts, shallow)
+
+class MatchReplicaReference(MatchSummaryReference):
+    """Même interface que MatchSummaryReference, servie par le réplica en mémoire du processus."""
+
+    LOCAL = True
+
+    def __init__(self, replica: MatchReplica, parts: Optional[List[str]] = None):
+        super().__init__(parts)
+        self.replica = replica
+
+    def _read(self, parts: List[str], shallow: bool) -> Any:
+        return self.replica.read(parts, shallow)
@@ -1,3 +1,479 @@
 from django.test import TestCase
 
-# Create your tests here.
+class MatchSnapshotTest(TestCase):
+    def test_write_load_and_read(self):
+        import tempfile
+        import numpy as np
+        from metrics.services.snapshot import MatchSnapshot
+        directory = tempfile.mkdtemp()
+        data = np.array([
+            (1, 2024, 39, 1714762800, 12, 10, 20, 2, 1, 1, 0),
+            (2, 2024, 61, 1714766400, 1, 30, 40, -1, -1, -1, -1),
+        ], dtype=MatchSnapshot.DTYPE)
+        MatchSnapshot.write(data, directory)
+
+        snapshot = MatchSnapshot.load(directory)
+        self.assertEqual(snapshot.metadata['count'], 2)
+        # Même forme que le nœud match_summaries ; les valeurs absentes redeviennent None
+        self.assertEqual(snapshot.read(['season_2024', 'league_61', 'fixture_2']), [1714766400, 1, 30, 40, None, None, None, None])
+        self.assertEqual(snapshot.read(['season_2024'], shallow=True), {'league_39': True, 'league_61': True})
+        self.assertIsNone(snapshot.read(['season_2023']))
+
+    def test_empty_snapshot_ignored(self):
+        import tempfile
+        from unittest import mock
+        import numpy as np
+        from metrics.services.snapshot import MatchSnapshot
+        from metrics.services.summaries import MatchSummaryReference
+        directory = tempfile.mkdtemp()
+        MatchSnapshot.write(np.array([], dtype=MatchSnapshot.DTYPE), directory)
+        # Instantané récent mais sans matchs : les métriques lisent la projection
+        MatchSummaryReference._complete = None
+        with self.settings(METRICS_SNAPSHOT_DIR=directory, METRICS_REPLICA=False), \
+                mock.patch('metrics.services.summaries.MatchSummaries') as summaries:
+            summaries.return_value.is_complete.return_value = True
+            reference = MatchSummaryReference.for_metrics()
+        MatchSummaryReference._complete = None
+        self.assertIs(type(reference), MatchSummaryReference)
+
+class MatchSummaryReferenceTest(TestCase):
+    def test_complete_marker_cached_per_process(self):
+        from unittest import mock
+        from metrics.services.results_service import ResultsService
+        from metrics.services.summaries import MatchSummaryReference
+
+        MatchSummaryReference._complete = None
+        with mock.patch('metrics.services.summaries.MatchSummaries') as summaries, \
+                self.settings(METRICS_REPLICA=False, METRICS_SNAPSHOT_MAX_AGE=0):
+            is_complete = summaries.return_value.is_complete
+            is_complete.return_value = True
+            # Construire les services ne lit rien : la source est résolue à la première utilisation
+            service = ResultsService()
+            self.assertEqual(is_complete.call_count, 0)
+            self.assertIsInstance(service.matches_ref, MatchSummaryReference)
+            self.assertIsInstance(service.h2h_service.matches_ref, MatchSummaryReference)
+            # Le marqueur n'est relu qu'après COMPLETE_TTL
+            self.assertEqual(is_complete.call_count, 1)
+        MatchSummaryReference._complete = None
+
+class MatchReplicaTest(TestCase):
+    def test_apply_events(self):
+        from types import SimpleNamespace
+        from metrics.services.replica import MatchReplica
+        replica = MatchReplica()
+
+        def event(event_type, path, data):
+            return SimpleNamespace(event_type=event_type, path=path, data=data)
+
+        replica.on_event(event('put', '/', {'season_2024': {'league_61': {'fixture_1': [1714762800, 1, 10, 20, None, None, None, None]}}}))
+        self.assertTrue(replica.ready.is_set())
+        replica.on_event(event('patch', '/season_2024/league_61', {'fixture_1/4': 2, 'fixture_2': [1714766400, 1, 30, 40, None, None, None, None]}))
+        replica.on_event(event('put', '/season_2024/league_61/fixture_2', None))
+
+        self.assertEqual(replica.version, 3)
+        self.assertEqual(replica.read(['season_2024', 'league_61'], shallow=True), {'fixture_1': True})
+        self.assertEqual(replica.read(['season_2024', 'league_61', 'fixture_1'])['4'], 2)
+        # Les nœuds vidés disparaissent, comme dans Firebase
+        replica.on_event(event('put', '/season_2024/league_61/fixture_1', None))
+        self.assertEqual(replica.read([]), {})
+
+    def test_shared_version_and_staleness(self):
+        import time
+        from types import SimpleNamespace
+        from metrics.services.replica import MatchReplica
+
+        def registration(alive):
+            return SimpleNamespace(_thread=SimpleNamespace(is_alive=lambda: alive))
+
+        replica = MatchReplica()
+        replica.registration = replica.meta_registration = registration(True)
+        replica.on_event(SimpleNamespace(event_type='put', path='/', data={}))
+        MatchReplica._instance = replica
+        try:
+            # Projection non marquée complète par rebuild_indexes : réplica non servi
+            self.assertIsNone(MatchReplica.get_dataset_version())
+            replica.on_meta_event(SimpleNamespace(event_type='put', path='/', data={'complete_at': 1714762800000}))
+            self.assertTrue(replica.is_complete())
+            # Sans version partagée, le compteur propre au worker
+            self.assertEqual(MatchReplica.get_dataset_version(), f'{replica.replica_id}:1')
+            replica.on_meta_event(SimpleNamespace(event_type='put', path='/version', data=42))
+            self.assertEqual(MatchReplica.get_dataset_version(), 'shared:42')
+
+            # Sans événement depuis plus de METRICS_REPLICA_MAX_IDLE secondes : périmé
+            replica.last_event_at = time.time() - 2 * 3600
+            with self.settings(METRICS_REPLICA_MAX_IDLE=3600):
+                self.assertTrue(replica.is_stale())
+                self.assertIsNone(MatchReplica.get_dataset_version())
+            with self.settings(METRICS_REPLICA_MAX_IDLE=0):
+                self.assertFalse(replica.is_stale())
+                # Listener arrêté sur une erreur de connexion : périmé
+                replica.meta_registration = registration(False)
+                self.assertTrue(replica.is_stale())
+        finally:
+            MatchReplica._instance = None
+
+class FixtureQueryBackendTest(TestCase):
+    def test_sql_aggregates(self):
+        from datetime import datetime, timezone
+        from loader.models import League, Team, Fixture
+        from metrics.services.orm_backend import FixtureQueryBackend
+        League.objects.create(id=61)
+        Team.objects.bulk_create([Team(id=10), Team(id=20), Team(id=30)])
+        for fixture_id, home, away, ft_home, ft_away, status in [
+            (1, 10, 20, 2, 1, 'FT'),
+            (2, 30, 10, 0, 0, 'FT'),
+            (3, 20, 30, 1, 3, 'AET'),
+            (4, 10, 30, None, None, 'NS'),
+        ]:
+            Fixture.objects.create(
+                id=fixture_id, league_id=61, season=2024, status=status,
+                kickoff=datetime(2024, 9, fixture_id, 15, tzinfo=timezone.utc),
+                home_team_id=home, away_team_id=away, ft_home=ft_home, ft_away=ft_away
+            )
+
+        backend = FixtureQueryBackend()
+        fixtures = backend.get_queryset(league_id=61)
+        self.assertEqual(backend.get_league_stats(fixtures), {
+            'matches': 3, 'home_wins': 1, 'away_wins': 1, 'draws': 1, 'goals': 7, 'btts': 2, 'clean_sheets': 1
+        })
+        # Buts vus depuis l'équipe 10 : 2-1 à domicile, 0-0 à l'extérieur
+        stats = backend.get_team_stats(backend.get_queryset(team_id=10), 10)
+        self.assertEqual((stats['wins'], stats['draws'], stats['goals_for'], stats['goals_against']), (1, 1, 2, 1))
+        self.assertEqual(backend.get_threshold_counts(fixtures, [0.5, 2.5]), {0.5: 2, 2.5: 2})
+        self.assertEqual(list(backend.get_queryset(league_id=61, last_matches=1).values_list('id', flat=True)), [3])
+
+        # Le chemin d'accès SQL figure dans les métadonnées, réponse vide comprise ; en mode ORM,
+        # aucune référence Firebase n'est ouverte
+        from unittest import mock
+        from metrics.services.goals_service import GoalsService
+        from metrics.services.results_service import ResultsService
+        with self.settings(METRICS_BACKEND='orm'), \
+                mock.patch('firebase_admin.db.reference', side_effect=AssertionError('Firebase lu en mode ORM')):
+            results = ResultsService().get_results(team_id=10)
+            self.assertEqual(results['metadata']['plan'], {'access_path': 'orm', 'fetched_rows': 2})
+            empty = GoalsService().get_results(team_id=99)
+            self.assertEqual(empty['metadata']['plan'], {'access_path': 'orm', 'fetched_rows': 0})
+
+class FilterPredicateTest(TestCase):
+    def test_predicates_hints_and_selection(self):
+        from metrics.services.filters.base import CompositeFilter
+        from metrics.services.filters.league import LeagueFilter
+        from metrics.services.filters.season import SeasonFilter
+        from metrics.services.filters.team import TeamFilter, TeamLocation
+        from metrics.services.filters.temporal import DateRangeFilter, MonthFilter
+        from metrics.services.filters.match_sequence import LastMatchesFilter
+        from metrics.services.records import MatchRecord
+
+        def match(fixture_id, date, home_id, away_id):
+            return MatchRecord.from_match({
+                'metadata': {'fixture_id': fixture_id, 'date': date, 'status': 'FT'},
+                'teams': {'home': {'id': home_id}, 'away': {'id': away_id}}
+            })
+
+        matches = [
+            match(1, '2024-09-01T15:00:00+00:00', 10, 20),
+            match(2, '2024-09-15T15:00:00+00:00', 20, 10),
+            match(3, '2024-10-01T15:00:00+00:00', 10, 30),
+        ]
+        composite = CompositeFilter([
+            TeamFilter(10, TeamLocation.HOME), LeagueFilter(61), SeasonFilter(2024), LastMatchesFilter(1)
+        ])
+        self.assertEqual(composite.get_path_hint(), {'league': 61, 'season': 2024})
+        self.assertEqual([m.fixture_id for m in matches if composite.matches(m)], [1, 3])
+        self.assertEqual([m.fixture_id for m in composite.select(matches)], [3])
+        self.assertEqual([m.fixture_id for m in matches if MonthFilter(2024, 9).matches(m)], [1, 2])
+        # Période non définie : le filtre temporel de base n'est pas instanciable
+        self.assertRaises(TypeError, DateRangeFilter)
+        # Deux ligues différentes : aucun chemin possible
+        self.assertIsNone(CompositeFilter([LeagueFilter(61), LeagueFilter(39)]).get_path_hint())
+
+class PathPushdownTest(TestCase):
+    def test_league_nodes_read_at_narrowest_path(self):
+        from metrics.services.filters.base import CompositeFilter
+
+        tree = {
+            'season_2023': {'league_61': {'fixtures': {}}, 'league_39': {'fixtures': {}}},
+            'season_2024': {'league_61': {'fixtures': {}}},
+        }
+        reads = []
+
+        class Ref:
+            def __init__(self, path=''):
+                self.path = path
+
+            def child(self, path):
+                return Ref(f'{self.path}/{path}'.strip('/'))
+
+            def get(self, etag=False, shallow=False):
+                reads.append((self.path, shallow))
+                node = tree
+                for part in filter(None, self.path.split('/')):
+                    node = node.get(part) if isinstance(node, dict) else None
+                return {key: True for key in node} if shallow and isinstance(node, dict) else node
+
+        def league_nodes(path_hint):
+            reads.clear()
+            return CompositeFilter([])._get_league_nodes(Ref(), path_hint)
+
+        self.assertEqual(len(league_nodes({'season': 2024, 'league': 61})), 1)
+        self.assertEqual(reads, [('season_2024/league_61', False)])
+        self.assertEqual(len(league_nodes({'season': 2023})), 2)
+        self.assertEqual(reads, [('season_2023', False)])
+        # Ligue sans saison : énumération superficielle des saisons, puis un nœud de ligue par saison
+        self.assertEqual(len(league_nodes({'league': 61})), 2)
+        self.assertEqual(reads[0], ('', True))
+        self.assertEqual(sorted(reads[1:]), [('season_2023/league_61', False), ('season_2024/league_61', False)])
+        self.assertEqual(len(league_nodes({})), 3)
+        self.assertEqual(reads, [('', False)])
+
+    def test_unplanned_index_read_by_league(self):
+        from firebase_admin import db
+        from loader.tests import FakeFirebase
+        from metrics.services.filters.base import CompositeFilter
+        from metrics.services.filters.temporal import YearFilter
+
+        def fixture(fixture_id, day):
+            return {
+                'metadata': {'fixture_id': fixture_id, 'date': f'2024-{day}T15:00:00+00:00', 'status': 'FT'},
+                'teams': {'home': {'id': 10}, 'away': {'id': 20}}
+            }
+
+        firebase = FakeFirebase({
+            'matches': {'season_2024': {
+                'league_61': {'fixtures': {f'fixture_{i}': fixture(i, f'09-0{i}') for i in (1, 2, 3)}},
+                'league_39': {'fixtures': {'fixture_4': fixture(4, '09-04'), 'fixture_5': fixture(5, '09-05')}},
+            }},
+            'index': {'date': {
+                f'2024-09-0{i}': {f'fixture_{i}': {'season': 2024, 'league': league, 'status': 'FT'}}
+                for i, league in ((1, 61), (2, 61), (3, 61), (4, 39))
+            }}
+        })
+        composite = CompositeFilter([YearFilter(2024)])
+        composite.MAX_INDEXED_FETCHES = 2
+        with firebase.patch():
+            matches = composite.apply(db.reference('matches'))
+        # Quatre candidats sans plan : une lecture par ligue, pas une par match
+        self.assertEqual(sorted(m.fixture_id for m in matches), [1, 2, 3, 4])
+        fixture_reads = sorted(path for path, _ in firebase.reads if path.startswith('matches'))
+        self.assertEqual(fixture_reads, ['matches/season_2024/league_39/fixtures', 'matches/season_2024/league_61/fixtures'])
+
+class MatchRecordTest(TestCase):
+    def test_decode_once(self):
+        from metrics.services.records import MatchRecord
+
+        record = MatchRecord.from_match({
+            'metadata': {'fixture_id': '7', 'date': '2024-09-07T20:45:00+00:00', 'status': 'FT'},
+            'teams': {'home': {'id': 10}, 'away': {'id': '20'}},
+            'score': {'fulltime': {'home': 2, 'away': 1}, 'halftime': {'home': 0, 'away': 1}}
+        })
+        self.assertEqual((record.fixture_id, record.home_id, record.away_id), (7, 10, 20))
+        self.assertEqual(record.kickoff, 1725741900)
+        self.assertEqual((record.year, record.month, record.weekday), (2024, 9, 5))
+        self.assertEqual(record.seconds, 20 * 3600 + 45 * 60)
+        self.assertEqual((record.goals_for(20), record.goals_against(20), record.total_goals()), (1, 2, 3))
+        self.assertEqual(record.ht_away, 1)
+        self.assertFalse(hasattr(record, '__dict__'))
+
+        undated = MatchRecord.from_match({'metadata': {'date': 'invalide'}})
+        self.assertIsNone(undated.kickoff)
+        self.assertIsNone(undated.weekday)
+
+class ColumnarMatchStoreTest(TestCase):
+    def test_masks_and_aggregates(self):
+        import numpy as np
+        from metrics.services.snapshot import MatchSnapshot
+        from metrics.services.columnar import ColumnarMatchStore
+        from metrics.services.filters.factory import FilterFactory
+        from metrics.services.filters.team import TeamLocation
+        from metrics.services.filters.weekday import Weekday
+
+        # Samedi 07/09/2024 20:45 UTC, dimanche 15/09 15:00, samedi 05/10 (non joué)
+        data = np.array([
+            (1, 2024, 61, 1725741900, 12, 10, 20, 2, 1, 1, 0),
+            (2, 2024, 61, 1726412400, 12, 20, 10, 0, 0, 0, 0),
+            (3, 2024, 61, 1728136800, 1, 10, 30, -1, -1, -1, -1),
+            (4, 2023, 39, 1694188800, 13, 30, 10, 3, 3, 1, 1),
+        ], dtype=MatchSnapshot.DTYPE)
+        store = ColumnarMatchStore(data)
+        self.assertEqual(store.weekday.tolist()[:3], [5, 6, 5])
+        self.assertEqual(store.seconds[0], 20 * 3600 + 45 * 60)
+        self.assertEqual((store.year[1], store.month[1]), (2024, 9))
+
+        def fixtures(**params):
+            indices = FilterFactory.create_filter(plan=False, **params).filter_store(store)
+            return store.fixture_id[indices].tolist()
+
+        self.assertEqual(fixtures(), [1, 2, 4])
+        self.assertEqual(fixtures(team_id=10, location=TeamLocation.HOME), [1])
+        self.assertEqual(fixtures(league_id=61, weekday=Weekday.SATURDAY), [1])
+        self.assertEqual(fixtures(year=2024, month=9, team_id=20), [1, 2])
+        self.assertEqual(fixtures(team_id=10, last_matches=2), [1, 2])
+        self.assertEqual(fixtures(league_id=61, season=2023), [])
+
+        indices = FilterFactory.create_filter(plan=False, team_id=10).filter_store(store)
+        stats = store.get_team_stats(indices, 10)
+        self.assertEqual((stats['wins'], stats['draws'], stats['goals_for'], stats['goals_against']), (1, 2, 5, 4))
+        self.assertEqual(store.get_team_stats(indices, 10, 'away')['matches'], 2)
+        self.assertEqual(store.get_threshold_counts(indices, [2.5, 5.5]), {2.5: 2, 5.5: 1})
+        self.assertEqual([record.fixture_id for record in store.records(indices)], [1, 2, 4])
+
+    def test_sequence_selection(self):
+        import numpy as np
+        from metrics.services.snapshot import MatchSnapshot
+        from metrics.services.columnar import ColumnarMatchStore
+        from metrics.services.records import MatchRecord
+        from metrics.services.filters.factory import FilterFactory
+        from metrics.services.filters.match_sequence import LastMatchesFilter, FirstMatchesFilter
+
+        # Coups d'envoi : 300, 100, 300, 200, 100 ; la ligne 5 n'est pas datée
+        data = np.array([
+            (fixture_id, 2024, 61, timestamp, 12, 10, 20 + fixture_id, 1, 0, 0, 0)
+            for fixture_id, timestamp in [(1, 300), (2, 100), (3, 300), (4, 200), (5, -1), (6, 100)]
+        ], dtype=MatchSnapshot.DTYPE)
+        store = ColumnarMatchStore(data)
+        self.assertEqual(store.fixture_id[store.team_rows(10)].tolist(), [2, 6, 4, 1, 3])
+        self.assertEqual(store.team_rows(99).tolist(), [])
+
+        def fixtures(**params):
+            indices = FilterFactory.create_filter(plan=False, **params).filter_store(store)
+            return store.fixture_id[indices].tolist()
+
+        # À coup d'envoi égal, l'ordre des lignes est conservé (comme un tri stable)
+        self.assertEqual(fixtures(team_id=10, last_matches=2), [1, 3])
+        self.assertEqual(fixtures(team_id=10, last_matches=3), [4, 1, 3])
+        self.assertEqual(fixtures(team_id=10, first_matches=1), [2])
+        self.assertEqual(fixtures(league_id=61, first_matches=3), [2, 6, 4])
+        self.assertEqual(fixtures(team_id=10, last_matches=10), [2, 6, 4, 1, 3])
+
+        records = store.records(np.arange(len(store)))
+        self.assertEqual([m.fixture_id for m in LastMatchesFilter(2).select(records)], [1, 3])
+        self.assertEqual([m.fixture_id for m in FirstMatchesFilter(3).select(records)], [2, 6, 4])
+        self.assertEqual(len(LastMatchesFilter(10).select(records)), 5)
+
+class H2HSequenceTest(TestCase):
+    def test_last_matches_after_h2h_selection(self):
+        import tempfile
+        import numpy as np
+        from datetime import datetime, timezone
+        from firebase_admin import db
+        from loader.tests import FakeFirebase
+        from metrics.services.h2h_service import H2HService
+        from metrics.services.snapshot import MatchSnapshot
+        from metrics.services.summaries import MatchSnapshotReference
+
+        # Trois confrontations 10-20, puis un match 10-30 plus récent
+        played = [(1, 10, 20, 1725195600), (2, 20, 10, 1726405200), (3, 10, 20, 1727614800), (4, 10, 30, 1728824400)]
+
+        def fixture(fixture_id, home_id, away_id, timestamp):
+            date = datetime.fromtimestamp(timestamp, timezone.utc).isoformat() if timestamp else None
+            return {
+                'metadata': {'fixture_id': fixture_id, 'date': date, 'status': 'FT'},
+                'teams': {'home': {'id': home_id}, 'away': {'id': away_id}}
+            }
+
+        def h2h_ids(service, **params):
+            return [m.fixture_id for m in service._get_h2h_matches(dict(params, team1_id=10, team2_id=20))]
+
+        # Colonnes de l'instantané
+        directory = tempfile.mkdtemp()
+        MatchSnapshot.write(np.array([
+            (fixture_id, 2024, 61, timestamp, 12, home_id, away_id, 1, 0, 0, 0)
+            for fixture_id, home_id, away_id, timestamp in played
+        ], dtype=MatchSnapshot.DTYPE), directory)
+        service = H2HService()
+        service._matches_ref = MatchSnapshotReference(MatchSnapshot.load(directory))
+        self.assertEqual(h2h_ids(service, last_matches=2), [2, 3])
+        self.assertEqual(h2h_ids(service, first_matches=1), [1])
+
+        # Index des paires, puis parcours sans index ; une confrontation sans date est classée en dernier
+        fixtures = {f'fixture_{row[0]}': fixture(*row) for row in played + [(5, 20, 10, None)]}
+        index = {
+            f'fixture_{fixture_id}': {'season': 2024, 'league': 61, 'status': 'FT', 'home': home_id}
+            for fixture_id, home_id, away_id, _ in played + [(5, 20, 10, None)] if away_id != 30
+        }
+        for data in (
+            {'matches': {'season_2024': {'league_61': {'fixtures': fixtures}}}, 'index': {'h2h': {'10_20': index}}},
+            {'matches': {'season_2024': {'league_61': {'fixtures': fixtures}}}},
+        ):
+            with FakeFirebase(data).patch():
+                service = H2HService()
+                service._matches_ref = db.reference('matches')
+                self.assertEqual(h2h_ids(service), [1, 2, 3, 5])
+                self.assertEqual(h2h_ids(service, last_matches=2), [2, 3])
+                self.assertEqual(h2h_ids(service, first_matches=1), [1])
+
+class QueryPlannerTest(TestCase):
+    def test_statistics_read_in_one_request(self):
+        from loader.tests import FakeFirebase
+        from metrics.services.filters.planner import IndexStatistics
+        firebase = FakeFirebase({'match_summaries_meta': {'statistics': {
+            'leagues': {'season_2023': {'league_61': 380}, 'season_2024': {'league_61': 380, 'league_39': 380}},
+            'teams': {'team_10': 76},
+            'h2h': {'10_20': 4},
+            'dates': {'2024-08-17': 10, '2024-08-18': 9, '2025-01-04': 8}
+        }}})
+        IndexStatistics._cache = None
+        with firebase.patch():
+            statistics = IndexStatistics()
+            self.assertEqual(statistics.total_count(), 1140)
+            self.assertEqual(statistics.league_count(league_id=61), 760)
+            self.assertEqual(statistics.league_count(2024, 39), 380)
+            self.assertEqual(statistics.season_count(), 2)
+            self.assertEqual((statistics.team_count(10), statistics.team_count(99)), (76, 0))
+            self.assertEqual(statistics.h2h_count(20, 10), 4)
+            self.assertEqual(statistics.date_count('2024-01-01', '2024-12-31'), 19)
+        IndexStatistics._cache = None
+        self.assertEqual(firebase.reads, [('match_summaries_meta/statistics', False)])
+
+    def test_access_path_and_residual_order(self):
+        from metrics.services.filters.planner import QueryPlanner
+        from metrics.services.filters.league import LeagueFilter
+        from metrics.services.filters.season import SeasonFilter
+        from metrics.services.filters.team import TeamFilter
+        from metrics.services.filters.weekday import WeekdayFilter, Weekday
+        from metrics.services.filters.game_time import GameTimeFilter, GameTimeSlot
+
+        class Statistics:
+            def league_count(self, season=None, league_id=None):
+                return {(None, None): 10000, (2024, 61): 380, (None, 61): 1900}[(season, league_id)]
+
+            def total_count(self):
+                return 10000
+
+            def season_count(self):
+                return 5
+
+            def team_count(self, team_id):
+                return {10: 190}.get(team_id, 0)
+
+            def h2h_count(self, team1_id, team2_id):
+                return 0
+
+            def date_count(self, start_date, end_date):
+                return None
+
+        planner = QueryPlanner(Statistics())
+        self.assertEqual(planner.index_read_cost(190) + planner.fetch_cost(190), 20 + 190 * 3.75)
+        self.assertEqual(planner.path_cost(380, 1), 400)
+
+        team = TeamFilter(10)
+        plan = planner.plan([team])
+        self.assertEqual(plan.access_path, 'team_index')
+        self.assertEqual(plan.index_filters, [team])
+        self.assertEqual(plan.estimated_rows, 190)
+        self.assertEqual(plan.residual, [])
+
+        # Équipe sans index : parcours du nœud de ligue
+        game_time = GameTimeFilter(GameTimeSlot.SLOT_20_23)
+        weekday = WeekdayFilter(Weekday.SATURDAY)
+        unknown_team = TeamFilter(99)
+        plan = planner.plan(
+            [unknown_team, LeagueFilter(61), SeasonFilter(2024), game_time, weekday],
+            {'league': 61, 'season': 2024}
+        )
+        self.assertEqual(plan.access_path, 'league_path')
+        self.assertEqual(plan.cost, 400)
+        self.assertEqual(plan.residual, [unknown_team, weekday, game_time])
+
+        self.assertEqual(planner.plan([weekday]).access_path, 'full_scan')
+        self.assertEqual(planner.plan([weekday]).to_dict()['residual_predicates'], ['WeekdayFilter'])